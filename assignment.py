@@ -0,0 +1,30 @@
+from typing import Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def assign(scores: np.ndarray, capacity: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign humans (rows) to AI agents (columns) to maximise the total score.
+
+    With capacity 1 this is one-to-one matching (Hungarian algorithm). With a
+    larger capacity every agent column is repeated capacity times, so each
+    agent can serve up to capacity humans. Only min(capacity, H) copies are
+    ever needed, which keeps the cost matrix at most H x (M * H).
+
+    Returns:
+        (human_rows, ai_columns) of the assigned pairs, ordered by human row.
+        Humans left over when there are more humans than agent slots are
+        absent from human_rows.
+    """
+    if capacity < 1:
+        raise ValueError("capacity must be at least 1")
+    n_humans, n_ais = scores.shape
+    if n_humans == 0 or n_ais == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    copies = min(capacity, n_humans)
+    slot_scores = np.repeat(scores, copies, axis=1) if copies > 1 else scores
+    human_rows, slots = linear_sum_assignment(slot_scores, maximize=True)
+    return human_rows, slots // copies
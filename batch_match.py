@@ -0,0 +1,183 @@
+"""
+Headless batch matching: stream human profiles against an AI catalog.
+
+Profiles are read from JSONL (one profile per line) or from a JSON file in the
+sample_data.json format. Humans are scored in fixed-size blocks against an
+index built once over the AI catalog, and the top-k matches per human are
+written out as they are produced, so memory stays bounded by the catalog and
+one block.
+
+    python batch_match.py --humans experts.jsonl --ais agents.jsonl \\
+        --output matches.csv --top-k 5
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterator, List
+
+from encoders import create_encoder
+from feedback_store import feedback_store_from_env
+from matcher import ExpertMatcher
+
+OUTPUT_FIELDS = ['human', 'rank', 'ai', 'total_score', 'skill_similarity', 'complementarity',
+                 'domain_alignment', 'skill_overlap', 'feedback_adjustment', 'explanation']
+
+
+def iter_profiles(path: str, key: str) -> Iterator[Dict]:
+    """
+    Yield profiles from a JSONL file, or from the `key` list of a sample_data.json-style file.
+    """
+    if path.endswith('.jsonl'):
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r') as f:
+            yield from json.load(f)[key]
+
+
+def iter_blocks(profiles: Iterator[Dict], block_size: int) -> Iterator[List[Dict]]:
+    """Group a profile stream into lists of at most block_size profiles."""
+    while True:
+        block = list(islice(profiles, block_size))
+        if not block:
+            return
+        yield block
+
+
+class MatchWriter:
+    """Write match rows as JSONL or CSV, to a file or stdout ('-')."""
+
+    def __init__(self, path: str, output_format: str = None):
+        self.format = output_format or ('csv' if path.endswith('.csv') else 'jsonl')
+        self.file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self.csv_writer = None
+        if self.format == 'csv':
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, row: Dict):
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + '\n')
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def ranked_rows(matches: List[Dict]) -> Iterator[Dict]:
+    """Add a 1-based per-human rank to matches that are grouped by human, best first."""
+    rank = 0
+    previous_human = None
+    for match in matches:
+        rank = rank + 1 if match['human'] == previous_human else 1
+        previous_human = match['human']
+        yield {'rank': rank, **match}
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Stream human profiles against an AI catalog and write ranked matches.')
+    parser.add_argument('--humans', required=True,
+                        help='Human profiles (.jsonl, or .json in the sample_data.json format)')
+    parser.add_argument('--ais',
+                        help='AI profiles (.jsonl, or .json in the sample_data.json format)')
+    parser.add_argument('--snapshot',
+                        help='Load the AI catalog from a snapshot written by snapshot.py instead of --ais')
+    parser.add_argument('--output', default='-', help="Output path (.jsonl or .csv), '-' for stdout")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='Override the output format')
+    parser.add_argument('--top-k', type=int, default=5, help='Matches to keep per human')
+    parser.add_argument('--block-size', type=int, default=1024, help='Humans scored per block')
+    parser.add_argument('--skill-similarity', type=float,
+                        default=ExpertMatcher.DEFAULT_WEIGHTS['skill_similarity'])
+    parser.add_argument('--complementarity', type=float,
+                        default=ExpertMatcher.DEFAULT_WEIGHTS['complementarity'])
+    parser.add_argument('--domain-alignment', type=float,
+                        default=ExpertMatcher.DEFAULT_WEIGHTS['domain_alignment'])
+    parser.add_argument('--skill-overlap', type=float,
+                        default=ExpertMatcher.DEFAULT_WEIGHTS['skill_overlap'],
+                        help='Weight of the soft (embedding-based) skill overlap')
+    parser.add_argument('--index', choices=['exact', 'ivf'], default='exact',
+                        help='AI catalog index; ivf trades recall for speed on large catalogs')
+    parser.add_argument('--n-probe', type=int, default=8, help='Inverted lists visited in ivf mode')
+    parser.add_argument('--precision', choices=['float32', 'float16', 'int8'], default='float32',
+                        help='Storage precision of the AI catalog embeddings')
+    parser.add_argument('--rescore', type=int, default=4,
+                        help='With a quantized catalog, re-score k * RESCORE agents per human in float32')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Score tiles in this many processes (exact float32 mode only)')
+    args = parser.parse_args(argv)
+    if bool(args.ais) == bool(args.snapshot):
+        parser.error("give exactly one of --ais and --snapshot")
+    if args.snapshot and args.workers > 1:
+        parser.error("--workers needs --ais")
+    if args.workers > 1:
+        # The process pool scores every AI agent in float32, so these would be silently ignored
+        ignored = [f"--{name.replace('_', '-')}"
+                   for name in ('index', 'n_probe', 'precision', 'rescore')
+                   if getattr(args, name) != parser.get_default(name)]
+        if ignored:
+            parser.error(f"--workers only scores the exact float32 catalog; "
+                         f"drop {', '.join(ignored)} or use --workers 1")
+    return args
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    weights = {
+        'skill_similarity': args.skill_similarity,
+        'complementarity': args.complementarity,
+        'domain_alignment': args.domain_alignment,
+        'skill_overlap': args.skill_overlap
+    }
+    matcher = ExpertMatcher(
+        feedback_store=feedback_store_from_env(),
+        encoder=create_encoder(os.environ.get('INTELLIBRIDGE_ENCODER', 'sentence-transformers')))
+
+    start = time.perf_counter()
+    scorer = None
+    if args.snapshot:
+        from snapshot import load_index
+        n_ais = len(load_index(matcher, args.snapshot, args.precision, args.rescore,
+                               args.n_probe))
+    else:
+        ai_profiles = list(iter_profiles(args.ais, 'ai_profiles'))
+        n_ais = len(ai_profiles)
+        if args.workers > 1:
+            from tiled import TiledScorer
+            scorer = TiledScorer(matcher, ai_profiles, weights, args.top_k, workers=args.workers)
+        else:
+            matcher.build_index(ai_profiles, mode=args.index, n_probe=args.n_probe,
+                                precision=args.precision, rescore=args.rescore)
+    if scorer is not None:
+        match_block = scorer.match
+    else:
+        def match_block(block):
+            return matcher.match_top_k(block, args.top_k, weights, block_size=args.block_size)
+    print(f"Indexed {n_ais} AI profiles in {time.perf_counter() - start:.1f} s",
+          file=sys.stderr)
+
+    writer = MatchWriter(args.output, args.format)
+    n_humans = 0
+    try:
+        for block in iter_blocks(iter_profiles(args.humans, 'human_profiles'), args.block_size):
+            for row in ranked_rows(match_block(block)):
+                writer.write(row)
+            n_humans += len(block)
+            elapsed = time.perf_counter() - start
+            print(f"Matched {n_humans} humans ({n_humans / elapsed:.0f}/s)", file=sys.stderr)
+    finally:
+        writer.close()
+        if scorer is not None:
+            scorer.close()
+
+
+if __name__ == '__main__':
+    main()
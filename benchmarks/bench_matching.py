@@ -0,0 +1,207 @@
+"""
+Scaling benchmark for extraction, encoding, scoring, sorting and feedback.
+
+Synthetic profiles are matched at several grid sizes with the offline
+HashingEncoder, so no model is downloaded and timings exclude the model itself.
+Results are written as JSON; pass an earlier results file as --baseline to
+flag stages that got slower.
+
+    python benchmarks/bench_matching.py --sizes 100x100,1000x1000 --output results.json
+    python benchmarks/bench_matching.py --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from encoders import HashingEncoder  # noqa: E402
+from extractor import SkillExtractor  # noqa: E402
+from feedback_store import JsonlFeedbackStore  # noqa: E402
+from matcher import ExpertMatcher  # noqa: E402
+from skill_matrix import SkillVocabulary  # noqa: E402
+from synthetic import generate_ais, generate_humans  # noqa: E402
+
+
+def parse_sizes(sizes: str) -> List[Tuple[int, int]]:
+    """Parse '100x50,1000x200' into [(100, 50), (1000, 200)] (humans x AI agents)."""
+    return [tuple(int(n) for n in size.lower().split('x')) for size in sizes.split(',')]
+
+
+def measure(func: Callable, repeat: int, setup: Callable = None) -> Dict[str, float]:
+    """Best and median wall time of func over repeat runs; setup runs untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'seconds_min': min(times), 'seconds_median': statistics.median(times)}
+
+
+def make_matcher(directory: str) -> ExpertMatcher:
+    encoder = HashingEncoder()
+    return ExpertMatcher(
+        embedding_cache=EmbeddingCache(encoder.name, cache_dir=os.path.join(directory, 'cache')),
+        feedback_store=JsonlFeedbackStore(os.path.join(directory, 'feedback.jsonl')),
+        encoder=encoder)
+
+
+def bench_size(n_humans: int, n_ais: int, repeat: int, n_feedback: int,
+               directory: str) -> Dict[str, Dict[str, float]]:
+    """Time every stage on one grid size."""
+    humans = generate_humans(n_humans)
+    ais = generate_ais(n_ais)
+    extractor = SkillExtractor()
+    matcher = make_matcher(directory)
+    texts = [matcher._human_text(h) for h in humans] + [matcher._ai_text(a) for a in ais]
+    stages = {}
+
+    def extract():
+        for human in humans:
+            extractor.extract_skills(human['bio'])
+        for ai in ais:
+            extractor.extract_ai_capabilities(ai['description'])
+    stages['extraction'] = measure(extract, repeat)
+
+    stages['encoding_cold'] = measure(
+        lambda: matcher._get_embeddings(texts), repeat, setup=matcher.embedding_cache.clear)
+    stages['encoding_cached'] = measure(lambda: matcher._get_embeddings(texts), repeat)
+
+    compiled = {}
+
+    def compile_profiles():
+        vocabulary = SkillVocabulary()
+        compiled['humans'] = matcher._compile_profiles(humans, True, vocabulary)
+        compiled['ais'] = matcher._compile_profiles(ais, False, vocabulary)
+    stages['compile'] = measure(compile_profiles, repeat)
+
+    weights = ExpertMatcher.DEFAULT_WEIGHTS
+    components = {}
+
+    def score():
+        components.update(matcher._component_matrices(compiled['humans'], compiled['ais']))
+        components['total'] = matcher._combine_scores(components, weights)
+    stages['scoring'] = measure(score, repeat)
+
+    def sort_and_build():
+        order = np.argsort(-components['total'], axis=1, kind='stable')
+        rows = np.repeat(np.arange(n_humans), n_ais)
+        matcher._build_matches(compiled['humans'].profiles, compiled['ais'].profiles, components,
+                               components['total'], rows, order.ravel())
+    stages['sorting'] = measure(sort_and_build, repeat)
+
+    def add_feedback():
+        for i in range(n_feedback):
+            matcher.add_feedback(humans[i % n_humans]['name'], ais[(i * 7) % n_ais]['name'],
+                                 i % 3 != 0, 'benchmark')
+    stages['feedback_append'] = measure(add_feedback, repeat, setup=matcher.clear_feedback)
+    stages['feedback_adjustment'] = measure(
+        lambda: matcher.feedback.adjustment_matrix(humans, ais), repeat)
+
+    stages['match_experts'] = measure(
+        lambda: matcher.match_experts(humans, ais), repeat,
+        setup=matcher.component_cache.clear)
+    stages['match_experts_rerun'] = measure(
+        lambda: matcher.match_experts(humans, ais, {'skill_similarity': 0.5,
+                                                    'complementarity': 0.3,
+                                                    'domain_alignment': 0.2}), repeat)
+    return stages
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float,
+            min_seconds: float = 0.005) -> List[Dict]:
+    """
+    Results whose best time is more than threshold slower than the baseline.
+
+    Stages that took less than min_seconds in the baseline are skipped, since
+    timer noise dominates them.
+    """
+    previous = {(r['humans'], r['ais'], r['stage']): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['humans'], result['ais'], result['stage']))
+        if old is None or old['seconds_min'] < min_seconds:
+            continue
+        ratio = result['seconds_min'] / old['seconds_min']
+        if ratio > 1 + threshold:
+            regressions.append(dict(result, baseline_seconds_min=old['seconds_min'], ratio=ratio))
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='50x50,200x200,1000x1000',
+                        help='Comma-separated HUMANSxAIS grid sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the best is kept')
+    parser.add_argument('--feedback', type=int, default=1000, help='Feedback records per run')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown reported as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help='Ignore stages faster than this in the baseline')
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        # The matcher migrates ./match_feedback.json on start; keep it away from real data
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            for n_humans, n_ais in parse_sizes(args.sizes):
+                stages = bench_size(n_humans, n_ais, args.repeat, args.feedback,
+                                    os.path.join(directory, f'{n_humans}x{n_ais}'))
+                for stage, timing in stages.items():
+                    results.append({'humans': n_humans, 'ais': n_ais, 'stage': stage, **timing})
+                    print(f"{n_humans:>6} x {n_ais:<6} {stage:<22} "
+                          f"{timing['seconds_min'] * 1000:10.2f} ms")
+        finally:
+            os.chdir(cwd)
+
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'repeat': args.repeat,
+                'feedback': args.feedback
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    for r in regressions:
+        print(f"REGRESSION {r['humans']} x {r['ais']} {r['stage']}: "
+              f"{r['baseline_seconds_min'] * 1000:.2f} ms -> {r['seconds_min'] * 1000:.2f} ms "
+              f"({r['ratio']:.2f}x)")
+    if not regressions:
+        print(f"No stage slower than {1 + args.threshold:.2f}x the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
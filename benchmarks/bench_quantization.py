@@ -0,0 +1,85 @@
+"""
+Accuracy and memory report for quantized catalog embeddings.
+
+For float16 and int8 catalogs it reports the memory of the embedding matrix,
+the error of the quantized similarity scores, and the recall of match_top_k
+against the float32 ranking, with and without float32 re-scoring of the
+shortlist.
+
+    python benchmarks/bench_quantization.py --humans 500 --ais 20000 --k 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from encoders import HashingEncoder  # noqa: E402
+from feedback_store import JsonlFeedbackStore  # noqa: E402
+from matcher import ExpertMatcher  # noqa: E402
+from quantization import accuracy_report  # noqa: E402
+from synthetic import generate_ais, generate_humans  # noqa: E402
+
+
+def top_k_pairs(matches):
+    return {(match['human'], match['ai']) for match in matches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--humans', type=int, default=500)
+    parser.add_argument('--ais', type=int, default=20000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rescore', type=int, default=4, help='Shortlist size as a multiple of k')
+    parser.add_argument('--encoder', choices=['hashing', 'model'], default='hashing',
+                        help="'model' uses all-MiniLM-L6-v2 (needs sentence-transformers)")
+    args = parser.parse_args()
+
+    humans = generate_humans(args.humans)
+    ais = generate_ais(args.ais)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        encoder = HashingEncoder() if args.encoder == 'hashing' else None
+        model_name = encoder.name if encoder is not None else 'all-MiniLM-L6-v2'
+        matcher = ExpertMatcher(
+            embedding_cache=EmbeddingCache(model_name, max_entries=args.humans + args.ais),
+            feedback_store=JsonlFeedbackStore(),
+            model_name=model_name,
+            encoder=encoder)
+
+        matcher.build_index(ais)
+        catalog_embeddings = matcher.catalog.embeddings
+        start = time.perf_counter()
+        exact = top_k_pairs(matcher.match_top_k(humans, args.k))
+        exact_seconds = time.perf_counter() - start
+        queries = matcher._normalize_rows(matcher._get_embeddings(
+            [matcher._human_text(human) for human in humans]))
+
+        print(f"{args.humans} humans x {args.ais} AI agents, k = {args.k}, {args.encoder} encoder")
+        print(f"{'precision':<10} {'memory':>10} {'ratio':>6} {'max err':>9} {'mean err':>9} "
+              f"{'sim recall':>10} {'recall':>7} {'rescored':>9} {'time (s)':>9}")
+        print(f"{'float32':<10} {catalog_embeddings.nbytes / 1e6:8.1f}MB {1.0:6.2f} {0:9.5f} "
+              f"{0:9.5f} {1.0:10.3f} {1.0:7.3f} {1.0:9.3f} {exact_seconds:9.2f}")
+        for precision in ('float16', 'int8'):
+            report = accuracy_report(catalog_embeddings, queries, precision, args.k)
+            matcher.build_index(ais, precision=precision, rescore=0)
+            plain = top_k_pairs(matcher.match_top_k(humans, args.k))
+            matcher.build_index(ais, precision=precision, rescore=args.rescore)
+            start = time.perf_counter()
+            rescored = top_k_pairs(matcher.match_top_k(humans, args.k))
+            seconds = time.perf_counter() - start
+            print(f"{precision:<10} {report['quantized_bytes'] / 1e6:8.1f}MB "
+                  f"{report['compression']:6.2f} {report['max_abs_error']:9.5f} "
+                  f"{report['mean_abs_error']:9.5f} {report['recall_at_k']:10.3f} "
+                  f"{len(plain & exact) / len(exact):7.3f} "
+                  f"{len(rescored & exact) / len(exact):9.3f} {seconds:9.2f}")
+        print("sim recall: top-k by embedding similarity alone; recall / rescored: top-k by "
+              "total score without / with float32 re-scoring")
+
+
+if __name__ == '__main__':
+    main()
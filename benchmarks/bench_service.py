@@ -0,0 +1,129 @@
+"""
+Load test for the micro-batching scoring service.
+
+Starts service.py in-process on a synthetic AI catalog with the offline
+HashingEncoder, sends concurrent single-human /match_top_k requests, and reports
+throughput, client latency and the service's batch-size metrics for each
+batch window. A window of 0 encodes every request on its own.
+
+    python benchmarks/bench_service.py --requests 2000 --concurrency 64 --windows 0,2,5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from encoders import HashingEncoder  # noqa: E402
+from feedback_store import JsonlFeedbackStore  # noqa: E402
+from matcher import ExpertMatcher  # noqa: E402
+from service import MatchingService  # noqa: E402
+from synthetic import generate_ais, generate_humans  # noqa: E402
+
+
+async def post(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str,
+               payload: dict) -> int:
+    """Send one request on a keep-alive connection and return the status code."""
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1')
+                 + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_load(port: int, humans: list, k: int, concurrency: int) -> dict:
+    queue = asyncio.Queue()
+    for human in humans:
+        queue.put_nowait(human)
+    latencies, statuses = [], []
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        while not queue.empty():
+            human = queue.get_nowait()
+            start = time.perf_counter()
+            statuses.append(await post(reader, writer, '/match_top_k', {'humans': [human], 'k': k}))
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    seconds = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {'seconds': seconds, 'ok': statuses.count(200), 'rejected': statuses.count(503),
+            'p50': np.percentile(latencies, 50), 'p99': np.percentile(latencies, 99)}
+
+
+async def bench_window(window_ms: float, args: argparse.Namespace, ais: list, humans: list,
+                       directory: str) -> dict:
+    encoder = HashingEncoder()
+    matcher = ExpertMatcher(
+        embedding_cache=EmbeddingCache(encoder.name, cache_dir=os.path.join(directory, str(window_ms)),
+                                       max_entries=args.ais + args.requests),
+        feedback_store=JsonlFeedbackStore(os.path.join(directory, 'feedback.jsonl')),
+        encoder=encoder)
+    matcher.build_index(ais)
+    service = MatchingService(matcher, window_ms / 1000, args.max_batch, args.max_queue)
+    server = await service.start('127.0.0.1', 0)
+    try:
+        result = await run_load(server.sockets[0].getsockname()[1], humans, args.k,
+                                args.concurrency)
+        result['metrics'] = service.metrics.snapshot(0)
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--ais', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--windows', default='0,2,5', help='Comma-separated batch windows in ms')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    args = parser.parse_args()
+
+    ais = generate_ais(args.ais)
+    humans = generate_humans(args.requests, seed=7)
+    print(f"{args.requests} requests, {args.concurrency} clients, {args.ais} AI agents, k = {args.k}")
+    print(f"{'window':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batches':>8} "
+          f"{'mean batch':>10} {'rejected':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        # The matcher migrates ./match_feedback.json on start; keep it away from real data
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            for window in (float(w) for w in args.windows.split(',')):
+                result = asyncio.run(bench_window(window, args, ais, humans, directory))
+                metrics = result['metrics']
+                print(f"{window:>6.1f}ms {result['ok'] / result['seconds']:8.0f} "
+                      f"{result['p50']:8.2f} {result['p99']:8.2f} {metrics['batches']:8d} "
+                      f"{metrics['batch_size']['mean']:10.1f} {result['rejected']:9d}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Ranking agreement and speed of encoder backends.
+
+Every backend matches the same profiles. The first backend is the
+reference: for the others, the script reports how well their per-human
+rankings agree with it (Spearman correlation, top-k overlap and top-1
+agreement), both for the total score and for skill similarity alone. It
+also reports start-up time, cold encoding time (including any model load)
+and warm encoding throughput.
+
+    python benchmarks/compare_encoders.py --data sample_data.json
+    python benchmarks/compare_encoders.py --synthetic 200x500 --backends sentence-transformers,hashing
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.stats import spearmanr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from encoders import create_encoder  # noqa: E402
+from feedback_store import JsonlFeedbackStore  # noqa: E402
+from matcher import ExpertMatcher  # noqa: E402
+from synthetic import generate_ais, generate_humans  # noqa: E402
+
+
+def score_grids(matcher: ExpertMatcher, humans: List[Dict],
+                ais: List[Dict]) -> Dict[str, np.ndarray]:
+    """Humans x AI agents matrices of the total score and the skill similarity."""
+    results = matcher.match_experts(humans, ais)
+    grids = {}
+    for name in ('total_score', 'skill_similarity'):
+        grid = np.empty((len(humans), len(ais)))
+        grid[results.human_rows, results.ai_rows] = results.scores[name]
+        grids[name] = grid
+    return grids
+
+
+def agreement(reference: np.ndarray, other: np.ndarray, k: int) -> Tuple[float, float, float]:
+    """Mean per-human Spearman correlation, top-k overlap and top-1 agreement of two grids."""
+    k = min(k, reference.shape[1])
+    rhos, overlaps, top1 = [], [], []
+    for ref_row, row in zip(reference, other):
+        if reference.shape[1] > 1:
+            rho = spearmanr(ref_row, row).correlation
+            rhos.append(0.0 if np.isnan(rho) else rho)
+        ref_top = np.argsort(-ref_row, kind='stable')[:k]
+        top = np.argsort(-row, kind='stable')[:k]
+        overlaps.append(len(set(ref_top.tolist()) & set(top.tolist())) / k)
+        top1.append(ref_top[0] == top[0])
+    return (float(np.mean(rhos)) if rhos else 1.0, float(np.mean(overlaps)),
+            float(np.mean(top1)))
+
+
+def run_backend(backend: str, humans: List[Dict], ais: List[Dict],
+                directory: str) -> Dict:
+    start = time.perf_counter()
+    encoder = create_encoder(backend)
+    matcher = ExpertMatcher(
+        embedding_cache=EmbeddingCache(encoder.name, cache_dir=os.path.join(directory, backend),
+                                       max_entries=len(humans) + len(ais)),
+        feedback_store=JsonlFeedbackStore(os.path.join(directory, 'feedback.jsonl')),
+        encoder=encoder)
+    startup = time.perf_counter() - start
+
+    texts = [matcher._human_text(h) for h in humans] + [matcher._ai_text(a) for a in ais]
+    start = time.perf_counter()
+    matcher._get_embeddings(texts)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    encoder.encode(texts)
+    warm = time.perf_counter() - start
+    return {'backend': backend, 'startup': startup, 'cold': cold,
+            'texts_per_second': len(texts) / warm if warm else float('inf'),
+            'grids': score_grids(matcher, humans, ais)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', default=os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_data.json'),
+        help='Profiles in the sample_data.json format')
+    parser.add_argument('--synthetic', help='Use HUMANSxAIS synthetic profiles instead of --data')
+    parser.add_argument('--backends', default='sentence-transformers,hashing',
+                        help='Comma-separated backends; the first is the reference')
+    parser.add_argument('--k', type=int, default=3, help='Cut-off for the top-k overlap')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        n_humans, n_ais = (int(n) for n in args.synthetic.lower().split('x'))
+        humans, ais = generate_humans(n_humans), generate_ais(n_ais)
+    else:
+        with open(args.data, 'r') as f:
+            data = json.load(f)
+        humans, ais = data['human_profiles'], data['ai_profiles']
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The matcher migrates ./match_feedback.json on start; keep it away from real data
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            runs = [run_backend(backend, humans, ais, directory)
+                    for backend in args.backends.split(',')]
+        finally:
+            os.chdir(cwd)
+
+    reference = runs[0]
+    print(f"{len(humans)} humans x {len(ais)} AI agents, reference: {reference['backend']}")
+    print(f"{'backend':<22} {'startup s':>9} {'cold s':>8} {'texts/s':>9} "
+          f"{'rho total':>9} {'top-k':>6} {'top-1':>6} {'rho skill':>9} {'top-k':>6}")
+    for run in runs:
+        total = agreement(reference['grids']['total_score'], run['grids']['total_score'], args.k)
+        skill = agreement(reference['grids']['skill_similarity'],
+                          run['grids']['skill_similarity'], args.k)
+        print(f"{run['backend']:<22} {run['startup']:9.3f} {run['cold']:8.3f} "
+              f"{run['texts_per_second']:9.0f} {total[0]:9.3f} {total[1]:6.3f} {total[2]:6.3f} "
+              f"{skill[0]:9.3f} {skill[1]:6.3f}")
+    print(f"rho: mean per-human Spearman correlation with the reference ranking; "
+          f"top-k / top-1: share of the reference's top {args.k} / best agent found")
+
+
+if __name__ == '__main__':
+    main()
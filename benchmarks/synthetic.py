@@ -0,0 +1,102 @@
+"""
+Synthetic profiles for benchmarks.
+
+Profiles are drawn from a handful of fields (data science, cloud, web, ...)
+so that skills, bios and capabilities overlap the way real directories do,
+and bios mention the keywords SkillExtractor looks for. The same seed always
+produces the same profiles.
+"""
+import random
+from typing import Dict, List
+
+
+FIELDS = {
+    'data science': {
+        'skills': ['python', 'machine learning', 'deep learning', 'data analysis', 'sql',
+                   'statistics', 'tensorflow', 'pytorch', 'data visualization', 'nlp'],
+        'domains': ['healthcare', 'finance', 'retail', 'ml', 'ai'],
+        'tasks': ['predictive modeling', 'classification', 'regression', 'clustering',
+                  'anomaly detection', 'forecasting']
+    },
+    'cloud': {
+        'skills': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'devops', 'cloud computing',
+                   'terraform', 'python', 'go'],
+        'domains': ['cloud', 'finance', 'manufacturing'],
+        'tasks': ['infrastructure automation', 'cost optimization', 'incident response',
+                  'capacity planning', 'deployment pipelines']
+    },
+    'web': {
+        'skills': ['javascript', 'frontend', 'backend', 'full stack', 'web development',
+                   'react', 'node.js', 'java', 'ruby', 'sql'],
+        'domains': ['web', 'retail', 'education'],
+        'tasks': ['code generation', 'ui testing', 'accessibility review', 'api design',
+                  'performance profiling']
+    },
+    'healthcare': {
+        'skills': ['clinical research', 'medical imaging', 'healthcare analytics', 'python',
+                   'statistics', 'computer vision', 'regulatory compliance'],
+        'domains': ['healthcare', 'ai', 'ml'],
+        'tasks': ['medical diagnosis', 'treatment planning', 'clinical decision support',
+                  'medical imaging analysis', 'patient data processing']
+    },
+    'design': {
+        'skills': ['figma', 'adobe xd', 'user research', 'prototyping', 'ux design',
+                   'communication', 'creativity'],
+        'domains': ['web', 'education', 'retail'],
+        'tasks': ['wireframe generation', 'usability analysis', 'design critique',
+                  'content generation']
+    }
+}
+SOFT_SKILLS = ['leadership', 'communication', 'teamwork', 'problem-solving', 'collaboration',
+               'time management', 'adaptability']
+FIRST_NAMES = ['Alex', 'Sam', 'Priya', 'Chen', 'Maria', 'Omar', 'Lena', 'Kofi', 'Yuki',
+               'Diego', 'Ana', 'Ravi', 'Noor', 'Tom', 'Ines', 'Jon']
+LAST_NAMES = ['Smith', 'Garcia', 'Patel', 'Kim', 'Nguyen', 'Okafor', 'Rossi', 'Silva',
+              'Cohen', 'Haddad', 'Novak', 'Tanaka', 'Berg', 'Moreau']
+AI_SUFFIXES = ['Assist', 'Pilot', 'Bot', 'Engine', 'Agent', 'Copilot', 'Analyst']
+
+
+def _field(rng: random.Random) -> Dict:
+    return FIELDS[rng.choice(list(FIELDS))]
+
+
+def generate_humans(n: int, seed: int = 0) -> List[Dict]:
+    """n human expert profiles in the sample_data.json format."""
+    rng = random.Random(seed)
+    humans = []
+    for i in range(n):
+        field = _field(rng)
+        skills = rng.sample(field['skills'], rng.randint(3, min(7, len(field['skills']))))
+        skills += rng.sample(SOFT_SKILLS, rng.randint(0, 2))
+        domain = rng.choice(field['domains'])
+        years = rng.randint(2, 25)
+        bio = (f"{rng.choice(['Senior', 'Lead', 'Principal', 'Staff'])} specialist with "
+               f"{years} years of experience in {domain}. Works with "
+               f"{', '.join(skills[:-1])} and {skills[-1]}. Known for "
+               f"{rng.choice(SOFT_SKILLS)} and {rng.choice(field['tasks'])}.")
+        humans.append({
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} #{i}",
+            'bio': bio,
+            'skills': skills
+        })
+    return humans
+
+
+def generate_ais(n: int, seed: int = 1) -> List[Dict]:
+    """n AI agent profiles in the sample_data.json format."""
+    rng = random.Random(seed)
+    ais = []
+    for i in range(n):
+        field = _field(rng)
+        capabilities = rng.sample(field['tasks'], rng.randint(2, len(field['tasks'])))
+        capabilities += rng.sample(field['skills'], rng.randint(0, 3))
+        domains = rng.sample(field['domains'], rng.randint(1, len(field['domains'])))
+        description = (f"AI system for {', '.join(domains)} teams. It can "
+                       f"{capabilities[0]} and is able to {capabilities[1]}. "
+                       f"Cannot replace human review of {rng.choice(field['tasks'])}.")
+        ais.append({
+            'name': f"{domains[0].title()}{rng.choice(AI_SUFFIXES)} {i}",
+            'description': description,
+            'capabilities': capabilities
+        })
+    return ais
@@ -0,0 +1,219 @@
+"""
+Bulk import of human expert and AI agent profiles with parallel skill extraction.
+
+Profiles are streamed from CSV or JSONL. Human rows have 'name', 'bio' and
+'skills' columns, AI rows 'name', 'description' and 'capabilities'; listed
+skills are comma-separated in CSV and a list or a comma-separated string in
+JSONL. The bios and descriptions are run through SkillExtractor in a process
+pool, a chunk of rows per task with only a few chunks in flight, so memory
+stays bounded however large the file is. Extracted skills are appended to the
+listed ones.
+
+    python bulk_import.py --input experts.csv --kind human --output experts.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import chain, islice
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from extractor import SkillExtractor
+from profile_store import normalize_skill
+
+# kind -> (text field, skills field, extracted categories merged into the skills)
+PROFILE_FIELDS = {
+    'human': ('bio', 'skills', ('technical', 'soft_skills', 'domains', 'tools')),
+    'ai': ('description', 'capabilities', ('tasks', 'domains', 'techniques'))
+}
+
+
+def iter_records(source, file_format: str = None) -> Iterator[Dict]:
+    """
+    Yield raw rows from a CSV or JSONL file.
+
+    Args:
+        source: Path, or a binary file object such as a Streamlit upload
+        file_format: 'csv' or 'jsonl' (default from the file name)
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    file_format = file_format or ('csv' if name.lower().endswith('.csv') else 'jsonl')
+    if isinstance(source, str):
+        f = open(source, 'r', encoding='utf-8', newline='')
+    else:
+        f = io.TextIOWrapper(source, encoding='utf-8', newline='')
+    try:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if isinstance(source, str):
+            f.close()
+        else:
+            # Leave the caller's file open
+            f.detach()
+
+
+def parse_profile(record: Dict, kind: str) -> Dict:
+    """Profile dict from a raw row, or None if it lacks a name or text."""
+    text_field, skills_field, _ = PROFILE_FIELDS[kind]
+    name = str(record.get('name') or '').strip()
+    text = str(record.get(text_field) or '').strip()
+    if not name or not text:
+        return None
+    skills = record.get(skills_field) or []
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    return {'name': name, text_field: text,
+            skills_field: [skill.strip() for skill in skills if skill.strip()]}
+
+
+def merge_skills(listed: List[str], extracted: Dict[str, List[str]],
+                 categories: Tuple[str, ...]) -> List[str]:
+    """Listed skills followed by the extracted ones not already listed, without duplicates."""
+    merged = {}
+    for skill in listed + [skill for category in categories for skill in extracted[category]]:
+        merged.setdefault(normalize_skill(skill), skill.strip())
+    merged.pop('', None)
+    return list(merged.values())
+
+
+# Worker-side extractor, created once per process
+_extractor = None
+
+
+def _init_worker():
+    global _extractor
+    _extractor = SkillExtractor()
+
+
+def _extract_chunk(task: Tuple[str, List[str]]) -> List[Dict[str, List[str]]]:
+    kind, texts = task
+    extract = _extractor.extract_skills if kind == 'human' else _extractor.extract_ai_capabilities
+    return [extract(text) for text in texts]
+
+
+class ImportStats:
+    """Progress of an import: profiles imported and skipped so far, and the time taken."""
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Profiles imported per second."""
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+def import_profiles(records: Iterable[Dict], kind: str = 'human', workers: int = None,
+                    chunk_size: int = 256, stats: ImportStats = None,
+                    progress: Callable[[ImportStats], None] = None) -> Iterator[Dict]:
+    """
+    Yield profiles with extracted skills merged in, in input order.
+
+    Rows without a name or text are skipped and counted in stats.skipped.
+    SkillExtractor instances are created inside the workers, so nothing
+    unpicklable crosses the process boundary. Inputs that fit in the first
+    round of tasks are extracted in this process, since starting the pool
+    would cost more than it saves.
+
+    Args:
+        records: Raw rows, e.g. from iter_records
+        kind: 'human' or 'ai'
+        workers: Extraction processes (default one per CPU); 1 extracts in this process
+        chunk_size: Rows per task
+        stats: Counters to update (default a new ImportStats)
+        progress: Called with stats after every chunk
+    """
+    if kind not in PROFILE_FIELDS:
+        raise ValueError(f"Unknown profile kind: {kind}")
+    text_field, skills_field, categories = PROFILE_FIELDS[kind]
+    stats = stats if stats is not None else ImportStats()
+    workers = workers or os.cpu_count()
+
+    def chunks() -> Iterator[List[Dict]]:
+        rows = iter(records)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            profiles = [parse_profile(record, kind) for record in chunk]
+            stats.skipped += sum(profile is None for profile in profiles)
+            profiles = [profile for profile in profiles if profile is not None]
+            if profiles:
+                yield profiles
+
+    def merged(profiles: List[Dict], extracted: List[Dict]) -> List[Dict]:
+        for profile, skills in zip(profiles, extracted):
+            profile[skills_field] = merge_skills(profile[skills_field], skills, categories)
+        stats.imported += len(profiles)
+        stats.seconds = time.perf_counter() - stats.start
+        if progress is not None:
+            progress(stats)
+        return profiles
+
+    # A few chunks per worker in flight keeps the pool busy without reading far ahead
+    in_flight = 2 * workers
+    stream = chunks()
+    head = list(islice(stream, in_flight)) if workers > 1 else []
+    if len(head) < in_flight:
+        if _extractor is None:
+            _init_worker()
+        for profiles in chain(head, stream):
+            yield from merged(profiles, _extract_chunk(
+                (kind, [profile[text_field] for profile in profiles])))
+        return
+
+    with get_context('spawn').Pool(workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for profiles in chain(head, stream):
+            pending.append((profiles, pool.apply_async(
+                _extract_chunk, ((kind, [profile[text_field] for profile in profiles]),))))
+            if len(pending) >= in_flight:
+                profiles, result = pending.popleft()
+                yield from merged(profiles, result.get())
+        while pending:
+            profiles, result = pending.popleft()
+            yield from merged(profiles, result.get())
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Import profiles from CSV/JSONL with extracted skills merged in.')
+    parser.add_argument('--input', required=True, help='Profiles (.csv or .jsonl)')
+    parser.add_argument('--kind', choices=list(PROFILE_FIELDS), default='human')
+    parser.add_argument('--output', default='-', help="JSONL output path, '-' for stdout")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Extraction processes; 1 extracts in the main process')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Rows per extraction task')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    stats = ImportStats()
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for profile in import_profiles(iter_records(args.input), args.kind, args.workers,
+                                       args.chunk_size, stats):
+            output.write(json.dumps(profile) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Imported {stats.imported} profiles in {stats.seconds:.1f} s "
+          f"({stats.rate:.0f}/s), skipped {stats.skipped}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from feedback import FeedbackAdjustment, FeedbackIndex
+from profile_store import ProfileStore
+
+CONTENT_COMPONENTS = ['skill_similarity', 'complementarity', 'domain_alignment', 'skill_overlap']
+
+
+class ComponentCache:
+    """In-memory cache of the score component matrices of the last human x AI grid.
+
+    Rows and columns are keyed by profile content hashes (ProfileStore.keys). When the grid is
+    requested again, cells whose human and AI are both unchanged are copied
+    from the cached matrices, and only the rows of new or edited humans and
+    the columns of new or edited AI agents are computed. A weight change
+    therefore reuses every cell, unless it asks for a component skipped so
+    far (skill_overlap at weight 0), which is then filled in. The feedback
+    adjustment also depends on the feedback aggregates, so it is rebuilt
+    whenever they change.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Drop every cached matrix and reset the statistics."""
+        self.human_keys: List[str] = []
+        self.ai_keys: List[str] = []
+        self.matrices: Dict[str, np.ndarray] = {}
+        self._feedback = None
+        self._feedback_revision = None
+        self._feedback_adjustment = None
+        self.cells_reused = 0
+        self.cells_computed = 0
+
+    def components(self, human_profiles: ProfileStore, ai_profiles: ProfileStore,
+                   compute: Callable[[ProfileStore, ProfileStore, List[str]],
+                                     Dict[str, np.ndarray]],
+                   feedback: FeedbackIndex,
+                   compute_feedback: Callable[[ProfileStore, ProfileStore],
+                                              FeedbackAdjustment] = None,
+                   names: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Return every component matrix for the grid, computing only what is not cached.
+
+        Args:
+            human_profiles: Human expert profiles (rows)
+            ai_profiles: AI agent profiles (columns)
+            compute: Callback returning the named content component matrices
+                for a store of humans and a store of AI agents
+            feedback: Current feedback aggregates
+            compute_feedback: Callback returning the FeedbackAdjustment of the
+                grid (default feedback.adjustment_matrix)
+            names: Content components to return (default CONTENT_COMPONENTS);
+                one that was not requested last time is computed for the
+                whole grid, the others only for new rows and columns
+
+        Returns:
+            Dictionary of H x M matrices keyed by component name, plus the
+            grid's FeedbackAdjustment under 'feedback_adjustment'
+        """
+        names = list(names or CONTENT_COMPONENTS)
+        missing = [name for name in names if name not in self.matrices]
+        human_keys = human_profiles.keys
+        ai_keys = ai_profiles.keys
+        old_rows = {key: i for i, key in enumerate(self.human_keys)}
+        old_cols = {key: j for j, key in enumerate(self.ai_keys)}
+        row_source = np.array([old_rows.get(key, -1) for key in human_keys], dtype=np.int64)
+        col_source = np.array([old_cols.get(key, -1) for key in ai_keys], dtype=np.int64)
+        kept_rows = np.flatnonzero(row_source >= 0)
+        kept_cols = np.flatnonzero(col_source >= 0)
+        new_rows = np.flatnonzero(row_source < 0)
+        new_cols = np.flatnonzero(col_source < 0)
+
+        shape = (len(human_profiles), len(ai_profiles))
+        matrices = {name: np.empty(shape, dtype=np.float64) for name in names}
+        if len(kept_rows) and len(kept_cols):
+            source = np.ix_(row_source[kept_rows], col_source[kept_cols])
+            for name in names:
+                if name not in missing:
+                    matrices[name][np.ix_(kept_rows, kept_cols)] = self.matrices[name][source]
+            if missing:
+                computed = compute(human_profiles.take(kept_rows),
+                                   ai_profiles.take(kept_cols), missing)
+                for name in missing:
+                    matrices[name][np.ix_(kept_rows, kept_cols)] = computed[name]
+        # New rows against every column, then new columns against the kept rows
+        if len(new_rows) and shape[1]:
+            computed = compute(human_profiles.take(new_rows), ai_profiles, names)
+            for name in names:
+                matrices[name][new_rows] = computed[name]
+        if len(kept_rows) and len(new_cols):
+            computed = compute(human_profiles.take(kept_rows), ai_profiles.take(new_cols), names)
+            for name in names:
+                matrices[name][np.ix_(kept_rows, new_cols)] = computed[name]
+
+        reused = len(kept_rows) * len(kept_cols) if not missing else 0
+        self.cells_reused += reused
+        self.cells_computed += shape[0] * shape[1] - reused
+
+        feedback_stale = (
+            self._feedback is not feedback or self._feedback_revision != feedback.revision
+            or human_keys != self.human_keys or ai_keys != self.ai_keys)
+        if feedback_stale:
+            compute_feedback = compute_feedback or feedback.adjustment_matrix
+            self._feedback_adjustment = compute_feedback(human_profiles, ai_profiles)
+            self._feedback = feedback
+            self._feedback_revision = feedback.revision
+
+        self.human_keys = human_keys
+        self.ai_keys = ai_keys
+        self.matrices = matrices
+        return {**matrices, 'feedback_adjustment': self._feedback_adjustment}
+
+    def stats(self) -> Dict[str, float]:
+        total = self.cells_reused + self.cells_computed
+        return {
+            'cells_reused': self.cells_reused,
+            'cells_computed': self.cells_computed,
+            'reuse_rate': self.cells_reused / total if total else 0.0,
+            'rows': len(self.human_keys),
+            'columns': len(self.ai_keys)
+        }
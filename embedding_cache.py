@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is unavailable
+    fcntl = None
+
+
+class EmbeddingCache:
+    """Persistent, size-bounded LRU cache of text embeddings.
+
+    Vectors live in a memory-mapped ``vectors.npy`` file with one row per slot.
+    It starts with INITIAL_SLOTS rows and doubles, up to max_entries, when
+    every slot is taken. Keys are the SHA-256 of the model name and the exact text that was
+    embedded, so a profile only reaches the model again when its text (or the
+    model) changes. ``index.json`` maps each key to its slot in least- to
+    most-recently-used order as of the last compaction, and ``index.log``
+    records every slot assigned since, one short line per entry, so a put
+    costs an append instead of rewriting the index. Every compact_every log
+    lines (and on flush) the log is folded into ``index.json`` and the vectors
+    are flushed to disk.
+
+    Several processes can share one directory: writes hold an flock on a
+    sidecar lock file and first replay log lines written by other processes,
+    so a slot is never handed out twice, and reads hold a shared flock while
+    they catch up and copy vectors. A thread lock does the same within the
+    process. Recency from hits is kept in memory and saved at compaction.
+    A directory holding another model's or dimension's embeddings raises
+    ValueError instead of being overwritten.
+    """
+    INITIAL_SLOTS = 1024
+
+    def __init__(self, model_name: str, cache_dir: str = '.embedding_cache',
+                 max_entries: int = 50000, compact_every: int = 10000):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+        model_slug = hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:12]
+        self.directory = os.path.join(cache_dir, model_slug)
+        self.vectors_file = os.path.join(self.directory, 'vectors.npy')
+        self.index_file = os.path.join(self.directory, 'index.json')
+        self.log_file = os.path.join(self.directory, 'index.log')
+        self.lock_path = os.path.join(self.directory, 'lock')
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None
+        self._vectors_inode = None
+        self._dim = None
+        self._index = OrderedDict()
+        self._slot_keys = {}
+        self._free_slots = set()
+        # Token shared by index.json and the header of the log that extends it
+        self._generation = None
+        self._log_generation = ''
+        self._log_offset = 0
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = open(self.lock_path, 'a')
+        with self._locked(exclusive=False):
+            self._refresh()
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _reset(self):
+        self._vectors = None
+        self._vectors_inode = None
+        self._dim = None
+        self._index = OrderedDict()
+        self._slot_keys = {}
+        self._free_slots = set()
+
+    def _map(self):
+        """Map vectors.npy, whose rows past the previous mapping are free slots."""
+        mapped = 0 if self._vectors is None else len(self._vectors)
+        self._vectors = np.load(self.vectors_file, mmap_mode='r+')
+        self._vectors_inode = os.stat(self.vectors_file).st_ino
+        self._free_slots.update(
+            slot for slot in range(mapped, len(self._vectors)) if slot not in self._slot_keys)
+
+    def _load(self):
+        """Read index.json and map the vectors, starting empty if there are none yet."""
+        self._reset()
+        self._generation = None
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            self._map()
+        except (OSError, ValueError):
+            self._reset()
+            return
+        self._generation = index.get('generation')
+        # Never start over on top of entries another writer may still be using
+        if index.get('model_name') != self.model_name:
+            raise ValueError(f"Embedding cache {self.directory} holds {index.get('model_name')} "
+                             f"embeddings, not {self.model_name}")
+        if self._vectors.ndim != 2 or self._vectors.shape[1] != index.get('dim'):
+            raise ValueError(f"Embedding cache {self.directory} has {self._vectors.shape} vectors "
+                             f"for {index.get('dim')}-d entries; clear or remove it")
+        self._dim = index['dim']
+        for key, slot in index['entries']:
+            self._assign(key, slot)
+
+    def _assign(self, key: str, slot: int):
+        """Record that slot now holds key, dropping whatever it held before."""
+        previous = self._slot_keys.get(slot)
+        if previous is not None and previous != key:
+            del self._index[previous]
+        self._index[key] = slot
+        self._index.move_to_end(key)
+        self._slot_keys[slot] = key
+        self._free_slots.discard(slot)
+
+    def _refresh(self):
+        """Catch up with entries other processes added since this instance last looked."""
+        if self._vectors is not None:
+            try:
+                if os.stat(self.vectors_file).st_ino != self._vectors_inode:
+                    # Grown by another process; rows already mapped were copied over
+                    self._map()
+            except FileNotFoundError:
+                pass
+        try:
+            with open(self.log_file, 'rb') as f:
+                header = f.readline()
+                generation = header[len(b'generation '):].strip().decode('ascii')
+                if generation != self._log_generation:
+                    # Compacted (or cleared) since we last looked: start from the new index
+                    self._load()
+                    self._log_generation = generation
+                    self._log_offset, self._log_lines = len(header), 0
+                if generation != self._generation:
+                    # Left over from an interrupted compaction; its entries are in index.json
+                    return
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            if self._log_generation is not None:
+                self._load()
+                self._log_generation = None
+            return
+        # Only whole lines count; a line is appended after its vector is written
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            key, slot = line.split()
+            self._assign(key.decode('ascii'), int(slot))
+            self._log_lines += 1
+        self._log_offset += end
+
+    def _allocate(self, dim: int):
+        """Create the vector file once the embedding dimension is known (no usable one exists)."""
+        self._reset()
+        self._dim = dim
+        tmp_file = f"{self.vectors_file}.tmp.npy"
+        np.lib.format.open_memmap(
+            tmp_file, mode='w+', dtype=np.float32,
+            shape=(min(self.INITIAL_SLOTS, self.max_entries), dim)).flush()
+        # Drop a stale index first so a crash here cannot pair it with zeroed rows
+        for path in (self.log_file, self.index_file):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        os.replace(tmp_file, self.vectors_file)
+        self._map()
+        self._compact()
+
+    def _grow(self):
+        """Double the vector file, up to max_entries rows, copying every slot across."""
+        tmp_file = f"{self.vectors_file}.tmp.npy"
+        grown = np.lib.format.open_memmap(
+            tmp_file, mode='w+', dtype=np.float32,
+            shape=(min(2 * len(self._vectors), self.max_entries), self._dim))
+        grown[:len(self._vectors)] = self._vectors
+        grown.flush()
+        del grown
+        # Replace rather than resize, so other processes' mappings stay valid until they remap
+        os.replace(tmp_file, self.vectors_file)
+        self._map()
+
+    def _compact(self):
+        """Flush the vectors and fold the log into a new index.json."""
+        if self._vectors is not None:
+            self._vectors.flush()
+        generation = uuid.uuid4().hex
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'model_name': self.model_name,
+                'dim': self._dim,
+                'generation': generation,
+                'entries': list(self._index.items())
+            }, f)
+        os.replace(tmp_file, self.index_file)
+        header = f"generation {generation}\n".encode('ascii')
+        tmp_file = f"{self.log_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(header)
+        os.replace(tmp_file, self.log_file)
+        self._generation = self._log_generation = generation
+        self._log_offset, self._log_lines = len(header), 0
+
+    def key(self, text: str) -> str:
+        """Content-addressed key for a text embedded with this cache's model."""
+        return hashlib.sha256(
+            f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each text, or None where it is missing."""
+        keys = [self.key(text) for text in texts]
+        results = []
+        with self._locked(exclusive=False):
+            self._refresh()
+            for key in keys:
+                slot = self._index.get(key)
+                if slot is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._index.move_to_end(key)
+                    results.append(np.array(self._vectors[slot]))
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """Store vectors for texts, evicting least recently used entries when full."""
+        if len(texts) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = [self.key(text) for text in texts]
+        with self._locked():
+            self._refresh()
+            if self._vectors is None:
+                self._allocate(vectors.shape[1])
+            elif self._dim != vectors.shape[1]:
+                raise ValueError(f"Embedding cache {self.directory} holds {self._dim}-d "
+                                 f"embeddings, not {vectors.shape[1]}-d")
+            elif self._log_generation is None or self._log_generation != self._generation:
+                # No log to extend yet (a cache written before logging existed, or a crash)
+                self._compact()
+            lines = []
+            for key, vector in zip(keys, vectors):
+                if key in self._index:
+                    # Another process (or an earlier text of this batch) stored it already
+                    self._index.move_to_end(key)
+                    continue
+                if not self._free_slots and len(self._vectors) < self.max_entries:
+                    self._grow()
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                else:
+                    slot = next(iter(self._index.values()))
+                self._vectors[slot] = vector
+                self._assign(key, slot)
+                lines.append(f"{key} {slot}\n")
+            if lines:
+                data = ''.join(lines).encode('ascii')
+                with open(self.log_file, 'ab') as f:
+                    f.write(data)
+                self._log_offset += len(data)
+                self._log_lines += len(lines)
+            if self._log_lines >= self.compact_every:
+                self._compact()
+
+    def flush(self):
+        """Write the vectors to disk and fold the log, with recency from hits, into index.json."""
+        with self._locked():
+            self._refresh()
+            if self._vectors is not None:
+                self._compact()
+
+    def clear(self):
+        """Drop every cached vector and reset the counters."""
+        with self._locked():
+            self._refresh()
+            self._index = OrderedDict()
+            self._slot_keys = {}
+            self._free_slots = set(range(0 if self._vectors is None else len(self._vectors)))
+            self.hits = 0
+            self.misses = 0
+            if self._vectors is not None:
+                self._compact()
+
+    def close(self):
+        """Flush and release the lock file."""
+        self.flush()
+        self._lock_file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since this cache was opened."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._index),
+            'max_entries': self.max_entries
+        }
@@ -0,0 +1,144 @@
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+ENCODERS = ('sentence-transformers', 'hashing')
+
+_models = {}
+_models_lock = threading.Lock()
+model_load_seconds: Dict[str, float] = {}
+
+
+def load_model(model_name: str):
+    """
+    Load a Sentence-BERT model once per process and share it between matchers.
+
+    sentence_transformers (and torch) are only imported here, so nothing
+    heavy is loaded until the first text actually needs encoding.
+    """
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            start = time.perf_counter()
+            _models[model_name] = SentenceTransformer(model_name)
+            model_load_seconds[model_name] = time.perf_counter() - start
+        return _models[model_name]
+
+
+class Encoder:
+    """
+    Turns texts into dense float32 vectors for the matcher.
+
+    name identifies the encoder and its settings; the matcher namespaces its
+    embedding cache with it, so vectors of different encoders never mix.
+    """
+
+    name = 'encoder'
+
+    @property
+    def config(self) -> Dict:
+        """JSON-serialisable settings that change the vectors, e.g. stored with a snapshot."""
+        return {}
+
+    @property
+    def loaded(self) -> bool:
+        """Whether encoding can start without loading anything first."""
+        return True
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SentenceTransformerEncoder(Encoder):
+    """Sentence-BERT embeddings; the model is loaded on the first encode and shared per process."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        self.name = model_name
+
+    @property
+    def config(self) -> Dict:
+        return {'model_name': self.name}
+
+    @property
+    def loaded(self) -> bool:
+        return self.name in _models
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        return np.asarray(load_model(self.name).encode(texts, **kwargs), dtype=np.float32)
+
+
+class HashingEncoder(Encoder):
+    """
+    Offline lexical encoder based on feature hashing.
+
+    Texts are lower-cased and split into words, English stop words are
+    dropped, and every word unigram and bigram is hashed (CRC-32) to one of
+    dim signed dimensions with sublinear (1 + log tf) weights. There is no
+    vocabulary to fit and no model to load, so it starts instantly, encodes
+    tens of thousands of texts per second, and gives the same vector for a
+    text in every process. Similarity is lexical: texts score high when they
+    share words, not when they are merely related in meaning.
+    """
+
+    TOKEN = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?")
+    STOP_WORDS = frozenset(
+        'a an and are as at be by for from has have in is it its of on or that the their '
+        'this to was were will with who which i we you our your he she they my me us'.split())
+
+    def __init__(self, dim: int = 1024, ngram_range: Tuple[int, int] = (1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-v1-{dim}-{ngram_range[0]}{ngram_range[1]}"
+
+    @property
+    def config(self) -> Dict:
+        return {'dim': self.dim, 'ngram_range': list(self.ngram_range)}
+
+    def _features(self, text: str) -> Counter:
+        words = [w for w in self.TOKEN.findall(text.lower()) if w not in self.STOP_WORDS]
+        low, high = self.ngram_range
+        features = Counter()
+        for n in range(low, high + 1):
+            features.update(' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+        return features
+
+    def encode_sparse(self, texts: List[str]) -> sparse.csr_matrix:
+        """Hashed feature vectors as a texts x dim CSR matrix (rows are not normalised)."""
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            columns = {}
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode('utf-8'))
+                # Low bits pick the dimension, the top bit the sign
+                column = digest % self.dim
+                weight = 1.0 + math.log(count)
+                columns[column] = columns.get(column, 0.0) + (weight if digest >> 31 else -weight)
+            indices.extend(columns)
+            data.extend(columns.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(texts), self.dim))
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode_sparse([texts]).toarray()[0]
+        return self.encode_sparse(list(texts)).toarray()
+
+
+def create_encoder(backend: str = 'sentence-transformers',
+                   model_name: str = DEFAULT_MODEL) -> Encoder:
+    """Create an encoder by backend name ('sentence-transformers' or 'hashing')."""
+    if backend == 'sentence-transformers':
+        return SentenceTransformerEncoder(model_name)
+    if backend == 'hashing':
+        return HashingEncoder()
+    raise ValueError(f"Unknown encoder backend: {backend}")
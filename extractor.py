@@ -1,8 +1,50 @@
 import re
 from typing import List, Dict
 
+from instrumentation import Instrumentation
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex alternation for words, factored by shared prefixes so matching branches less."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional suffix: the longest keyword is tried first
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
 class SkillExtractor:
-    def __init__(self):
+    SOFT_SKILLS = ['leadership', 'communication', 'teamwork', 'problem-solving', 'creativity',
+                   'adaptability', 'time management', 'collaboration']
+    DOMAIN_KEYWORDS = ['healthcare', 'finance', 'education', 'retail', 'manufacturing', 'cloud', 'web', 'ai', 'ml']
+    TOOL_KEYWORDS = ['tensorflow', 'pytorch', 'docker', 'kubernetes', 'figma', 'adobe xd']
+    TECHNIQUE_KEYWORDS = ['regression', 'classification', 'clustering', 'simulation', 'optimization']
+    # What may follow a keyword: an optional plural 's' and version number, then a word end
+    KEYWORD_END = r'(?:s)?(?:\d+(?:\.\d+)*)?(?![a-z0-9])'
+    TASK_PATTERNS = [
+        re.compile(r'can ([a-z ]+)'),
+        re.compile(r'able to ([a-z ]+)'),
+        re.compile(r'capable of ([a-z ]+)')
+    ]
+    LIMITATION_PATTERNS = [
+        re.compile(r'cannot ([a-z ]+)'),
+        re.compile(r'unable to ([a-z ]+)'),
+        re.compile(r'limited in ([a-z ]+)')
+    ]
+
+    def __init__(self, instrumentation: Instrumentation = None):
+        self.instrumentation = instrumentation or Instrumentation()
         # Common technical skills and domains
         self.technical_skills = {
             'programming': ['python', 'java', 'javascript', 'c++', 'ruby', 'go', 'rust'],
@@ -11,68 +53,90 @@ class SkillExtractor:
             'cloud': ['aws', 'azure', 'gcp', 'cloud computing', 'devops'],
             'web': ['web development', 'frontend', 'backend', 'full stack'],
         }
+        self._compile_keywords()
+
+    def _compile_keywords(self):
+        """Compile every keyword table into one word-bounded regex and lookup tables."""
+        tables = {
+            'technical': [skill for skills in self.technical_skills.values() for skill in skills],
+            'soft_skills': self.SOFT_SKILLS,
+            'domains': self.DOMAIN_KEYWORDS,
+            'tools': self.TOOL_KEYWORDS,
+            'techniques': self.TECHNIQUE_KEYWORDS
+        }
+        # keyword -> [(category, position in that category's table)]
+        self._keyword_categories = {}
+        for category, keywords in tables.items():
+            for position, keyword in enumerate(keywords):
+                self._keyword_categories.setdefault(keyword, []).append((category, position))
+        self._categories = list(tables)
+
+        keywords = sorted(self._keyword_categories, key=len, reverse=True)
+        # Keywords that start another keyword at a word boundary ('cloud' in
+        # 'cloud computing'); the regex only reports the longest one per position
+        self._keyword_prefixes = {
+            keyword: [other for other in keywords
+                      if other != keyword and re.match(
+                          rf'{re.escape(other)}{self.KEYWORD_END}', keyword)]
+            for keyword in keywords
+        }
+        # A zero-width lookahead lets overlapping keywords match. The leading
+        # boundary stops 'go', 'ai' and 'ml' from matching inside other words;
+        # the trailing one still accepts plurals and versions ('python3')
+        self._keyword_pattern = re.compile(
+            rf'(?<![a-z0-9])(?=({_trie_pattern(keywords)}){self.KEYWORD_END})')
+
+    def _scan_keywords(self, text_lower: str) -> Dict[str, List[str]]:
+        """
+        Find the keywords of every category in a single pass over the text.
+
+        Soft skills are reported once per occurrence in text order; every other
+        category lists each keyword once, in the order of its keyword table.
+        """
+        self.instrumentation.count('texts_extracted')
+        self.instrumentation.count('characters_extracted', len(text_lower))
+        with self.instrumentation.stage('keyword_scan'):
+            found = {category: [] for category in self._categories}
+            seen = set()
+            for match in self._keyword_pattern.finditer(text_lower):
+                keyword = match.group(1)
+                for hit in [keyword] + self._keyword_prefixes[keyword]:
+                    for category, position in self._keyword_categories[hit]:
+                        if category == 'soft_skills':
+                            found[category].append(hit)
+                        elif (category, hit) not in seen:
+                            seen.add((category, hit))
+                            found[category].append((position, hit))
+            for category, hits in found.items():
+                if category != 'soft_skills':
+                    found[category] = [hit for _, hit in sorted(hits)]
+            return found
 
     def extract_skills(self, text: str) -> Dict[str, List[str]]:
         text_lower = text.lower()
+        keywords = self._scan_keywords(text_lower)
         extracted_skills = {
-            'technical': [],
-            'soft_skills': [],
-            'domains': [],
-            'tools': []
+            'technical': keywords['technical'],
+            'soft_skills': keywords['soft_skills'],
+            'domains': keywords['domains'],
+            'tools': keywords['tools']
         }
-        # Extract technical skills
-        for category, skills in self.technical_skills.items():
-            for skill in skills:
-                if skill in text_lower:
-                    extracted_skills['technical'].append(skill)
-        # Extract soft skills using common patterns
-        soft_skills_pattern = r'leadership|communication|teamwork|problem-solving|creativity|adaptability|time management|collaboration'
-        soft_skills = re.findall(soft_skills_pattern, text_lower)
-        extracted_skills['soft_skills'].extend(soft_skills)
-        # Simple domain/tool extraction (look for keywords)
-        domain_keywords = ['healthcare', 'finance', 'education', 'retail', 'manufacturing', 'cloud', 'web', 'ai', 'ml']
-        for word in domain_keywords:
-            if word in text_lower:
-                extracted_skills['domains'].append(word)
-        tool_keywords = ['tensorflow', 'pytorch', 'docker', 'kubernetes', 'figma', 'adobe xd']
-        for word in tool_keywords:
-            if word in text_lower:
-                extracted_skills['tools'].append(word)
         return extracted_skills
 
     def extract_ai_capabilities(self, text: str) -> Dict[str, List[str]]:
         text_lower = text.lower()
+        keywords = self._scan_keywords(text_lower)
         capabilities = {
             'tasks': [],
-            'domains': [],
-            'techniques': [],
+            'domains': keywords['domains'],
+            'techniques': keywords['techniques'],
             'limitations': []
         }
-        # Extract task capabilities
-        task_patterns = [
-            r'can ([a-z ]+)',
-            r'able to ([a-z ]+)',
-            r'capable of ([a-z ]+)'
-        ]
-        for pattern in task_patterns:
-            matches = re.findall(pattern, text_lower)
-            capabilities['tasks'].extend(matches)
-        # Simple domain/technique extraction
-        domain_keywords = ['healthcare', 'finance', 'education', 'retail', 'manufacturing', 'cloud', 'web', 'ai', 'ml']
-        for word in domain_keywords:
-            if word in text_lower:
-                capabilities['domains'].append(word)
-        technique_keywords = ['regression', 'classification', 'clustering', 'simulation', 'optimization']
-        for word in technique_keywords:
-            if word in text_lower:
-                capabilities['techniques'].append(word)
-        # Extract limitations
-        limitation_patterns = [
-            r'cannot ([a-z ]+)',
-            r'unable to ([a-z ]+)',
-            r'limited in ([a-z ]+)'
-        ]
-        for pattern in limitation_patterns:
-            matches = re.findall(pattern, text_lower)
-            capabilities['limitations'].extend(matches)
-        return capabilities 
\ No newline at end of file
+        with self.instrumentation.stage('capability_patterns'):
+            # Extract task capabilities
+            for pattern in self.TASK_PATTERNS:
+                capabilities['tasks'].extend(pattern.findall(text_lower))
+            # Extract limitations
+            for pattern in self.LIMITATION_PATTERNS:
+                capabilities['limitations'].extend(pattern.findall(text_lower))
+        return capabilities
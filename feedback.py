@@ -0,0 +1,292 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from profile_store import ProfileStore, normalize_skill
+
+Profiles = Union[ProfileStore, Iterable[Dict]]
+
+HALF_LIFE_DAYS = 90.0
+
+
+def record_time(record: Dict) -> float:
+    """Unix time of a feedback record from its ISO 'timestamp', or now if it has none."""
+    timestamp = record.get('timestamp')
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return time.time()
+
+
+def decay_weight(t: float, epoch: float, half_life_days: Optional[float]) -> float:
+    """Stored weight of a record made at Unix time t, relative to epoch (1.0 without decay)."""
+    if not half_life_days:
+        return 1.0
+    return 2.0 ** ((t - epoch) / (half_life_days * 86400.0))
+
+
+class FeedbackIndex:
+    """
+    Time-decayed aggregates over match feedback, updated incrementally.
+
+    pair_counts holds the net (positive - negative) feedback per human/AI
+    pair, indexed by human name, and skill_counts holds how often each
+    normalised skill appeared on the human side of a positive match. Each
+    record counts 2 ** (-age / half-life), so it loses half its influence
+    every half_life_days.
+
+    Weights are stored relative to epoch (a record made at time t adds
+    2 ** ((t - epoch) / half-life)), so adding a record still touches only
+    its own entries. The common decay factor is applied when adjustments are
+    read, and skill shares need none since it cancels out. compact() moves
+    the epoch to the present and drops entries that have decayed below
+    PRUNE_BELOW, so memory follows recent activity rather than all history.
+    With half_life_days=None nothing decays.
+
+    Updates replace a human's pair dict and the skill_counts dict instead of
+    changing them in place, so readers on other threads never iterate a dict
+    that is being modified. Writers must still be serialised by the caller.
+    """
+
+    PAIR_ADJUSTMENT = 0.1
+    SKILL_ADJUSTMENT = 0.05
+    RECENT_LIMIT = 50
+    PRUNE_BELOW = 0.01
+    # revision changes at least this often (in seconds), so cached adjustments pick up decay
+    DECAY_REFRESH = 3600
+
+    def __init__(self, half_life_days: Optional[float] = HALF_LIFE_DAYS, epoch: float = None):
+        self.half_life_days = half_life_days
+        self.epoch = time.time() if epoch is None else epoch
+        self.pair_counts: Dict[str, Dict[str, float]] = {}
+        self.skill_counts: Dict[str, float] = {}
+        self.skill_total = 0.0
+        # Weight of positive records stored without the human's skills, by human name
+        self.pending_positive: Dict[str, float] = {}
+        self.positive_count = 0
+        self.negative_count = 0
+        self.recent = deque(maxlen=self.RECENT_LIMIT)
+        # Bumped on every change, so cached adjustments can tell they are stale
+        self.version = 0
+
+    def weight(self, t: float) -> float:
+        """Stored weight of a record made at Unix time t."""
+        return decay_weight(t, self.epoch, self.half_life_days)
+
+    def decay(self, now: float = None) -> float:
+        """Factor turning stored weights into weights as of now (default the current time)."""
+        return 1.0 / self.weight(time.time() if now is None else now)
+
+    @property
+    def revision(self) -> Tuple[int, int]:
+        """Changes with every update, and every DECAY_REFRESH seconds while weights decay."""
+        period = int(time.time() // self.DECAY_REFRESH) if self.half_life_days else 0
+        return self.version, period
+
+    def add(self, record: Dict):
+        """
+        Fold one feedback record into the aggregates.
+
+        A record has 'human', 'ai' and 'positive' keys, and positive records
+        carry the human's 'skills'. Its 'timestamp' sets its weight. Positive
+        feedback without skills is kept pending until resolve_humans sees a
+        profile with that name.
+        """
+        human, ai, is_positive = record['human'], record['ai'], record['positive']
+        weight = self.weight(record_time(record))
+        pairs = dict(self.pair_counts.get(human, {}))
+        pairs[ai] = pairs.get(ai, 0.0) + (weight if is_positive else -weight)
+        self.pair_counts[human] = pairs
+        self.recent.append(record)
+        self.version += 1
+        if not is_positive:
+            self.negative_count += 1
+            return
+        self.positive_count += 1
+        if record.get('skills') is None:
+            self.pending_positive[human] = self.pending_positive.get(human, 0.0) + weight
+        else:
+            self._count_skills(record['skills'], weight)
+
+    def _count_skills(self, skills: List[str], weight: float):
+        counts = dict(self.skill_counts)
+        for skill in skills:
+            skill = normalize_skill(skill)
+            counts[skill] = counts.get(skill, 0.0) + weight
+        self.skill_counts = counts
+        self.skill_total += weight * len(skills)
+
+    def resolve_humans(self, human_profiles: Profiles):
+        """Count skills for pending positive feedback on any of these humans."""
+        if not self.pending_positive:
+            return
+        humans = ProfileStore.coerce(human_profiles, 'human')
+        for name in list(self.pending_positive):
+            row = humans.index_of(name)
+            if row is not None:
+                self._count_skills(humans.skills_of(row), self.pending_positive.pop(name))
+                self.version += 1
+
+    def compact(self, now: float = None):
+        """Rebase the stored weights on now and drop entries that have decayed below PRUNE_BELOW."""
+        now = time.time() if now is None else now
+        factor = self.decay(now)
+        self.epoch = now
+
+        def rescale(counts: Dict[str, float]) -> Dict[str, float]:
+            return {key: value * factor for key, value in counts.items()
+                    if abs(value * factor) >= self.PRUNE_BELOW}
+
+        self.pair_counts = {human: pairs for human, pairs in
+                            ((human, rescale(pairs)) for human, pairs in self.pair_counts.items())
+                            if pairs}
+        self.skill_counts = rescale(self.skill_counts)
+        self.skill_total = float(sum(self.skill_counts.values()))
+        self.pending_positive = rescale(self.pending_positive)
+        self.version += 1
+
+    @property
+    def total_count(self) -> int:
+        return self.positive_count + self.negative_count
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable snapshot of the aggregates."""
+        return {
+            'epoch': self.epoch,
+            'half_life_days': self.half_life_days,
+            'pair_counts': [[human, ai, count]
+                            for human, pairs in self.pair_counts.items()
+                            for ai, count in pairs.items()],
+            'skill_counts': self.skill_counts,
+            'skill_total': self.skill_total,
+            'pending_positive': self.pending_positive,
+            'positive_count': self.positive_count,
+            'negative_count': self.negative_count,
+            'recent': list(self.recent)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict,
+                  half_life_days: Optional[float] = HALF_LIFE_DAYS) -> 'FeedbackIndex':
+        """
+        Restore aggregates saved with to_dict.
+
+        Snapshots written before decay existed have no epoch; their counts
+        are taken as current and start decaying from now. A changed
+        half_life_days only affects how fast the stored weights decay from here on.
+        """
+        index = cls(half_life_days, data.get('epoch'))
+        for human, ai, count in data['pair_counts']:
+            index.pair_counts.setdefault(human, {})[ai] = count
+        for skill, count in data['skill_counts'].items():
+            skill = normalize_skill(skill)
+            index.skill_counts[skill] = index.skill_counts.get(skill, 0.0) + count
+        index.skill_total = data['skill_total']
+        index.pending_positive = dict(data['pending_positive'])
+        index.positive_count = data['positive_count']
+        index.negative_count = data['negative_count']
+        index.recent.extend(data['recent'])
+        return index
+
+    @property
+    def skill_weights(self) -> Dict[str, float]:
+        """Share of the decayed positive-match skill occurrences held by each skill."""
+        if self.skill_total <= 0:
+            return {}
+        return {skill: count / self.skill_total for skill, count in self.skill_counts.items()}
+
+    def skill_adjustment(self, skills) -> float:
+        """Score adjustment earned by a human's skills."""
+        if self.skill_total <= 0:
+            return 0.0
+        return sum(self.skill_counts.get(normalize_skill(skill), 0) for skill in skills) / \
+            self.skill_total * self.SKILL_ADJUSTMENT
+
+    def pair_adjustment(self, human: str, ai: str) -> float:
+        """Score adjustment from direct, decayed feedback on one pair."""
+        return self.pair_counts.get(human, {}).get(ai, 0.0) * self.decay() * self.PAIR_ADJUSTMENT
+
+    def pair_matrix(self, human_profiles: Profiles, ai_profiles: Profiles) -> sparse.csr_matrix:
+        """Direct pair feedback as a sparse H x M matrix with entries only for pairs with feedback."""
+        humans = ProfileStore.coerce(human_profiles, 'human')
+        ais = ProfileStore.coerce(ai_profiles, 'ai')
+        scale = self.decay() * self.PAIR_ADJUSTMENT
+        rows, cols, data = [], [], []
+        for i, name in enumerate(humans.names):
+            for ai_name, count in self.pair_counts.get(name, {}).items():
+                for j in ais.rows_named(ai_name):
+                    rows.append(i)
+                    cols.append(j)
+                    data.append(count * scale)
+        return sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(humans), len(ais)), dtype=np.float64)
+
+    def skill_adjustments(self, human_profiles: Profiles) -> np.ndarray:
+        """Skill-based adjustment for each human."""
+        humans = ProfileStore.coerce(human_profiles, 'human')
+        if self.skill_total <= 0:
+            return np.zeros(len(humans), dtype=np.float64)
+        # Look every distinct skill up once, then sum per human
+        used, inverse = np.unique(humans.skill_ids, return_inverse=True)
+        counts = np.array([self.skill_counts.get(humans.vocabulary.skills[skill_id], 0)
+                           for skill_id in used.tolist()], dtype=np.float64)
+        return np.bincount(humans.skill_rows, weights=counts[inverse], minlength=len(humans)) / \
+            self.skill_total * self.SKILL_ADJUSTMENT
+
+    def adjustment_matrix(self, human_profiles: Profiles,
+                          ai_profiles: Profiles) -> 'FeedbackAdjustment':
+        """Feedback adjustment for every human/AI pair, without densifying the pair term."""
+        humans = ProfileStore.coerce(human_profiles, 'human')
+        return FeedbackAdjustment(self.pair_matrix(humans, ai_profiles),
+                                  self.skill_adjustments(humans))
+
+
+class FeedbackAdjustment:
+    """
+    Feedback adjustment of an H x M grid: pairs[i, j] + skills[i].
+
+    Only pairs with direct feedback have a pair entry, so the adjustment is
+    kept as the sparse pair matrix and the per-human skill vector; apply
+    scales a dense score matrix by it without building an H x M matrix.
+    """
+
+    def __init__(self, pairs: sparse.csr_matrix, skills: np.ndarray):
+        self.pairs = pairs
+        self.skills = skills
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.pairs.shape
+
+    def apply(self, scores: np.ndarray) -> np.ndarray:
+        """Multiply scores by (1 + adjustment) in place and return them."""
+        pairs = self.pairs.tocoo()
+        pairs.sum_duplicates()
+        # The pair term scales the unadjusted score, so read it before the skill term
+        pair_terms = scores[pairs.row, pairs.col] * pairs.data
+        scores *= (1 + self.skills)[:, np.newaxis]
+        scores[pairs.row, pairs.col] += pair_terms
+        return scores
+
+    def values(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Adjustment of the (row, column) cells, broadcast like rows and cols."""
+        rows, cols = np.broadcast_arrays(np.asarray(rows), np.asarray(cols))
+        pairs = np.asarray(self.pairs[rows.ravel(), cols.ravel()]).reshape(rows.shape)
+        return self.skills[rows] + pairs
+
+    def toarray(self) -> np.ndarray:
+        """The adjustment as a dense H x M matrix."""
+        return self.pairs.toarray() + self.skills[:, np.newaxis]
+
+
+def legacy_records(feedback_data: Dict) -> List[Dict]:
+    """Records from the match_feedback.json format, tagged with 'positive', oldest first."""
+    records = [dict(record, positive=True) for record in feedback_data['positive_matches']]
+    records += [dict(record, positive=False) for record in feedback_data['negative_matches']]
+    return sorted(records, key=lambda record: record.get('timestamp') or '')
@@ -0,0 +1,410 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from feedback import HALF_LIFE_DAYS, FeedbackIndex, decay_weight, legacy_records, record_time
+from profile_store import normalize_skill
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is unavailable
+    fcntl = None
+
+
+class FeedbackStore:
+    """Interface for feedback storage backends."""
+
+    def append(self, record: Dict) -> bool:
+        """
+        Durably add one feedback record.
+
+        Returns:
+            True if the store compacted its history after this append, so
+            in-memory aggregates should be compacted too
+        """
+        raise NotImplementedError
+
+    def load(self) -> FeedbackIndex:
+        """Load the feedback aggregates."""
+        raise NotImplementedError
+
+    def compact(self):
+        """Fold the raw history into stored aggregates and prune entries that have decayed away."""
+
+    def clear(self):
+        """Delete all feedback."""
+        raise NotImplementedError
+
+    def is_empty(self) -> bool:
+        raise NotImplementedError
+
+
+class JsonlFeedbackStore(FeedbackStore):
+    """
+    Append-only JSON-lines log plus a snapshot of aggregates.
+
+    Each record is a single appended line, so writes cost O(1) regardless of
+    history size. Every compact_every appends the log is folded into the
+    snapshot and truncated, so startup reads the aggregates and a short log
+    tail. The log is also compacted once it holds retention records, counted
+    on disk, so it stays bounded when many short-lived processes each append
+    less than compact_every records, as the SQLite store's raw table is.
+    Compaction also rebases the decayed weights and prunes entries
+    that no longer matter (see FeedbackIndex.compact), so neither file grows
+    with the length of the history. A thread lock and an flock on a sidecar
+    lock file keep appends and compaction consistent across threads and
+    processes.
+    """
+
+    def __init__(self, path: str = 'match_feedback.jsonl', compact_every: int = 1000,
+                 half_life_days: Optional[float] = HALF_LIFE_DAYS,
+                 retention: Optional[int] = 10000):
+        self.path = path
+        self.retention = retention
+        self.half_life_days = half_life_days
+        self.snapshot_path = f"{os.path.splitext(path)[0]}.snapshot.json"
+        self.lock_path = f"{path}.lock"
+        self.compact_every = compact_every
+        self._appends = 0
+        # Records in the log file as of our last look, its size then and the
+        # snapshot it extended (compaction replaces the snapshot)
+        self._log_records = None
+        self._log_size = 0
+        self._snapshot_inode = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _count_log_records(self) -> int:
+        """
+        Records in the log now, counting only what changed since this process last looked.
+
+        Lines other processes appended are counted from the size this
+        process last saw; a log compacted meanwhile (a new snapshot, or a
+        shorter file) is recounted in full.
+        """
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        snapshot_inode = os.stat(self.snapshot_path).st_ino \
+            if os.path.exists(self.snapshot_path) else None
+        if (self._log_records is None or size < self._log_size
+                or snapshot_inode != self._snapshot_inode):
+            self._log_records = sum(1 for _ in self._read_log())
+        elif size > self._log_size:
+            with open(self.path, 'rb') as f:
+                f.seek(self._log_size)
+                self._log_records += sum(1 for line in f if line.strip())
+        self._log_size = size
+        self._snapshot_inode = snapshot_inode
+        return self._log_records
+
+    def append(self, record: Dict) -> bool:
+        line = json.dumps(record) + '\n'
+        with self._locked():
+            records = self._count_log_records() if self.retention is not None else 0
+            with open(self.path, 'a') as f:
+                f.write(line)
+            self._appends += 1
+            self._log_records = records + 1
+            self._log_size += len(line.encode('utf-8'))
+            if self._appends >= self.compact_every or (
+                    self.retention is not None and self._log_records >= self.retention):
+                self._compact()
+                return True
+        return False
+
+    def _read_log(self) -> Iterator[Dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crashed writer; skip it
+                    continue
+
+    def _load(self) -> FeedbackIndex:
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                index = FeedbackIndex.from_dict(json.load(f), self.half_life_days)
+        else:
+            index = FeedbackIndex(self.half_life_days)
+        for record in self._read_log():
+            index.add(record)
+        return index
+
+    def load(self) -> FeedbackIndex:
+        with self._locked():
+            return self._load()
+
+    def _write_snapshot(self, index: FeedbackIndex):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index.to_dict(), f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _compact(self):
+        # Rebuild from disk so appends made by other processes are kept
+        index = self._load()
+        index.compact()
+        self._write_snapshot(index)
+        open(self.path, 'w').close()
+        self._appends = 0
+        self._log_records = None
+
+    def compact(self):
+        with self._locked():
+            self._compact()
+
+    def clear(self):
+        with self._locked():
+            self._write_snapshot(FeedbackIndex(self.half_life_days))
+            open(self.path, 'w').close()
+            self._appends = 0
+            self._log_records = None
+
+    def is_empty(self) -> bool:
+        return not os.path.exists(self.snapshot_path) and not (
+            os.path.exists(self.path) and os.path.getsize(self.path) > 0)
+
+
+class SqliteFeedbackStore(FeedbackStore):
+    """
+    SQLite feedback store in WAL mode.
+
+    Every append inserts the raw record and updates the aggregate tables in
+    the same transaction, so startup only reads the aggregates and the most
+    recent records. WAL mode lets readers proceed while another thread or
+    process is writing.
+
+    Aggregates hold decayed weights relative to the 'epoch' counter, as in
+    FeedbackIndex. Every compact_every appends (and on compact()) they are
+    rebased on the current time, entries that have decayed below
+    FeedbackIndex.PRUNE_BELOW are deleted, and only the newest retention raw
+    records are kept. Appends are counted by record id against the
+    'compacted_id' counter, so appends from every process and thread
+    sharing the database count towards the same compaction.
+    """
+
+    def __init__(self, path: str = 'match_feedback.db',
+                 half_life_days: Optional[float] = HALF_LIFE_DAYS,
+                 retention: Optional[int] = 10000, compact_every: int = 1000):
+        self.path = path
+        self.half_life_days = half_life_days
+        self.retention = retention
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._connection().executescript('''
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pair_counts (
+                    human TEXT NOT NULL,
+                    ai TEXT NOT NULL,
+                    count REAL NOT NULL,
+                    PRIMARY KEY (human, ai)
+                );
+                CREATE TABLE IF NOT EXISTS skill_counts (
+                    skill TEXT PRIMARY KEY,
+                    count REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pending_positive (
+                    human TEXT PRIMARY KEY,
+                    count REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                );
+            ''')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _increment(conn, table: str, key_columns: Dict[str, str], amount: float):
+        columns = ', '.join(key_columns)
+        placeholders = ', '.join('?' for _ in key_columns)
+        value_column = 'value' if table == 'counters' else 'count'
+        conn.execute(
+            f"INSERT INTO {table} ({columns}, {value_column}) VALUES ({placeholders}, ?) "
+            f"ON CONFLICT ({columns}) DO UPDATE SET {value_column} = {value_column} + excluded.{value_column}",
+            (*key_columns.values(), amount))
+
+    @staticmethod
+    def _epoch(conn) -> float:
+        """Time the stored weights are relative to; a new or cleared store starts now."""
+        conn.execute('INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)',
+                     ('epoch', time.time()))
+        return conn.execute("SELECT value FROM counters WHERE name = 'epoch'").fetchone()[0]
+
+    @staticmethod
+    def _mark_compacted(conn, record_id: int):
+        """Count appends towards the next compaction from record_id on."""
+        conn.execute("INSERT INTO counters (name, value) VALUES ('compacted_id', ?) "
+                     "ON CONFLICT (name) DO UPDATE SET value = excluded.value", (record_id,))
+
+    def append(self, record: Dict) -> bool:
+        with self._transaction() as conn:
+            record_id = conn.execute('INSERT INTO feedback (record) VALUES (?)',
+                                     (json.dumps(record),)).lastrowid
+            weight = decay_weight(record_time(record), self._epoch(conn), self.half_life_days)
+            self._add_aggregates(conn, record, weight)
+            compacted_id = conn.execute(
+                "SELECT value FROM counters WHERE name = 'compacted_id'").fetchone()
+            # Claimed inside the transaction, so only one appender compacts
+            due = record_id - (compacted_id[0] if compacted_id else 0) >= self.compact_every
+            if due:
+                self._mark_compacted(conn, record_id)
+        if due:
+            self.compact()
+        return due
+
+    def _add_aggregates(self, conn, record: Dict, weight: float):
+        is_positive = record['positive']
+        self._increment(conn, 'pair_counts',
+                        {'human': record['human'], 'ai': record['ai']},
+                        weight if is_positive else -weight)
+        self._increment(conn, 'counters',
+                        {'name': 'positive_count' if is_positive else 'negative_count'}, 1)
+        if not is_positive:
+            return
+        if record.get('skills') is None:
+            self._increment(conn, 'pending_positive', {'human': record['human']}, weight)
+            return
+        for skill in record['skills']:
+            self._increment(conn, 'skill_counts', {'skill': normalize_skill(skill)}, weight)
+        self._increment(conn, 'counters', {'name': 'skill_total'}, weight * len(record['skills']))
+
+    def load(self) -> FeedbackIndex:
+        conn = self._connection()
+        counters = dict(conn.execute('SELECT name, value FROM counters'))
+        recent = conn.execute(
+            'SELECT record FROM feedback ORDER BY id DESC LIMIT ?',
+            (FeedbackIndex.RECENT_LIMIT,)).fetchall()
+        return FeedbackIndex.from_dict({
+            'epoch': counters.get('epoch'),
+            'pair_counts': conn.execute('SELECT human, ai, count FROM pair_counts').fetchall(),
+            'skill_counts': dict(conn.execute('SELECT skill, count FROM skill_counts')),
+            'skill_total': counters.get('skill_total', 0),
+            'pending_positive': dict(conn.execute('SELECT human, count FROM pending_positive')),
+            'positive_count': int(counters.get('positive_count', 0)),
+            'negative_count': int(counters.get('negative_count', 0)),
+            'recent': [json.loads(row[0]) for row in reversed(recent)]
+        }, self.half_life_days)
+
+    def compact(self, now: float = None):
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            factor = 1.0 / decay_weight(now, self._epoch(conn), self.half_life_days)
+            for table in ('pair_counts', 'skill_counts', 'pending_positive'):
+                conn.execute(f'UPDATE {table} SET count = count * ?', (factor,))
+                conn.execute(f'DELETE FROM {table} WHERE abs(count) < ?',
+                             (FeedbackIndex.PRUNE_BELOW,))
+            conn.execute("UPDATE counters SET value = (SELECT coalesce(sum(count), 0) "
+                         "FROM skill_counts) WHERE name = 'skill_total'")
+            conn.execute("UPDATE counters SET value = ? WHERE name = 'epoch'", (now,))
+            if self.retention is not None:
+                conn.execute('DELETE FROM feedback WHERE id <= (SELECT id FROM feedback '
+                             'ORDER BY id DESC LIMIT 1 OFFSET ?)', (self.retention,))
+            self._mark_compacted(conn, conn.execute(
+                'SELECT coalesce(max(id), 0) FROM feedback').fetchone()[0])
+        self._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def clear(self):
+        with self._transaction() as conn:
+            for table in ('feedback', 'pair_counts', 'skill_counts', 'pending_positive'):
+                conn.execute(f'DELETE FROM {table}')
+            # Record ids keep growing after a clear, so keep counting from the last one
+            conn.execute("DELETE FROM counters WHERE name != 'compacted_id'")
+
+    def is_empty(self) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM counters WHERE name NOT IN ('epoch', 'compacted_id') "
+            "LIMIT 1").fetchone() is None
+
+
+def create_feedback_store(backend: str = 'jsonl', path: str = None, **options) -> FeedbackStore:
+    """
+    Create a feedback store by backend name ('jsonl' or 'sqlite').
+
+    Extra keyword options (half_life_days, compact_every and retention) are
+    passed on to the store.
+    """
+    if backend == 'jsonl':
+        return JsonlFeedbackStore(path or 'match_feedback.jsonl', **options)
+    if backend == 'sqlite':
+        return SqliteFeedbackStore(path or 'match_feedback.db', **options)
+    raise ValueError(f"Unknown feedback backend: {backend}")
+
+
+def feedback_store_from_env() -> FeedbackStore:
+    """
+    Create the feedback store configured by environment variables.
+
+    INTELLIBRIDGE_FEEDBACK_BACKEND picks the backend (default 'jsonl') and
+    INTELLIBRIDGE_FEEDBACK_HALF_LIFE_DAYS the half-life of feedback weights
+    (default HALF_LIFE_DAYS; 0 disables decay).
+    """
+    half_life_days = float(os.environ.get('INTELLIBRIDGE_FEEDBACK_HALF_LIFE_DAYS', HALF_LIFE_DAYS))
+    return create_feedback_store(os.environ.get('INTELLIBRIDGE_FEEDBACK_BACKEND', 'jsonl'),
+                                 half_life_days=half_life_days or None)
+
+
+def migrate_json_feedback(json_path: str, store: FeedbackStore) -> int:
+    """
+    Import a legacy match_feedback.json into an empty store.
+
+    The JSON file is renamed to *.migrated once its records are imported.
+
+    Returns:
+        Number of records migrated
+    """
+    if not os.path.exists(json_path) or not store.is_empty():
+        return 0
+    with open(json_path, 'r') as f:
+        records = legacy_records(json.load(f))
+    if not records:
+        return 0
+    for record in records:
+        store.append(record)
+    os.replace(json_path, f"{json_path}.migrated")
+    return len(records)
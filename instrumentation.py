@@ -0,0 +1,138 @@
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger('intellibridge.performance')
+
+
+class Hook:
+    """Receives instrumentation events; override the methods you need."""
+
+    def on_stage(self, run_name: str, stage: str, seconds: float):
+        """Called when a timed stage finishes. run_name is None outside a run."""
+
+    def on_run(self, record: Dict):
+        """Called with the record of every finished run."""
+
+
+class LoggingHook(Hook):
+    """Emit every finished run as one JSON log line, and stages at DEBUG level."""
+
+    def __init__(self, log: logging.Logger = None, level: int = logging.INFO):
+        self.log = log or logger
+        self.level = level
+
+    def on_stage(self, run_name: str, stage: str, seconds: float):
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(json.dumps({'event': 'stage', 'run': run_name, 'stage': stage,
+                                       'seconds': round(seconds, 6)}))
+
+    def on_run(self, record: Dict):
+        self.log.log(self.level, json.dumps({'event': 'run', **record}))
+
+
+class Instrumentation:
+    """
+    Per-stage timings, call counts and counters, grouped into runs.
+
+    A run (e.g. one match_experts call or one page render) collects the time
+    and number of calls of every stage timed inside it, plus counters such as
+    cache hits. Runs started inside another run on the same thread fold into
+    the outer one, so a page render that calls match_experts produces a
+    single record. The most recent records are kept in history and every
+    record is passed to the hooks.
+    """
+
+    def __init__(self, hooks: List[Hook] = None, history: int = 50):
+        self.hooks = list(hooks or [])
+        self.history = deque(maxlen=history)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook):
+        self.hooks.append(hook)
+
+    @property
+    def current(self) -> Dict:
+        """Record of the run active on this thread, or None."""
+        return getattr(self._local, 'record', None)
+
+    @contextmanager
+    def run(self, name: str, **fields) -> Iterator[Dict]:
+        """Time a run; extra fields are stored on its record."""
+        if self.current is not None:
+            yield self.current
+            return
+        record = {'name': name, 'started': datetime.now().isoformat(), **fields,
+                  'seconds': 0.0, 'stages': {}, 'counters': {}}
+        self._local.record = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._local.record = None
+            with self._lock:
+                self.history.append(record)
+            for hook in self.hooks:
+                hook.on_run(record)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time one stage and add it to the active run, if any."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            record = self.current
+            if record is not None:
+                stage = record['stages'].setdefault(name, {'seconds': 0.0, 'calls': 0})
+                stage['seconds'] += seconds
+                stage['calls'] += 1
+            for hook in self.hooks:
+                hook.on_stage(record['name'] if record is not None else None, name, seconds)
+
+    def annotate(self, **fields):
+        """Store extra fields (e.g. input sizes) on the active run, if any."""
+        record = self.current
+        if record is not None:
+            record.update(fields)
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter of the active run, if any."""
+        record = self.current
+        if record is not None:
+            record['counters'][name] = record['counters'].get(name, 0) + amount
+
+    def recent_runs(self) -> List[Dict]:
+        """Finished run records, oldest first."""
+        with self._lock:
+            return list(self.history)
+
+    def clear(self):
+        with self._lock:
+            self.history.clear()
+
+
+def instrumented(run_name: str):
+    """Method decorator that wraps each call in a run of self.instrumentation."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.run(run_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def hit_rate(counters: Dict[str, int], hits: str, misses: str) -> Optional[float]:
+    """hits / (hits + misses) for two counters of a run record, or None if both are zero."""
+    total = counters.get(hits, 0) + counters.get(misses, 0)
+    return counters.get(hits, 0) / total if total else None
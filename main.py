@@ -1,16 +1,21 @@
+import time
+script_start = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from bulk_import import ImportStats, import_profiles, iter_records
 from extractor import SkillExtractor
+from encoders import create_encoder, model_load_seconds
 from matcher import ExpertMatcher
+from feedback_store import feedback_store_from_env
+from instrumentation import Instrumentation, LoggingHook, hit_rate
+from profile_store import ProfileStore
+import hashlib
 import json
-import plotly.graph_objects as go
-from datetime import datetime
-# Removed unused import of datetime
+import os
+from typing import Dict, Tuple
 
-# Initialize components
-skill_extractor = SkillExtractor()
-expert_matcher = ExpertMatcher()
+import numpy as np
 
 # Set page config
 st.set_page_config(
@@ -19,6 +24,123 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_resource(show_spinner=False)
+def get_instrumentation():
+    """Stage timings shared by the matcher and extractor; runs are also logged as JSON."""
+    return Instrumentation(hooks=[LoggingHook()])
+
+
+@st.cache_resource(show_spinner=False)
+def get_skill_extractor():
+    return SkillExtractor(instrumentation=get_instrumentation())
+
+
+@st.cache_resource(show_spinner=False)
+def get_expert_matcher():
+    """One matcher per process; its model is only loaded when matches are first scored."""
+    return ExpertMatcher(
+        feedback_store=feedback_store_from_env(),
+        encoder=create_encoder(os.environ.get('INTELLIBRIDGE_ENCODER', 'sentence-transformers')),
+        instrumentation=get_instrumentation())
+
+
+def bulk_import_section(kind: str, label: str):
+    """
+    CSV/JSONL upload that imports many profiles at once, extracting skills in a process pool.
+
+    Returns the imported profiles, or None when none have been imported.
+    """
+    key = f'bulk_{kind}_profiles'
+    uploaded = st.file_uploader(f"Bulk import {label} (CSV or JSONL)", type=['csv', 'jsonl'],
+                                key=f'bulk_{kind}_file')
+    if uploaded is not None and st.button(f"Import {label}", key=f'bulk_{kind}_import'):
+        # Lines are an upper bound on rows, which is close enough for a progress bar
+        total = max(uploaded.getvalue().count(b'\n'), 1)
+        progress_bar = st.progress(0.0)
+        status = st.empty()
+
+        def show_progress(stats: ImportStats):
+            progress_bar.progress(min(stats.imported / total, 1.0))
+            status.write(f"Extracted skills for {stats.imported:,} profiles "
+                         f"({stats.rate:,.0f} profiles/s)")
+
+        stats = ImportStats()
+        with instrumentation.run('bulk_import', kind=kind):
+            with instrumentation.stage('extract'):
+                st.session_state[key] = list(import_profiles(
+                    iter_records(uploaded), kind, stats=stats, progress=show_progress))
+            instrumentation.count('profiles_imported', stats.imported)
+        progress_bar.progress(1.0)
+        status.success(f"Imported {stats.imported:,} profiles in {stats.seconds:.1f} s "
+                       f"({stats.rate:,.0f} profiles/s); skipped {stats.skipped} incomplete rows")
+
+    profiles = st.session_state.get(key)
+    if not profiles:
+        return None
+    st.write(f"{len(profiles):,} imported {label.lower()}")
+    st.dataframe(pd.DataFrame(profiles[:100]), use_container_width=True)
+    if st.button(f"Clear imported {label}", key=f'bulk_{kind}_clear'):
+        st.session_state.pop(key)
+        st.experimental_rerun()
+    return profiles
+
+
+def profiles_key(store: ProfileStore) -> str:
+    """Content hash of every profile in a store, as a cache key."""
+    return hashlib.sha1('\x1f'.join(store.keys).encode('utf-8')).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_matches(humans_key: str, ais_key: str, weights_key: Tuple, feedback_key: Tuple,
+                   _human_store: ProfileStore, _ai_store: ProfileStore, _session):
+    """match_experts results, cached across reruns and sessions by the hashed arguments."""
+    return _session.match_experts(_human_store, _ai_store, dict(weights_key))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_assignment(humans_key: str, ais_key: str, weights_key: Tuple, feedback_key: Tuple,
+                      capacity: int, _human_store: ProfileStore, _ai_store: ProfileStore,
+                      _session) -> Dict:
+    """assign_experts results, cached like cached_matches."""
+    return _session.assign_experts(_human_store, _ai_store, dict(weights_key), capacity)
+
+
+def reset_match_page():
+    """Go back to the first page of matches, e.g. when a filter changes."""
+    st.session_state['match_page'] = 1
+
+
+def filter_matches(matches, top_k: int, human_query: str, ai_query: str,
+                   min_score: float) -> np.ndarray:
+    """
+    Positions of the matches that pass the filters, in result order.
+
+    Each human's matches come best first, so a match's rank is its position
+    among the matches of its human (MatchResults.ranks). Names are tested
+    once per profile rather than once per match.
+    """
+    keep = matches.ranks() < top_k
+    if human_query:
+        keep &= np.array([human_query.lower() in name.lower()
+                          for name in matches.human_names], dtype=bool)[matches.human_rows]
+    if ai_query:
+        keep &= np.array([ai_query.lower() in name.lower()
+                          for name in matches.ai_names], dtype=bool)[matches.ai_rows]
+    if min_score > 0:
+        keep &= matches.scores['total_score'] >= min_score
+    return np.flatnonzero(keep)
+
+
+# Initialize components
+instrumentation = get_instrumentation()
+skill_extractor = get_skill_extractor()
+expert_matcher = get_expert_matcher()
+# The matcher is shared by every browser session; cached scores and the last matched humans are not
+if 'match_session' not in st.session_state:
+    st.session_state['match_session'] = expert_matcher.session()
+match_session = st.session_state['match_session']
+
 # Title and description
 st.title("🤖 IntelliBridge")
 st.markdown("""
@@ -51,9 +173,18 @@ domain_alignment_weight = st.sidebar.slider(
     step=0.1
 )
 
+skill_overlap_weight = st.sidebar.slider(
+    "Semantic Skill Overlap Weight",
+    min_value=0.0,
+    max_value=1.0,
+    value=0.0,
+    step=0.1,
+    help="Counts related skills such as 'NLP' and 'Natural Language Processing' as shared"
+)
+
 # Ensure weights sum to 1
 total_weight = skill_similarity_weight + \
-    complementarity_weight + domain_alignment_weight
+    complementarity_weight + domain_alignment_weight + skill_overlap_weight
 if total_weight != 1.0:
     st.sidebar.warning("Weights should sum to 1.0. Please adjust the weights.")
 
@@ -64,8 +195,8 @@ if 'ai_profiles' not in st.session_state:
     st.session_state['ai_profiles'] = []
 
 # Main content
-tab1, tab2, tab3 = st.tabs(
-    ["Upload Profiles", "View Matches", "Feedback & Analytics"])
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["Upload Profiles", "View Matches", "Feedback & Analytics", "Performance"])
 
 with tab1:
     st.header("Upload Expert Profiles")
@@ -78,155 +209,250 @@ with tab1:
             st.session_state['ai_profiles'] = sample_data['ai_profiles']
             st.session_state['num_humans'] = len(sample_data['human_profiles'])
             st.session_state['num_ais'] = len(sample_data['ai_profiles'])
+            st.session_state.pop('bulk_human_profiles', None)
+            st.session_state.pop('bulk_ai_profiles', None)
             st.experimental_rerun()
 
     # Human experts upload
     st.subheader("Human Experts")
-    if 'num_humans' not in st.session_state:
-        st.session_state['num_humans'] = 1
-    num_humans = st.number_input(
-        "Number of Human Experts", min_value=1, max_value=10, value=st.session_state['num_humans'], key="num_humans")
-    human_profiles = []
-
-    for i in range(num_humans):
-        with st.expander(f"Human Expert {i+1}"):
-            if len(st.session_state['human_profiles']) > i:
-                default_name = st.session_state['human_profiles'][i]['name']
-                default_bio = st.session_state['human_profiles'][i]['bio']
-                default_skills = ", ".join(st.session_state['human_profiles'][i]['skills'])
-            else:
-                default_name = ""
-                default_bio = ""
-                default_skills = ""
-            name = st.text_input(f"Name {i+1}", value=default_name, key=f"human_name_{i}")
-            bio = st.text_area(f"Bio {i+1}", value=default_bio, key=f"human_bio_{i}")
-            skills = st.text_area(f"Skills (comma-separated) {i+1}", value=default_skills, key=f"human_skills_{i}")
-
-            if name and bio and skills:
-                skills_list = [s.strip() for s in skills.split(",")]
-                human_profiles.append({
-                    "name": name,
-                    "bio": bio,
-                    "skills": skills_list
-                })
+    human_profiles = bulk_import_section('human', "Human Experts")
+    if human_profiles is None:
+        if 'num_humans' not in st.session_state:
+            st.session_state['num_humans'] = 1
+        num_humans = st.number_input(
+            "Number of Human Experts", min_value=1, max_value=10, value=st.session_state['num_humans'], key="num_humans")
+        human_profiles = []
+
+        for i in range(num_humans):
+            with st.expander(f"Human Expert {i+1}"):
+                if len(st.session_state['human_profiles']) > i:
+                    default_name = st.session_state['human_profiles'][i]['name']
+                    default_bio = st.session_state['human_profiles'][i]['bio']
+                    default_skills = ", ".join(st.session_state['human_profiles'][i]['skills'])
+                else:
+                    default_name = ""
+                    default_bio = ""
+                    default_skills = ""
+                name = st.text_input(f"Name {i+1}", value=default_name, key=f"human_name_{i}")
+                bio = st.text_area(f"Bio {i+1}", value=default_bio, key=f"human_bio_{i}")
+                skills = st.text_area(f"Skills (comma-separated) {i+1}", value=default_skills, key=f"human_skills_{i}")
+
+                if name and bio and skills:
+                    skills_list = [s.strip() for s in skills.split(",")]
+                    human_profiles.append({
+                        "name": name,
+                        "bio": bio,
+                        "skills": skills_list
+                    })
     st.session_state['human_profiles'] = human_profiles
 
     # AI agents upload
     st.subheader("AI Agents")
-    if 'num_ais' not in st.session_state:
-        st.session_state['num_ais'] = 1
-    num_ais = st.number_input("Number of AI Agents",
-                              min_value=1, max_value=10, value=st.session_state['num_ais'], key="num_ais")
-    ai_profiles = []
-
-    for i in range(num_ais):
-        with st.expander(f"AI Agent {i+1}"):
-            if len(st.session_state['ai_profiles']) > i:
-                default_name = st.session_state['ai_profiles'][i]['name']
-                default_description = st.session_state['ai_profiles'][i]['description']
-                default_capabilities = ", ".join(st.session_state['ai_profiles'][i]['capabilities'])
-            else:
-                default_name = ""
-                default_description = ""
-                default_capabilities = ""
-            name = st.text_input(f"AI Name {i+1}", value=default_name, key=f"ai_name_{i}")
-            description = st.text_area(f"Description {i+1}", value=default_description, key=f"ai_description_{i}")
-            capabilities = st.text_area(
-                f"Capabilities (comma-separated) {i+1}", value=default_capabilities, key=f"ai_capabilities_{i}")
-
-            if name and description and capabilities:
-                capabilities_list = [c.strip()
-                                     for c in capabilities.split(",")]
-                ai_profiles.append({
-                    "name": name,
-                    "description": description,
-                    "capabilities": capabilities_list
-                })
+    ai_profiles = bulk_import_section('ai', "AI Agents")
+    if ai_profiles is None:
+        if 'num_ais' not in st.session_state:
+            st.session_state['num_ais'] = 1
+        num_ais = st.number_input("Number of AI Agents",
+                                  min_value=1, max_value=10, value=st.session_state['num_ais'], key="num_ais")
+        ai_profiles = []
+
+        for i in range(num_ais):
+            with st.expander(f"AI Agent {i+1}"):
+                if len(st.session_state['ai_profiles']) > i:
+                    default_name = st.session_state['ai_profiles'][i]['name']
+                    default_description = st.session_state['ai_profiles'][i]['description']
+                    default_capabilities = ", ".join(st.session_state['ai_profiles'][i]['capabilities'])
+                else:
+                    default_name = ""
+                    default_description = ""
+                    default_capabilities = ""
+                name = st.text_input(f"AI Name {i+1}", value=default_name, key=f"ai_name_{i}")
+                description = st.text_area(f"Description {i+1}", value=default_description, key=f"ai_description_{i}")
+                capabilities = st.text_area(
+                    f"Capabilities (comma-separated) {i+1}", value=default_capabilities, key=f"ai_capabilities_{i}")
+
+                if name and description and capabilities:
+                    capabilities_list = [c.strip()
+                                         for c in capabilities.split(",")]
+                    ai_profiles.append({
+                        "name": name,
+                        "description": description,
+                        "capabilities": capabilities_list
+                    })
     st.session_state['ai_profiles'] = ai_profiles
 
 with tab2:
     st.header("Expert Matches")
 
     if human_profiles and ai_profiles:
-        # Calculate matches
-        weights = {
-            'skill_similarity': skill_similarity_weight,
-            'complementarity': complementarity_weight,
-            'domain_alignment': domain_alignment_weight
-        }
-
-        matches = expert_matcher.match_experts(
-            human_profiles, ai_profiles, weights)
-
-        # Convert matches to DataFrame for display
-        matches_df = pd.DataFrame(matches)
-
-        # Display matches
-        st.dataframe(
-            matches_df[['human', 'ai', 'total_score', 'explanation']],
-            use_container_width=True
-        )
-
-        # Create heatmap of scores
-        st.subheader("Match Score Heatmap")
-
-        # Pivot data for heatmap
-        heatmap_data = matches_df.pivot(
-            index='human',
-            columns='ai',
-            values='total_score'
-        )
-
-        fig = px.imshow(
-            heatmap_data,
-            labels=dict(x="AI Agent", y="Human Expert", color="Match Score"),
-            color_continuous_scale="Viridis",
-            aspect="auto"
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        with instrumentation.run('view_matches', humans=len(human_profiles), ais=len(ai_profiles)):
+            # Calculate matches
+            weights = {
+                'skill_similarity': skill_similarity_weight,
+                'complementarity': complementarity_weight,
+                'domain_alignment': domain_alignment_weight,
+                'skill_overlap': skill_overlap_weight
+            }
+
+            # Parse the profiles once for matching, assignment and feedback
+            human_store = ProfileStore.from_profiles(human_profiles, 'human')
+            ai_store = ProfileStore.from_profiles(ai_profiles, 'ai')
+            # Scores only change with the profiles, the weights or the feedback
+            feedback_index = expert_matcher.feedback
+            cache_key = (profiles_key(human_store), profiles_key(ai_store),
+                         tuple(sorted(weights.items())),
+                         (id(feedback_index), feedback_index.revision))
+            matches = expert_matcher.explain_matches(
+                cached_matches(*cache_key, human_store, ai_store, match_session))
+            # A cached result may come from another session, which saw these humans instead
+            match_session.remember_humans(human_store)
+
+            # Filtering and paging run on the result arrays; only one page is rendered
+            filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
+            with filter_col1:
+                human_query = st.text_input("Human expert contains", on_change=reset_match_page)
+            with filter_col2:
+                ai_query = st.text_input("AI agent contains", on_change=reset_match_page)
+            with filter_col3:
+                min_score = st.slider("Minimum total score", 0.0, 1.0, 0.0, 0.05,
+                                      on_change=reset_match_page)
+            with filter_col4:
+                top_k = st.number_input("Top matches per human", min_value=1,
+                                        max_value=len(ai_store), value=min(5, len(ai_store)),
+                                        on_change=reset_match_page)
+            with instrumentation.stage('filter'):
+                positions = filter_matches(matches, top_k, human_query, ai_query, min_score)
+
+            page_col1, page_col2 = st.columns(2)
+            with page_col1:
+                page_size = st.selectbox("Matches per page", [10, 25, 50, 100], index=1,
+                                         on_change=reset_match_page)
+            n_pages = max(1, -(-len(positions) // page_size))
+            # The page widget is driven by session state alone; other profiles can
+            # leave fewer pages than the one shown, so keep it in range
+            if st.session_state.setdefault('match_page', 1) > n_pages:
+                st.session_state['match_page'] = n_pages
+            with page_col2:
+                page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages,
+                                       key='match_page')
+            page_positions = positions[(page - 1) * page_size:page * page_size]
+            page_matches = matches.take(page_positions)
+            st.caption(
+                f"Showing {len(page_positions)} of {len(positions)} filtered matches "
+                f"({len(matches)} pairs scored)")
+
+            with instrumentation.stage('dataframe'):
+                # Explanations are generated for the visible page only
+                st.dataframe(
+                    page_matches.to_dataframe(explanations=True)[
+                        ['human', 'ai', 'total_score', 'explanation']],
+                    use_container_width=True
+                )
+
+            if not len(positions):
+                st.info("No matches pass the filters.")
+            else:
+                with instrumentation.stage('heatmap'):
+                    # Top-k scores of the humans on this page, so the grid stays page-sized
+                    st.subheader("Top Match Scores")
+                    import plotly.express as px
+
+                    page_humans = np.isin(matches.human_rows[positions],
+                                          np.unique(page_matches.human_rows))
+                    heatmap_data = matches.take(positions[page_humans]).pivot('total_score')
+
+                    fig = px.imshow(
+                        heatmap_data,
+                        labels=dict(x="AI Agent", y="Human Expert", color="Match Score"),
+                        color_continuous_scale="Viridis",
+                        aspect="auto"
+                    )
 
-        # Display detailed match information
-        st.subheader("Detailed Match Information")
-
-        for match in matches:
-            with st.expander(f"{match['human']} + {match['ai']}"):
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.write(f"**Total Score:** {match['total_score']:.2f}")
-                    st.write(
-                        f"**Skill Similarity:** {match['skill_similarity']:.2f}")
-                    st.write(
-                        f"**Complementarity:** {match['complementarity']:.2f}")
-                    st.write(
-                        f"**Domain Alignment:** {match['domain_alignment']:.2f}")
-                    st.write(
-                        f"**Feedback Adjustment:** {match['feedback_adjustment']:.2f}")
-                    st.write(f"**Explanation:** {match['explanation']}")
-
-                with col2:
-                    st.write("**Provide Feedback**")
-                    feedback = st.radio(
-                        "How was this match?",
-                        ["Positive", "Negative", "Neutral"],
-                        key=f"feedback_{match['human']}_{match['ai']}"
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    # How often each AI agent makes the filtered top-k lists
+                    ai_rows = matches.ai_rows[positions]
+                    appearances = np.bincount(ai_rows, minlength=len(ai_store))
+                    score_sums = np.bincount(
+                        ai_rows, weights=matches.scores['total_score'][positions],
+                        minlength=len(ai_store))
+                    agent_summary = pd.DataFrame({
+                        'ai': list(ai_store.names),
+                        'top_matches': appearances,
+                        'mean_score': score_sums / np.maximum(appearances, 1)
+                    })
+                    st.write("**AI agents by top matches**")
+                    st.dataframe(
+                        agent_summary[agent_summary['top_matches'] > 0]
+                        .sort_values(['top_matches', 'mean_score'], ascending=False).head(20),
+                        use_container_width=True
                     )
 
-                    if feedback != "Neutral":
-                        reason = st.text_area(
-                            "Reason for feedback (optional)",
-                            key=f"reason_{match['human']}_{match['ai']}"
-                        )
-
-                        if st.button("Submit Feedback", key=f"submit_{match['human']}_{match['ai']}"):
-                            expert_matcher.add_feedback(
-                                match['human'],
-                                match['ai'],
-                                feedback == "Positive",
-                                reason
+            # Optimal staffing: each human gets one AI agent, each agent serves up to N humans
+            st.subheader("Optimal Team Assignment")
+            agent_capacity = st.number_input(
+                "Humans per AI Agent", min_value=1, max_value=max(len(human_profiles), 1), value=1)
+            team = cached_assignment(*cache_key, agent_capacity, human_store, ai_store,
+                                     match_session)
+            with instrumentation.stage('assignment_table'):
+                if team['matches']:
+                    st.dataframe(
+                        team['matches'].to_dataframe()[
+                            ['human', 'ai', 'total_score', 'skill_similarity',
+                             'complementarity', 'domain_alignment', 'skill_overlap',
+                             'feedback_adjustment']],
+                        use_container_width=True
+                    )
+            st.write(f"**Total Assignment Score:** {team['total_score']:.2f}")
+            if team['unassigned_humans']:
+                st.warning(
+                    f"Not enough AI agent capacity for: {', '.join(team['unassigned_humans'])}")
+
+            # Display detailed match information
+            st.subheader("Detailed Match Information")
+
+            with instrumentation.stage('match_details'):
+                # Feedback widgets for the visible page only
+                for match in page_matches:
+                    with st.expander(f"{match['human']} + {match['ai']}"):
+                        col1, col2 = st.columns(2)
+
+                        with col1:
+                            st.write(f"**Total Score:** {match['total_score']:.2f}")
+                            st.write(
+                                f"**Skill Similarity:** {match['skill_similarity']:.2f}")
+                            st.write(
+                                f"**Complementarity:** {match['complementarity']:.2f}")
+                            st.write(
+                                f"**Domain Alignment:** {match['domain_alignment']:.2f}")
+                            st.write(
+                                f"**Skill Overlap:** {match['skill_overlap']:.2f}")
+                            st.write(
+                                f"**Feedback Adjustment:** {match['feedback_adjustment']:.2f}")
+                            st.write(f"**Explanation:** {match['explanation']}")
+
+                        with col2:
+                            st.write("**Provide Feedback**")
+                            feedback = st.radio(
+                                "How was this match?",
+                                ["Positive", "Negative", "Neutral"],
+                                key=f"feedback_{match['human']}_{match['ai']}"
                             )
-                            st.success("Feedback submitted successfully!")
+
+                            if feedback != "Neutral":
+                                reason = st.text_area(
+                                    "Reason for feedback (optional)",
+                                    key=f"reason_{match['human']}_{match['ai']}"
+                                )
+
+                                if st.button("Submit Feedback", key=f"submit_{match['human']}_{match['ai']}"):
+                                    match_session.add_feedback(
+                                        match['human'],
+                                        match['ai'],
+                                        feedback == "Positive",
+                                        reason
+                                    )
+                                    st.success("Feedback submitted successfully!")
     else:
         st.info(
             "Please upload both human and AI profiles in the 'Upload Profiles' tab.")
@@ -239,8 +465,8 @@ with tab3:
         expert_matcher.clear_feedback()
         st.success("All feedback has been cleared!")
 
-    # Load feedback data
-    feedback_data = expert_matcher.feedback_data
+    # Load feedback aggregates
+    feedback = expert_matcher.feedback
 
     # Display feedback statistics
     col1, col2, col3 = st.columns(3)
@@ -248,28 +474,31 @@ with tab3:
     with col1:
         st.metric(
             "Total Feedback",
-            len(feedback_data['positive_matches']) +
-            len(feedback_data['negative_matches'])
+            feedback.total_count
         )
 
     with col2:
         st.metric(
             "Positive Matches",
-            len(feedback_data['positive_matches'])
+            feedback.positive_count
         )
 
     with col3:
         st.metric(
             "Negative Matches",
-            len(feedback_data['negative_matches'])
+            feedback.negative_count
         )
 
     # Display skill weights
     st.subheader("Skill Weights Based on Feedback")
+    if feedback.half_life_days:
+        st.caption(f"Feedback loses half its weight every {feedback.half_life_days:g} days.")
 
-    if feedback_data['skill_weights']:
+    skill_weights = feedback.skill_weights
+    if skill_weights:
+        import plotly.express as px
         skill_weights_df = pd.DataFrame(
-            list(feedback_data['skill_weights'].items()),
+            list(skill_weights.items()),
             columns=['Skill', 'Weight']
         ).sort_values('Weight', ascending=False)
 
@@ -288,10 +517,7 @@ with tab3:
     # Display recent feedback
     st.subheader("Recent Feedback")
 
-    all_feedback = (
-        feedback_data['positive_matches'] +
-        feedback_data['negative_matches']
-    )
+    all_feedback = list(feedback.recent)
 
     if all_feedback:
         feedback_df = pd.DataFrame(all_feedback)
@@ -301,9 +527,74 @@ with tab3:
         for _, row in feedback_df.head(5).iterrows():
             with st.expander(f"{row['human']} + {row['ai']} ({row['timestamp'].strftime('%Y-%m-%d %H:%M')})"):
                 st.write(
-                    f"**Type:** {'Positive' if row.name < len(feedback_data['positive_matches']) else 'Negative'}")
+                    f"**Type:** {'Positive' if row['positive'] else 'Negative'}")
                 if row['reason']:
                     st.write(f"**Reason:** {row['reason']}")
     else:
         st.info(
             "No feedback available yet. Provide feedback on matches to see them here.")
+
+with tab4:
+    st.header("Performance")
+
+    runs = instrumentation.recent_runs()
+    if st.button("Clear Performance History"):
+        instrumentation.clear()
+        runs = []
+
+    if runs:
+        latest = runs[-1]
+        st.subheader(f"Latest Run: {latest['name']}")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Time", f"{latest['seconds'] * 1000:.0f} ms")
+        with col2:
+            embedding_hit_rate = hit_rate(
+                latest['counters'], 'embedding_cache_hits', 'embedding_cache_misses')
+            st.metric("Embedding Cache Hit Rate",
+                      "-" if embedding_hit_rate is None else f"{embedding_hit_rate:.0%}")
+        with col3:
+            reuse_rate = hit_rate(
+                latest['counters'], 'component_cells_reused', 'component_cells_computed')
+            st.metric("Score Cache Reuse Rate",
+                      "-" if reuse_rate is None else f"{reuse_rate:.0%}")
+
+        if latest['stages']:
+            import plotly.express as px
+            stages_df = pd.DataFrame([
+                {'Stage': stage, 'Time (ms)': timing['seconds'] * 1000, 'Calls': timing['calls']}
+                for stage, timing in latest['stages'].items()
+            ]).sort_values('Time (ms)', ascending=False)
+            fig = px.bar(stages_df, x='Stage', y='Time (ms)', hover_data=['Calls'],
+                         title='Time per Stage')
+            st.plotly_chart(fig, use_container_width=True)
+        if latest['counters']:
+            st.write("**Counters:** " + ", ".join(
+                f"{name} = {value}" for name, value in latest['counters'].items()))
+
+        # One row per run, one column per stage
+        st.subheader("Recent Runs")
+        history_df = pd.DataFrame([
+            {
+                'started': run['started'],
+                'run': run['name'],
+                'humans': run.get('humans'),
+                'ais': run.get('ais'),
+                'total (ms)': run['seconds'] * 1000,
+                **{f"{stage} (ms)": timing['seconds'] * 1000
+                   for stage, timing in run['stages'].items()}
+            }
+            for run in reversed(runs)
+        ])
+        st.dataframe(history_df, use_container_width=True)
+    else:
+        st.info("No runs recorded yet. Match some profiles to see where the time goes.")
+
+# Report startup cost: the script itself, and the one-off model load once it has happened
+st.sidebar.divider()
+st.sidebar.caption(f"Page rendered in {(time.perf_counter() - script_start) * 1000:.0f} ms")
+if expert_matcher.model_name in model_load_seconds:
+    st.sidebar.caption(
+        f"Model {expert_matcher.model_name} loaded in {model_load_seconds[expert_matcher.model_name]:.1f} s")
+else:
+    st.sidebar.caption("Model not loaded yet (loads on first match)")
@@ -0,0 +1,200 @@
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+SCORE_COLUMNS = ['total_score', 'skill_similarity', 'complementarity', 'domain_alignment',
+                 'skill_overlap', 'feedback_adjustment']
+# Scores passed to the explain callback, in order
+EXPLAINED_COLUMNS = ['skill_similarity', 'complementarity', 'domain_alignment',
+                     'feedback_adjustment']
+
+
+class MatchResults:
+    """
+    Columnar list of matches.
+
+    Each match is a position holding the row of its human in human_names,
+    the row of its AI agent in ai_names and its scores, all as NumPy arrays,
+    so building results for millions of pairs allocates no per-match dicts.
+    Explanations are generated on first access and only for the matches
+    actually read. The object still behaves like the list of match dicts it
+    replaces: len(), indexing, slicing and iteration all work, and iterating
+    yields the familiar dicts in chunks.
+    """
+
+    CHUNK = 4096
+
+    def __init__(self, human_names: Sequence[str], ai_names: Sequence[str],
+                 human_rows: np.ndarray, ai_rows: np.ndarray, scores: Dict[str, np.ndarray],
+                 explain: Callable[..., List[str]]):
+        """
+        Args:
+            human_names: Name of every human the rows refer to
+            ai_names: Name of every AI agent the columns refer to
+            human_rows: Row in human_names of each match
+            ai_rows: Row in ai_names of each match
+            scores: Array with one value per match for every name in SCORE_COLUMNS
+            explain: Callback turning lists of skill similarity,
+                complementarity, domain alignment and feedback adjustment
+                values into explanation strings
+        """
+        self.human_names = human_names
+        self.ai_names = ai_names
+        self.human_rows = np.asarray(human_rows, dtype=np.int64)
+        self.ai_rows = np.asarray(ai_rows, dtype=np.int64)
+        self.scores = scores
+        self.explain = explain
+        self._explanations = np.full(len(self.human_rows), None, dtype=object)
+
+    @classmethod
+    def empty(cls, explain: Callable[..., List[str]] = None) -> 'MatchResults':
+        return cls([], [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                   {name: np.zeros(0) for name in SCORE_COLUMNS}, explain)
+
+    @classmethod
+    def concatenate(cls, results: List['MatchResults']) -> 'MatchResults':
+        """Join results in order; name lists shared by every part are not copied."""
+        if not results:
+            return cls.empty()
+
+        def joined(names_of: Callable, rows_of: Callable):
+            names = [names_of(result) for result in results]
+            if all(part is names[0] for part in names):
+                return names[0], np.concatenate([rows_of(result) for result in results])
+            offsets = np.cumsum([0] + [len(part) for part in names[:-1]])
+            return ([name for part in names for name in part],
+                    np.concatenate([rows_of(result) + offset
+                                    for result, offset in zip(results, offsets)]))
+
+        human_names, human_rows = joined(lambda r: r.human_names, lambda r: r.human_rows)
+        ai_names, ai_rows = joined(lambda r: r.ai_names, lambda r: r.ai_rows)
+        combined = cls(human_names, ai_names, human_rows, ai_rows,
+                       {name: np.concatenate([result.scores[name] for result in results])
+                        for name in SCORE_COLUMNS},
+                       results[0].explain)
+        combined._explanations = np.concatenate([result._explanations for result in results])
+        return combined
+
+    def __getstate__(self) -> Dict:
+        # The explain callback is usually bound to a matcher, which cannot be
+        # pickled; unpickled results get one back from ExpertMatcher.explain_matches
+        return {**self.__dict__, 'explain': None}
+
+    def __len__(self) -> int:
+        return len(self.human_rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return self.to_dicts([index % len(self)])[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for start in range(0, len(self), self.CHUNK):
+            yield from self.to_dicts(np.arange(start, min(start + self.CHUNK, len(self))))
+
+    def __repr__(self) -> str:
+        return f"MatchResults({len(self)} matches)"
+
+    @property
+    def humans(self) -> np.ndarray:
+        """Human name of every match."""
+        return np.asarray(self.human_names, dtype=object)[self.human_rows]
+
+    @property
+    def ais(self) -> np.ndarray:
+        """AI agent name of every match."""
+        return np.asarray(self.ai_names, dtype=object)[self.ai_rows]
+
+    def ranks(self) -> np.ndarray:
+        """Position of every match among the matches of its human, in result order (0 first)."""
+        order = np.argsort(self.human_rows, kind='stable')
+        rows = self.human_rows[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else \
+            np.zeros(0, dtype=np.int64)
+        ranks = np.empty(len(rows), dtype=np.int64)
+        ranks[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+        return ranks
+
+    def take(self, positions) -> 'MatchResults':
+        """Subset of the matches, in the given order; explanations already generated are kept."""
+        positions = np.asarray(positions, dtype=np.int64)
+        subset = MatchResults(self.human_names, self.ai_names, self.human_rows[positions],
+                              self.ai_rows[positions],
+                              {name: values[positions] for name, values in self.scores.items()},
+                              self.explain)
+        subset._explanations = self._explanations[positions]
+        return subset
+
+    def explanations(self, positions=None) -> List[str]:
+        """Explanations of the matches at positions (default all), generating missing ones."""
+        positions = np.arange(len(self)) if positions is None else \
+            np.asarray(positions, dtype=np.int64)
+        missing = positions[np.equal(self._explanations[positions], None)]
+        if len(missing):
+            missing = np.unique(missing)
+            self._explanations[missing] = self.explain(
+                *(self.scores[name][missing].tolist() for name in EXPLAINED_COLUMNS))
+        return self._explanations[positions].tolist()
+
+    def to_dicts(self, positions=None) -> List[Dict]:
+        """Matches at positions (default all) as dicts in the match_experts format."""
+        positions = np.arange(len(self)) if positions is None else \
+            np.asarray(positions, dtype=np.int64)
+        human_names, ai_names = self.human_names, self.ai_names
+        columns = [self.scores[name][positions].tolist() for name in SCORE_COLUMNS]
+        return [
+            {
+                'human': human_names[i],
+                'ai': ai_names[j],
+                **dict(zip(SCORE_COLUMNS, values)),
+                'explanation': explanation
+            }
+            for i, j, explanation, *values in zip(
+                self.human_rows[positions].tolist(), self.ai_rows[positions].tolist(),
+                self.explanations(positions), *columns)
+        ]
+
+    def to_dataframe(self, explanations: bool = False) -> pd.DataFrame:
+        """
+        Matches as a DataFrame.
+
+        Score columns wrap the result arrays without copying them, and the
+        'human'/'ai' columns are categoricals over the name lists, so no
+        string is repeated per match. Explanations are only generated when
+        asked for.
+        """
+        data = {'human': _names_column(self.human_names, self.human_rows),
+                'ai': _names_column(self.ai_names, self.ai_rows)}
+        data.update((name, self.scores[name]) for name in SCORE_COLUMNS)
+        frame = pd.DataFrame(data, copy=False)
+        if explanations:
+            frame['explanation'] = self.explanations()
+        return frame
+
+    def pivot(self, values: str = 'total_score') -> pd.DataFrame:
+        """
+        Humans x AI agents matrix of one score, with NaN for pairs without a match.
+
+        Only humans and agents that appear in a match get a row or column,
+        in the order of the name lists. The matrix is filled directly from
+        the arrays instead of going through DataFrame.pivot.
+        """
+        human_used, human_rows = np.unique(self.human_rows, return_inverse=True)
+        ai_used, ai_rows = np.unique(self.ai_rows, return_inverse=True)
+        grid = np.full((len(human_used), len(ai_used)), np.nan)
+        grid[human_rows, ai_rows] = self.scores[values]
+        return pd.DataFrame(
+            grid,
+            index=pd.Index(np.asarray(self.human_names, dtype=object)[human_used], name='human'),
+            columns=pd.Index(np.asarray(self.ai_names, dtype=object)[ai_used], name='ai'))
+
+
+def _names_column(names: Sequence[str], rows: np.ndarray):
+    """Categorical of names[rows] when the names are distinct, else a plain object array."""
+    names = list(names)
+    if len(set(names)) == len(names):
+        return pd.Categorical.from_codes(rows, categories=names)
+    return np.asarray(names, dtype=object)[rows]
@@ -1,93 +1,302 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import warnings
 import numpy as np
-from typing import List, Dict, Tuple
-import pandas as pd
-import json
-import os
+from typing import List, Dict, Tuple, Union
+from datetime import datetime
+from assignment import assign
+from component_cache import CONTENT_COMPONENTS, ComponentCache
+from embedding_cache import EmbeddingCache
+from encoders import DEFAULT_MODEL, Encoder, SentenceTransformerEncoder
+from feedback import FeedbackAdjustment
+from feedback_store import FeedbackStore, JsonlFeedbackStore, migrate_json_feedback
+from instrumentation import Instrumentation, instrumented
+from match_results import MatchResults
+from profile_store import ProfileStore, ai_text, human_text
+from quantization import QuantizedMatrix, disk_backed, quantize, similarity
+from skill_matrix import (SkillEmbeddings, SkillVocabulary, complementarity_matrix,
+                          domain_alignment_matrix, flatten_skills, soft_jaccard_matrix)
+from vector_index import VectorIndex, top_k_indices
+
+COMPONENTS = ['skill_similarity', 'complementarity', 'domain_alignment', 'skill_overlap',
+              'feedback_adjustment']
+
+Profiles = Union[ProfileStore, List[Dict]]
+
+
+class CompiledProfiles:
+    """
+    Profiles together with their normalised embeddings and skill/domain incidence matrices.
+
+    When embeddings are quantized, exact_embeddings holds the float32 rows
+    (typically memory-mapped) used to rescore shortlists; exact_rows maps
+    each profile to its row there, or is None when they line up.
+    """
+
+    def __init__(self, profiles: ProfileStore, embeddings: np.ndarray,
+                 skill_incidence, domain_incidence,
+                 exact_embeddings: np.ndarray = None, exact_rows: np.ndarray = None):
+        self.profiles = profiles
+        self.embeddings = embeddings
+        self.skill_incidence = skill_incidence
+        self.domain_incidence = domain_incidence
+        self.exact_embeddings = exact_embeddings
+        self.exact_rows = exact_rows
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def take(self, rows) -> 'CompiledProfiles':
+        """Subset of the compiled profiles, in the order given by rows."""
+        rows = np.asarray(rows)
+        return CompiledProfiles(
+            self.profiles.take(rows),
+            self.embeddings[rows],
+            self.skill_incidence[rows],
+            self.domain_incidence[rows],
+            # Map rows instead of copying exact embeddings that may never be read
+            self.exact_embeddings,
+            rows if self.exact_rows is None else self.exact_rows[rows])
+
+    def exact(self, rows: np.ndarray) -> np.ndarray:
+        """float32 embeddings of the given profiles, read from exact_embeddings."""
+        if self.exact_rows is not None:
+            rows = self.exact_rows[rows]
+        return np.asarray(self.exact_embeddings[rows], dtype=np.float32)
+
+
+class CatalogState:
+    """
+    The indexed AI catalog match_top_k reads: its compiled profiles, their
+    vector index, the skill vocabulary of their incidence matrices and the
+    rescore factor for quantized embeddings. Never modified once published,
+    so one reference gives a consistent catalog.
+    """
+    __slots__ = ('vocabulary', 'catalog', 'index', 'rescore')
+
+    def __init__(self, vocabulary: SkillVocabulary, catalog: CompiledProfiles,
+                 index: VectorIndex, rescore: int):
+        object.__setattr__(self, 'vocabulary', vocabulary)
+        object.__setattr__(self, 'catalog', catalog)
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'rescore', rescore)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CatalogState is immutable')
 
 
 class ExpertMatcher:
-    def __init__(self):
-        """Initialize the matcher with Sentence-BERT model."""
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    DEFAULT_WEIGHTS = {
+        'skill_similarity': 0.4,
+        'complementarity': 0.4,
+        'domain_alignment': 0.2,
+        'skill_overlap': 0.0
+    }
+    # Skill pairs less similar than this do not count towards skill_overlap
+    SKILL_OVERLAP_THRESHOLD = 0.7
+    # Humans scored together against the union of their probed lists in ivf mode
+    IVF_GROUP_SIZE = 32
+
+    def __init__(self, embedding_cache: EmbeddingCache = None,
+                 feedback_store: FeedbackStore = None,
+                 model_name: str = DEFAULT_MODEL,
+                 encoder: Encoder = None,
+                 instrumentation: Instrumentation = None):
+        """
+        Initialize the matcher with an embedding cache and a feedback store.
+
+        By default texts are embedded with the Sentence-BERT model model_name,
+        which is loaded on first use and shared by every matcher in the
+        process. Another encoder (see encoders.create_encoder) can be passed
+        instead, e.g. the offline HashingEncoder; its name then namespaces
+        the cached embeddings. Any object with a SentenceTransformer-style
+        encode(texts) method works, in which case model_name is used as the
+        namespace. Individual skill strings are embedded once into
+        skill_embeddings for the soft skill overlap component. Stage timings
+        and cache counters of every call are recorded in instrumentation.
+
+        The matcher is the shared, thread-safe core: the model, the caches,
+        the AI catalog and the feedback aggregates serve every thread. State
+        that belongs to one user lives in a MatchSession (see session()):
+        the ComponentCache of their last full grid, so rematching after a
+        weight change or a profile edit only scores the changed rows and
+        columns, and the humans they last matched, which feedback uses to
+        look up skills. Calls without a session use default_session. Only
+        feedback writes take a lock; reads see either the old or the new
+        aggregates.
+        """
+        self.model_name = getattr(encoder, 'name', None) or model_name
+        self._model = encoder or SentenceTransformerEncoder(model_name)
+        # An empty cache is falsy (it has a length), so test for None explicitly
+        self.embedding_cache = embedding_cache if embedding_cache is not None else \
+            EmbeddingCache(self.model_name)
+        self.skill_embeddings = SkillEmbeddings(self._get_embeddings)
+        self.instrumentation = instrumentation or Instrumentation()
+        self._catalog = CatalogState(None, None, None, 0)
         self.feedback_file = 'match_feedback.json'
+        self.feedback_store = feedback_store or JsonlFeedbackStore()
+        self._feedback_lock = threading.Lock()
         self.load_feedback()
+        self.default_session = MatchSession(self)
+
+    def session(self) -> 'MatchSession':
+        """Per-user state for matching with this matcher, e.g. one per Streamlit session."""
+        return MatchSession(self)
+
+    # Read-only views of the current catalog; read _catalog once to get a consistent set
+    @property
+    def catalog(self) -> CompiledProfiles:
+        return self._catalog.catalog
+
+    @property
+    def catalog_index(self) -> VectorIndex:
+        return self._catalog.index
+
+    @property
+    def catalog_vocabulary(self) -> SkillVocabulary:
+        return self._catalog.vocabulary
+
+    @property
+    def catalog_rescore(self) -> int:
+        return self._catalog.rescore
+
+    @property
+    def component_cache(self) -> ComponentCache:
+        return self.default_session.component_cache
+
+    @property
+    def humans(self) -> ProfileStore:
+        return self.default_session.humans
+
+    @property
+    def model(self) -> Encoder:
+        """The encoder that turns profile texts into embeddings."""
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        return getattr(self._model, 'loaded', True)
 
     def load_feedback(self):
-        """Load historical feedback data."""
-        if os.path.exists(self.feedback_file):
-            with open(self.feedback_file, 'r') as f:
-                self.feedback_data = json.load(f)
-        else:
-            self.feedback_data = {
-                'positive_matches': [],
-                'negative_matches': [],
-                'skill_weights': {}
-            }
+        """Load feedback aggregates, migrating a legacy match_feedback.json first."""
+        with self._feedback_lock:
+            migrate_json_feedback(self.feedback_file, self.feedback_store)
+            self.feedback = self.feedback_store.load()
 
     def save_feedback(self):
-        """Save feedback data to file."""
-        with open(self.feedback_file, 'w') as f:
-            json.dump(self.feedback_data, f, indent=2)
-
-    def add_feedback(self, human: str, ai: str, is_positive: bool, reason: str = None):
-        """Add feedback for a match."""
+        """Compact the stored feedback history into aggregates, pruning decayed entries."""
+        with self._feedback_lock:
+            self.feedback_store.compact()
+            self.feedback.compact()
+
+    def add_feedback(self, human: str, ai: str, is_positive: bool, reason: str = None,
+                     session: 'MatchSession' = None):
+        """Add feedback for a match, looking up the human's skills in the session's last match."""
         feedback = {
             'human': human,
             'ai': ai,
-            'timestamp': pd.Timestamp.now().isoformat(),
+            'positive': is_positive,
+            'timestamp': datetime.now().isoformat(),
             'reason': reason
         }
+        humans = (session or self.default_session).humans
+        row = humans.index_of(human) if humans is not None else None
+        if is_positive and row is not None:
+            feedback['skills'] = humans.skills_of(row)
+
+        with self._feedback_lock:
+            compacted = self.feedback_store.append(feedback)
+            self.feedback.add(feedback)
+            if compacted:
+                # Prune in memory too, or a long-lived process keeps every pair it ever saw
+                self.feedback.compact()
+
+    def update_skill_weights(self) -> Dict[str, float]:
+        """
+        Deprecated: skill weights are now updated with every add_feedback call.
 
-        if is_positive:
-            self.feedback_data['positive_matches'].append(feedback)
-        else:
-            self.feedback_data['negative_matches'].append(feedback)
-
-        self.save_feedback()
-        self.update_skill_weights()
-
-    def update_skill_weights(self):
-        """Update skill weights based on feedback."""
-        # Count skill occurrences in positive matches
-        positive_skills = {}
-        for match in self.feedback_data['positive_matches']:
-            human_profile = next(
-                (p for p in self.human_profiles if p['name'] == match['human']), None)
-            if human_profile:
-                for skill in human_profile['skills']:
-                    positive_skills[skill] = positive_skills.get(skill, 0) + 1
-
-        # Update weights based on positive feedback
-        total_positive = sum(positive_skills.values())
-        if total_positive > 0:
-            for skill, count in positive_skills.items():
-                self.feedback_data['skill_weights'][skill] = count / \
-                    total_positive
+        Resolves positive feedback still waiting for the skills of the last
+        matched humans, and returns the current weights.
+        """
+        warnings.warn('update_skill_weights() is deprecated; add_feedback() keeps '
+                      'feedback.skill_weights up to date', DeprecationWarning, stacklevel=2)
+        humans = self.default_session.humans
+        with self._feedback_lock:
+            if humans is not None and self.feedback.pending_positive:
+                self.feedback.resolve_humans(humans)
+            return self.feedback.skill_weights
+
+    def _remember_humans(self, humans: ProfileStore, session: 'MatchSession' = None):
+        """Keep the last matched humans, so feedback can look up their skills by name."""
+        (session or self.default_session).humans = humans
+        if self.feedback.pending_positive:
+            with self._feedback_lock:
+                self.feedback.resolve_humans(humans)
 
     def _get_embedding(self, text: str) -> np.ndarray:
         """Convert text to embedding vector."""
-        return self.model.encode(text)
+        return self._get_embeddings([text])[0]
+
+    def _get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Convert a list of texts to an embedding matrix.
+
+        Texts already in the embedding cache are read from disk; the rest are
+        encoded together in one batched call and added to the cache.
+        """
+        with self.instrumentation.stage('embedding_lookup'):
+            cached = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        self.instrumentation.count('embedding_cache_hits', len(texts) - len(missing))
+        self.instrumentation.count('embedding_cache_misses', len(missing))
+        if missing:
+            # Deduplicate so repeated texts are only encoded once
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            with self.instrumentation.stage('encode'):
+                encoded = np.asarray(self.model.encode(missing_texts), dtype=np.float32)
+            self.instrumentation.count('texts_encoded', len(missing_texts))
+            with self.instrumentation.stage('embedding_store'):
+                self.embedding_cache.put_many(missing_texts, encoded)
+            by_text = dict(zip(missing_texts, encoded))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+        return np.array(cached, dtype=np.float32)
+
+    @staticmethod
+    def _human_text(human: Dict) -> str:
+        """Build the text that is embedded for a human expert profile."""
+        return human_text(human)
+
+    @staticmethod
+    def _ai_text(ai: Dict) -> str:
+        """Build the text that is embedded for an AI agent profile."""
+        return ai_text(ai)
 
     def _calculate_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors."""
+        from sklearn.metrics.pairwise import cosine_similarity
         return cosine_similarity([vec1], [vec2])[0][0]
 
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """Scale every row to unit length, leaving all-zero rows at zero."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _compile_profiles(self, profiles: Profiles, is_human: bool,
+                          vocabulary: SkillVocabulary, grow: bool = True) -> CompiledProfiles:
+        """Embed profiles in one batch and build their skill and domain incidence matrices."""
+        profiles = ProfileStore.coerce(profiles, 'human' if is_human else 'ai')
+        embeddings = self._normalize_rows(self._get_embeddings(profiles.texts))
+        with self.instrumentation.stage('skill_incidence'):
+            skill_incidence = profiles.incidence(vocabulary, grow=grow)
+            domain_incidence = profiles.incidence(vocabulary, domains=True, grow=grow)
+        return CompiledProfiles(profiles, embeddings, skill_incidence, domain_incidence)
+
     def _calculate_complementarity(self, human_skills, ai_capabilities) -> float:
         # Accepts either a list or a dict of lists
-        def flatten(sk):
-            if isinstance(sk, dict):
-                result = set()
-                for v in sk.values():
-                    result.update(v)
-                return result
-            elif isinstance(sk, list):
-                return set(sk)
-            else:
-                return set()
-        human_skill_set = flatten(human_skills)
-        ai_capability_set = flatten(ai_capabilities)
+        human_skill_set = flatten_skills(human_skills)
+        ai_capability_set = flatten_skills(ai_capabilities)
         intersection = len(human_skill_set.intersection(ai_capability_set))
         union = len(human_skill_set.union(ai_capability_set))
         if union == 0:
@@ -96,109 +305,420 @@ class ExpertMatcher:
         complementarity = 1 - jaccard_similarity
         return complementarity
 
+    @instrumented('match_experts')
     def match_experts(self,
-                      human_profiles: List[Dict],
-                      ai_profiles: List[Dict],
-                      weights: Dict[str, float] = None) -> List[Dict]:
+                      human_profiles: Profiles,
+                      ai_profiles: Profiles,
+                      weights: Dict[str, float] = None,
+                      session: 'MatchSession' = None) -> MatchResults:
         """
         Match human experts with AI agents based on skills and capabilities.
 
         Args:
-            human_profiles: List of human expert profiles
-            ai_profiles: List of AI agent profiles
+            human_profiles: Human expert profiles, as a ProfileStore or a list of dicts
+            ai_profiles: AI agent profiles, as a ProfileStore or a list of dicts
             weights: Dictionary of weights for different matching criteria
+            session: Per-user state to use (default the matcher's default_session)
 
         Returns:
-            List of matches with scores and explanations
+            MatchResults with every pair, grouped by human and best first;
+            explanations are generated when matches are read
         """
-        self.human_profiles = human_profiles  # Store for feedback processing
+        human_profiles = ProfileStore.coerce(human_profiles, 'human')
+        ai_profiles = ProfileStore.coerce(ai_profiles, 'ai')
+        session = session or self.default_session
+        self._remember_humans(human_profiles, session)  # Store for feedback processing
+        self.instrumentation.annotate(humans=len(human_profiles), ais=len(ai_profiles))
 
         if weights is None:
-            weights = {
-                'skill_similarity': 0.4,
-                'complementarity': 0.4,
-                'domain_alignment': 0.2
-            }
-
-        matches = []
-
-        for human in human_profiles:
-            human_matches = []
-
-            # Get human profile embedding
-            human_text = f"{human['bio']} {' '.join(human['skills'])}"
-            human_embedding = self._get_embedding(human_text)
-
-            for ai in ai_profiles:
-                # Get AI profile embedding
-                ai_text = f"{ai['description']} {' '.join(ai['capabilities'])}"
-                ai_embedding = self._get_embedding(ai_text)
-
-                # Calculate different similarity scores
-                skill_similarity = self._calculate_similarity(
-                    human_embedding, ai_embedding)
-                complementarity = self._calculate_complementarity(
-                    human['skills'], ai['capabilities'])
-
-                # Calculate domain alignment
-                human_domains = set(human['skills']) if isinstance(
-                    human['skills'], list) else set(human['skills'].get('domains', []))
-                ai_domains = set(ai['capabilities']) if isinstance(
-                    ai['capabilities'], list) else set(ai['capabilities'].get('domains', []))
-                domain_alignment = len(human_domains.intersection(
-                    ai_domains)) / max(len(human_domains.union(ai_domains)), 1)
-
-                # Apply feedback-based adjustments
-                feedback_adjustment = self._calculate_feedback_adjustment(
-                    human, ai)
-
-                # Calculate weighted score
-                total_score = (
-                    weights['skill_similarity'] * skill_similarity +
-                    weights['complementarity'] * complementarity +
-                    weights['domain_alignment'] * domain_alignment
-                ) * (1 + feedback_adjustment)
-
-                match = {
-                    'human': human['name'],
-                    'ai': ai['name'],
-                    'total_score': total_score,
-                    'skill_similarity': skill_similarity,
-                    'complementarity': complementarity,
-                    'domain_alignment': domain_alignment,
-                    'feedback_adjustment': feedback_adjustment,
-                    'explanation': self._generate_explanation(
-                        skill_similarity, complementarity, domain_alignment, feedback_adjustment
-                    )
-                }
-
-                human_matches.append(match)
-
-            # Sort matches by total score
-            human_matches.sort(key=lambda x: x['total_score'], reverse=True)
-            matches.extend(human_matches)
-
-        return matches
+            weights = self.DEFAULT_WEIGHTS
+
+        if not human_profiles or not ai_profiles:
+            return MatchResults.empty(self._explanations)
+
+        components = self._grid_components(
+            human_profiles, ai_profiles, session.component_cache, weights)
+        with self.instrumentation.stage('combine'):
+            total_scores = self._combine_scores(components, weights)
+
+        # Sort each human's matches by total score, keeping input order among ties
+        with self.instrumentation.stage('ranking'):
+            order = np.argsort(-total_scores, axis=1, kind='stable')
+        rows = np.repeat(np.arange(len(human_profiles)), len(ai_profiles))
+        return self._build_matches(
+            human_profiles, ai_profiles, components, total_scores, rows, order.ravel())
+
+    @instrumented('assign_experts')
+    def assign_experts(self,
+                       human_profiles: Profiles,
+                       ai_profiles: Profiles,
+                       weights: Dict[str, float] = None,
+                       capacity: int = 1,
+                       session: 'MatchSession' = None) -> Dict:
+        """
+        Staff humans onto AI agents so that the total match score is maximal.
 
-    def _calculate_feedback_adjustment(self, human: Dict, ai: Dict) -> float:
-        """Calculate score adjustment based on historical feedback."""
-        adjustment = 0.0
+        Args:
+            human_profiles: Human expert profiles, as a ProfileStore or a list of dicts
+            ai_profiles: AI agent profiles, as a ProfileStore or a list of dicts
+            weights: Dictionary of weights for different matching criteria
+            capacity: Maximum number of humans each AI agent can serve
+            session: Per-user state to use (default the matcher's default_session)
 
-        # Check for direct feedback on this pair
-        for match in self.feedback_data['positive_matches']:
-            if match['human'] == human['name'] and match['ai'] == ai['name']:
-                adjustment += 0.1  # Boost score for positive feedback
+        Returns:
+            Dictionary with the assigned 'matches' (same format as match_experts),
+            their 'total_score' and the names of 'unassigned_humans'
+        """
+        human_profiles = ProfileStore.coerce(human_profiles, 'human')
+        ai_profiles = ProfileStore.coerce(ai_profiles, 'ai')
+        session = session or self.default_session
+        self._remember_humans(human_profiles, session)  # Store for feedback processing
+        self.instrumentation.annotate(humans=len(human_profiles), ais=len(ai_profiles))
+        weights = weights or self.DEFAULT_WEIGHTS
+
+        assignment = {'matches': MatchResults.empty(self._explanations), 'total_score': 0.0,
+                      'unassigned_humans': list(human_profiles.names)}
+        if not human_profiles or not ai_profiles:
+            return assignment
+
+        components = self._grid_components(
+            human_profiles, ai_profiles, session.component_cache, weights)
+        with self.instrumentation.stage('combine'):
+            total_scores = self._combine_scores(components, weights)
+
+        with self.instrumentation.stage('assignment'):
+            human_rows, ai_columns = assign(total_scores, capacity)
+        assigned = set(human_rows.tolist())
+        assignment['matches'] = self._build_matches(
+            human_profiles, ai_profiles, components, total_scores, human_rows, ai_columns)
+        assignment['total_score'] = float(total_scores[human_rows, ai_columns].sum())
+        assignment['unassigned_humans'] = [
+            name for i, name in enumerate(human_profiles.names) if i not in assigned]
+        return assignment
+
+    @instrumented('build_index')
+    def build_index(self, ai_profiles: Profiles, mode: str = 'exact',
+                    n_lists: int = None, n_probe: int = 8,
+                    precision: str = 'float32', rescore: int = 4):
+        """
+        Precompute the AI catalog used by match_top_k.
 
-        for match in self.feedback_data['negative_matches']:
-            if match['human'] == human['name'] and match['ai'] == ai['name']:
-                adjustment -= 0.1  # Reduce score for negative feedback
+        Args:
+            ai_profiles: AI agent profiles to index, as a ProfileStore or a list of dicts
+            mode: 'exact' to score every AI agent, or 'ivf' to only score agents
+                in the inverted lists closest to each human
+            n_lists: Number of inverted lists in 'ivf' mode (default sqrt of catalog size)
+            n_probe: Lists visited per query in 'ivf' mode; higher is slower but more accurate
+            precision: 'float32', or 'float16' / 'int8' to hold the catalog
+                embeddings in 2x / 4x less memory
+            rescore: With a quantized catalog, the k * rescore best agents per
+                human are re-scored with the float32 embeddings, kept in a
+                temporary memory-mapped file; 0 or 1 ranks on quantized scores only
+
+        The new catalog is built aside and swapped in at the end, so
+        match_top_k calls running meanwhile keep using the old one.
+        """
+        vocabulary = SkillVocabulary()
+        catalog = self._compile_profiles(ai_profiles, False, vocabulary)
+        with self.instrumentation.stage('index_build'):
+            index = VectorIndex(catalog.embeddings, mode=mode, n_lists=n_lists, n_probe=n_probe)
+        self.set_catalog(catalog, index, vocabulary, precision, rescore)
+
+    def set_catalog(self, catalog: CompiledProfiles, index: VectorIndex,
+                    vocabulary: SkillVocabulary, precision: str = 'float32', rescore: int = 4):
+        """
+        Swap in a compiled AI catalog for match_top_k, e.g. one loaded from a snapshot.
+
+        catalog's incidence matrices must use vocabulary's skill ids, and
+        index must hold catalog's float32 embeddings; precision and rescore
+        are as in build_index. Rescoring reads catalog.exact_embeddings when
+        set (e.g. a snapshot's memory-mapped rows) and otherwise a disk-backed
+        copy of the float32 embeddings made before quantizing. The catalog
+        is published in one assignment, so readers see the old or the new
+        one but never a mix.
+        """
+        if precision != 'float32':
+            with self.instrumentation.stage('quantize'):
+                if catalog.exact_embeddings is None:
+                    catalog.exact_embeddings = disk_backed(catalog.embeddings)
+                catalog.embeddings = quantize(catalog.embeddings, precision)
+            index.embeddings = catalog.embeddings
+        self._catalog = CatalogState(vocabulary, catalog, index, rescore)
+
+    @instrumented('match_top_k')
+    def match_top_k(self,
+                    human_profiles: Profiles,
+                    k: int = 5,
+                    weights: Dict[str, float] = None,
+                    n_probe: int = None,
+                    block_size: int = 1024,
+                    session: 'MatchSession' = None) -> MatchResults:
+        """
+        Return only the k best AI agents for each human from the indexed catalog.
 
-        # Apply skill-based adjustments
-        for skill in human['skills']:
-            if skill in self.feedback_data['skill_weights']:
-                adjustment += self.feedback_data['skill_weights'][skill] * 0.05
+        In 'ivf' mode the candidates for each human are the agents in the
+        n_probe inverted lists closest to their embedding; candidates are then
+        ranked by the same total score as match_experts. Humans that probe
+        similar lists are scored together, IVF_GROUP_SIZE at a time, against
+        the union of their candidates in one matrix product, with each human
+        restricted to their own lists.
 
-        return adjustment
+        Returns:
+            MatchResults with up to k matches per human, best first, like match_experts
+        """
+        # Take one reference to the published state; a concurrent set_catalog
+        # replaces the reference and leaves this state untouched
+        state = self._catalog
+        catalog, index, vocabulary = state.catalog, state.index, state.vocabulary
+        if index is None:
+            raise ValueError("No AI catalog indexed; call build_index(ai_profiles) first")
+        human_profiles = ProfileStore.coerce(human_profiles, 'human')
+        session = session or self.default_session
+        self._remember_humans(human_profiles, session)  # Store for feedback processing
+        self.instrumentation.annotate(humans=len(human_profiles), ais=len(catalog))
+        weights = weights or self.DEFAULT_WEIGHTS
+
+        # Every part refers to the full human store and the catalog, so joining them copies no names
+        parts = []
+        for start in range(0, len(human_profiles), block_size):
+            humans = self._compile_profiles(
+                human_profiles.take(slice(start, start + block_size)), True,
+                vocabulary, grow=False)
+            if index.mode == 'exact':
+                components, total_scores, best = self._top_k(
+                    humans, catalog, k, weights, rescore=state.rescore)
+                rows = np.repeat(np.arange(len(humans)), best.shape[1])
+                parts.append(self._build_matches(
+                    human_profiles, catalog.profiles, components, total_scores,
+                    rows, best.ravel(), human_rows=rows + start))
+                continue
+
+            groups = []
+            with self.instrumentation.stage('candidates'):
+                candidate_groups = list(index.candidate_groups(
+                    humans.embeddings, n_probe, self.IVF_GROUP_SIZE))
+            for group_rows, candidate_rows, allowed in candidate_groups:
+                group, candidates = humans.take(group_rows), catalog.take(candidate_rows)
+                self.instrumentation.count('candidates_scored', allowed.size)
+                components, total_scores, best = self._top_k(
+                    group, candidates, k, weights, allowed, state.rescore)
+                rows = np.repeat(np.arange(len(group)), best.shape[1])
+                cols = best.ravel()
+                # Fewer than k probed candidates leaves other humans' candidates in best
+                rows, cols = rows[allowed[rows, cols]], cols[allowed[rows, cols]]
+                groups.append(self._build_matches(
+                    human_profiles, catalog.profiles, components, total_scores,
+                    rows, cols, human_rows=group_rows[rows] + start, ai_rows=candidate_rows[cols]))
+            if groups:
+                # Back to human order; the stable sort keeps each human's matches best first
+                block = MatchResults.concatenate(groups)
+                parts.append(block.take(np.argsort(block.human_rows, kind='stable')))
+
+        if not parts:
+            return MatchResults.empty(self._explanations)
+        return MatchResults.concatenate(parts)
+
+    def _top_k(self, humans: CompiledProfiles, ais: CompiledProfiles, k: int,
+               weights: Dict[str, float],
+               allowed: np.ndarray = None,
+               rescore: int = 0) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Score humans against AI agents and pick the k best agents per human.
+
+        If given, allowed masks the pairs each human may be matched with;
+        the others score -inf and only fill best when a human has fewer
+        than k allowed agents.
+
+        With quantized AI embeddings and rescore > 1 a shortlist of
+        k * rescore agents is picked first; its skill similarity is recomputed from float32
+        embeddings before the final k are chosen from the shortlist.
+
+        Returns:
+            (components, total_scores, best) where best holds the column
+            indices of each human's k best agents, best first
+        """
+        components = self._component_matrices(humans, ais, self._content_names(weights))
+        with self.instrumentation.stage('combine'):
+            total_scores = self._combine_scores(components, weights)
+            if allowed is not None:
+                total_scores[~allowed] = -np.inf
+        shortlist_size = k * rescore
+        rescore = (isinstance(ais.embeddings, QuantizedMatrix) and rescore > 1
+                   and ais.exact_embeddings is not None)
+        with self.instrumentation.stage('top_k'):
+            best = top_k_indices(total_scores, shortlist_size if rescore else k)
+        if not rescore:
+            return components, total_scores, best
+
+        with self.instrumentation.stage('rescore'):
+            shortlist = best
+            columns, inverse = np.unique(shortlist.ravel(), return_inverse=True)
+            exact = ais.exact(columns)
+            exact_similarity = np.take_along_axis(
+                humans.embeddings @ exact.T, inverse.reshape(shortlist.shape), axis=1)
+            np.put_along_axis(components['skill_similarity'], shortlist,
+                              exact_similarity.astype(np.float64), axis=1)
+            total_scores = self._combine_scores(components, weights)
+            if allowed is not None:
+                total_scores[~allowed] = -np.inf
+            # Only shortlisted agents compete for the final k
+            shortlist_scores = np.full_like(total_scores, -np.inf)
+            np.put_along_axis(shortlist_scores, shortlist,
+                              np.take_along_axis(total_scores, shortlist, axis=1), axis=1)
+        self.instrumentation.count('candidates_rescored', shortlist.size)
+        with self.instrumentation.stage('top_k'):
+            best = top_k_indices(shortlist_scores, k)
+        return components, total_scores, best
+
+    @staticmethod
+    def _content_names(weights: Dict[str, float]) -> List[str]:
+        """Content components the weights use; skill_overlap is costly and often weighted 0."""
+        if weights.get('skill_overlap', 0.0):
+            return CONTENT_COMPONENTS
+        return [name for name in CONTENT_COMPONENTS if name != 'skill_overlap']
+
+    def _component_matrices(self, humans: CompiledProfiles, ais: CompiledProfiles,
+                            names: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Calculate every score component for all human/AI pairs as H x M matrices.
+
+        Content components left out of names (default all) are zero.
+        """
+        components = self._content_matrices(humans, ais, names)
+        for name in CONTENT_COMPONENTS:
+            components.setdefault(name, np.zeros((len(humans), len(ais))))
+        components['feedback_adjustment'] = self._feedback_matrix(humans.profiles, ais.profiles)
+        return components
+
+    def _content_matrices(self, humans: CompiledProfiles, ais: CompiledProfiles,
+                          names: List[str] = None) -> Dict[str, np.ndarray]:
+        """Calculate the named components that depend only on profile content (default all)."""
+        names = names or CONTENT_COMPONENTS
+        components = {}
+        if 'skill_similarity' in names:
+            with self.instrumentation.stage('skill_similarity'):
+                components['skill_similarity'] = \
+                    similarity(humans.embeddings, ais.embeddings).astype(np.float64)
+        if 'complementarity' in names:
+            with self.instrumentation.stage('complementarity'):
+                components['complementarity'] = complementarity_matrix(
+                    humans.skill_incidence, ais.skill_incidence)
+        if 'domain_alignment' in names:
+            with self.instrumentation.stage('domain_alignment'):
+                components['domain_alignment'] = domain_alignment_matrix(
+                    humans.domain_incidence, ais.domain_incidence)
+        if 'skill_overlap' in names:
+            with self.instrumentation.stage('skill_overlap'):
+                components['skill_overlap'] = self._skill_overlap(humans.profiles, ais.profiles)
+        return components
+
+    def _skill_overlap(self, human_profiles: ProfileStore,
+                       ai_profiles: ProfileStore) -> np.ndarray:
+        """
+        Soft Jaccard similarity of the skill sets of every human/AI pair.
+
+        Unlike complementarity, related skills such as "nlp" and "natural
+        language processing" count as overlapping when their embeddings are
+        at least SKILL_OVERLAP_THRESHOLD similar.
+        """
+        human_incidence, human_skills = human_profiles.used_skills()
+        ai_incidence, ai_skills = ai_profiles.used_skills()
+        similarity = self.skill_embeddings.similarity(
+            human_skills, ai_skills, self.SKILL_OVERLAP_THRESHOLD)
+        return soft_jaccard_matrix(human_incidence, ai_incidence, similarity)
+
+    def _feedback_matrix(self, human_profiles: ProfileStore,
+                         ai_profiles: ProfileStore) -> FeedbackAdjustment:
+        with self.instrumentation.stage('feedback_adjustment'):
+            return self.feedback.adjustment_matrix(human_profiles, ai_profiles)
+
+    def _grid_components(self, human_profiles: ProfileStore, ai_profiles: ProfileStore,
+                         component_cache: ComponentCache,
+                         weights: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """
+        Component matrices for the full grid, reusing cached cells of unchanged profiles.
+
+        Content components the weights do not use are zero and not computed.
+        """
+        def compute(humans: ProfileStore, ais: ProfileStore,
+                    names: List[str]) -> Dict[str, np.ndarray]:
+            # Intern all skills once so both sides share one vocabulary
+            vocabulary = SkillVocabulary()
+            return self._content_matrices(
+                self._compile_profiles(humans, True, vocabulary),
+                self._compile_profiles(ais, False, vocabulary), names)
+
+        reused, computed = component_cache.cells_reused, component_cache.cells_computed
+        components = component_cache.components(
+            human_profiles, ai_profiles, compute, self.feedback, self._feedback_matrix,
+            self._content_names(weights))
+        for name in CONTENT_COMPONENTS:
+            components.setdefault(name, np.zeros((len(human_profiles), len(ai_profiles))))
+        self.instrumentation.count('component_cells_reused',
+                                   component_cache.cells_reused - reused)
+        self.instrumentation.count('component_cells_computed',
+                                   component_cache.cells_computed - computed)
+        return components
+
+    @staticmethod
+    def _combine_scores(components: Dict[str, np.ndarray],
+                        weights: Dict[str, float]) -> np.ndarray:
+        """Calculate the weighted total score matrix from the component matrices."""
+        return components['feedback_adjustment'].apply(
+            weights['skill_similarity'] * components['skill_similarity'] +
+            weights['complementarity'] * components['complementarity'] +
+            weights['domain_alignment'] * components['domain_alignment'] +
+            weights.get('skill_overlap', 0.0) * components['skill_overlap'])
+
+    def _build_matches(self, human_profiles: ProfileStore, ai_profiles: ProfileStore,
+                       components: Dict[str, np.ndarray], total_scores: np.ndarray,
+                       rows: np.ndarray, cols: np.ndarray, human_rows: np.ndarray = None,
+                       ai_rows: np.ndarray = None) -> MatchResults:
+        """
+        Gather the results for the (row, column) cells of the score matrices, in the given order.
+
+        human_rows and ai_rows give the rows of those cells in the profile
+        stores when they differ from the matrix rows and columns.
+        """
+        with self.instrumentation.stage('build_results'):
+            scores = {name: components[name][rows, cols] for name in CONTENT_COMPONENTS}
+            scores['feedback_adjustment'] = components['feedback_adjustment'].values(rows, cols)
+            scores['total_score'] = total_scores[rows, cols]
+            return MatchResults(
+                human_profiles.names, ai_profiles.names,
+                rows if human_rows is None else human_rows,
+                cols if ai_rows is None else ai_rows,
+                scores, self._explanations)
+
+    def _explanations(self, skill_similarity: List[float], complementarity: List[float],
+                      domain_alignment: List[float],
+                      feedback_adjustment: List[float]) -> List[str]:
+        """
+        Explanations for many matches at once.
+
+        An explanation only depends on which band each component falls in, so
+        _generate_explanation runs once per distinct combination of bands.
+        """
+        with self.instrumentation.stage('explanations'):
+            bands = [(np.asarray(values) > 0.7).astype(np.int64) + (np.asarray(values) > 0.4)
+                     for values in (skill_similarity, complementarity, domain_alignment)]
+            codes = ((bands[0] * 3 + bands[1]) * 3 + bands[2]) * 3 + \
+                (np.sign(np.asarray(feedback_adjustment)).astype(np.int64) + 1)
+            _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            texts = [self._generate_explanation(skill_similarity[i], complementarity[i],
+                                                domain_alignment[i], feedback_adjustment[i])
+                     for i in first.tolist()]
+            return [texts[code] for code in inverse.tolist()]
+
+    def explain_matches(self, results: MatchResults) -> MatchResults:
+        """Let results generate explanations again, e.g. after they were pickled into a cache."""
+        results.explain = self._explanations
+        return results
+
+    def _calculate_feedback_adjustment(self, human: Dict, ai: Dict) -> float:
+        """Calculate score adjustment based on historical feedback."""
+        return (self.feedback.pair_adjustment(human['name'], ai['name']) +
+                self.feedback.skill_adjustment(human['skills']))
 
     def _generate_explanation(self,
                               skill_similarity: float,
@@ -237,9 +757,47 @@ class ExpertMatcher:
         return ". ".join(explanation)
 
     def clear_feedback(self):
-        self.feedback_data = {
-            'positive_matches': [],
-            'negative_matches': [],
-            'skill_weights': {}
-        }
-        self.save_feedback()
+        with self._feedback_lock:
+            self.feedback_store.clear()
+            self.feedback = self.feedback_store.load()
+
+
+class MatchSession:
+    """
+    Per-user matching state on top of a shared ExpertMatcher.
+
+    Holds the ComponentCache of this user's last full grid and the humans
+    they last matched, so concurrent users neither evict each other's cached
+    scores nor attribute feedback to another user's profiles. Sessions are
+    cheap; create one per Streamlit session or service request with
+    ExpertMatcher.session().
+    """
+
+    def __init__(self, matcher: ExpertMatcher):
+        self.matcher = matcher
+        self.component_cache = ComponentCache()
+        self.humans = None
+
+    @property
+    def feedback(self):
+        return self.matcher.feedback
+
+    def match_experts(self, human_profiles: Profiles, ai_profiles: Profiles,
+                      weights: Dict[str, float] = None) -> MatchResults:
+        return self.matcher.match_experts(human_profiles, ai_profiles, weights, session=self)
+
+    def assign_experts(self, human_profiles: Profiles, ai_profiles: Profiles,
+                       weights: Dict[str, float] = None, capacity: int = 1) -> Dict:
+        return self.matcher.assign_experts(
+            human_profiles, ai_profiles, weights, capacity, session=self)
+
+    def match_top_k(self, human_profiles: Profiles, k: int = 5,
+                    weights: Dict[str, float] = None, **options) -> MatchResults:
+        return self.matcher.match_top_k(human_profiles, k, weights, session=self, **options)
+
+    def remember_humans(self, human_profiles: Profiles):
+        """Record humans whose matches came from elsewhere (e.g. a cache), for feedback on them."""
+        self.matcher._remember_humans(ProfileStore.coerce(human_profiles, 'human'), self)
+
+    def add_feedback(self, human: str, ai: str, is_positive: bool, reason: str = None):
+        self.matcher.add_feedback(human, ai, is_positive, reason, session=self)
@@ -0,0 +1,246 @@
+import hashlib
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from skill_matrix import SkillVocabulary, domain_skills, flatten_skills
+
+KINDS = ('human', 'ai')
+
+
+def normalize_skill(skill: str) -> str:
+    """Canonical form of a skill: lower case, single spaces, no surrounding whitespace."""
+    return ' '.join(str(skill).split()).lower()
+
+
+def human_text(human: Dict) -> str:
+    """Build the text that is embedded for a human expert profile."""
+    return f"{human['bio']} {' '.join(human['skills'])}"
+
+
+def ai_text(ai: Dict) -> str:
+    """Build the text that is embedded for an AI agent profile."""
+    return f"{ai['description']} {' '.join(ai['capabilities'])}"
+
+
+class ProfileRecord:
+    """Read-only view of one profile in a ProfileStore."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: 'ProfileStore', index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.store.names[self.index]
+
+    @property
+    def text(self) -> str:
+        return self.store.texts[self.index]
+
+    @property
+    def skills(self) -> List[str]:
+        return self.store.skills_of(self.index)
+
+    def __repr__(self) -> str:
+        return f"ProfileRecord({self.name!r}, {self.store.kind})"
+
+
+class ProfileStore:
+    """
+    Columnar store of human expert or AI agent profiles.
+
+    Every profile is parsed once: its embedding text is built, its name is
+    interned, and its skills are normalised (see normalize_skill) and
+    interned to integer ids in the store's SkillVocabulary. Skill and domain
+    ids are held as flat int32 arrays with CSR-style row offsets instead of
+    one list or set per profile, and names are indexed, so looking a profile
+    up by name is a dict lookup. The matcher, the component cache and the
+    feedback aggregates all read the store directly; lists of profile dicts
+    are converted with ProfileStore.coerce.
+    """
+
+    def __init__(self, kind: str, names: List[str], texts: List[str],
+                 vocabulary: SkillVocabulary,
+                 skill_indptr: np.ndarray, skill_ids: np.ndarray,
+                 domain_indptr: np.ndarray, domain_ids: np.ndarray):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown profile kind: {kind}")
+        self.kind = kind
+        self.names = names
+        self.texts = texts
+        self.vocabulary = vocabulary
+        self.skill_indptr = skill_indptr
+        self.skill_ids = skill_ids
+        self.domain_indptr = domain_indptr
+        self.domain_ids = domain_ids
+        self._name_rows = None
+        self._duplicate_rows = None
+        self._keys = None
+        self._used_skills = None
+
+    @classmethod
+    def from_profiles(cls, profiles: Iterable[Dict], kind: str = 'human',
+                      vocabulary: SkillVocabulary = None) -> 'ProfileStore':
+        """
+        Parse profile dicts into a store.
+
+        Args:
+            profiles: Human profiles ('name', 'bio', 'skills') or AI agent
+                profiles ('name', 'description', 'capabilities'); skills can
+                be a list or a dict of lists, as returned by SkillExtractor
+            kind: 'human' or 'ai'
+            vocabulary: Vocabulary to intern skills into (default a new one)
+        """
+        vocabulary = vocabulary if vocabulary is not None else SkillVocabulary()
+        text, skills_key = (human_text, 'skills') if kind == 'human' else (ai_text, 'capabilities')
+        names, texts = [], []
+        skill_indptr, skill_ids = [0], []
+        domain_indptr, domain_ids = [0], []
+        for profile in profiles:
+            names.append(sys.intern(str(profile['name'])))
+            texts.append(text(profile))
+            skills = profile[skills_key]
+            skill_ids.extend(sorted({vocabulary.intern(normalize_skill(s))
+                                     for s in flatten_skills(skills)}))
+            skill_indptr.append(len(skill_ids))
+            domain_ids.extend(sorted({vocabulary.intern(normalize_skill(s))
+                                      for s in domain_skills(skills)}))
+            domain_indptr.append(len(domain_ids))
+        return cls(kind, names, texts, vocabulary,
+                   np.asarray(skill_indptr, dtype=np.int64), np.asarray(skill_ids, dtype=np.int32),
+                   np.asarray(domain_indptr, dtype=np.int64), np.asarray(domain_ids, dtype=np.int32))
+
+    @classmethod
+    def coerce(cls, profiles: Union['ProfileStore', Iterable[Dict]],
+               kind: str = 'human') -> 'ProfileStore':
+        """Return profiles unchanged if they already are a store, else parse them."""
+        if isinstance(profiles, ProfileStore):
+            return profiles
+        return cls.from_profiles(profiles, kind)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> ProfileRecord:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return ProfileRecord(self, index % len(self))
+
+    def __iter__(self) -> Iterator[ProfileRecord]:
+        return (ProfileRecord(self, i) for i in range(len(self)))
+
+    def _build_name_rows(self):
+        # First row of every name; names used more than once also get a list of all rows
+        self._name_rows = {}
+        self._duplicate_rows = {}
+        for i, name in enumerate(self.names):
+            first = self._name_rows.setdefault(name, i)
+            if first != i:
+                self._duplicate_rows.setdefault(name, [first]).append(i)
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Row of the first profile with this name, or None."""
+        if self._name_rows is None:
+            self._build_name_rows()
+        return self._name_rows.get(name)
+
+    def rows_named(self, name: str) -> List[int]:
+        """Rows of every profile with this name, in order."""
+        first = self.index_of(name)
+        if first is None:
+            return []
+        return self._duplicate_rows.get(name, [first])
+
+    def skills_of(self, index: int) -> List[str]:
+        """Normalised skills of one profile."""
+        return self._skill_names(self.skill_indptr, self.skill_ids, index)
+
+    def _skill_names(self, indptr: np.ndarray, ids: np.ndarray, index: int) -> List[str]:
+        return [self.vocabulary.skills[skill_id]
+                for skill_id in ids[indptr[index]:indptr[index + 1]].tolist()]
+
+    @property
+    def skill_rows(self) -> np.ndarray:
+        """Row of every entry of skill_ids."""
+        return np.repeat(np.arange(len(self)), np.diff(self.skill_indptr))
+
+    @property
+    def keys(self) -> List[str]:
+        """Content hash of every profile; it changes whenever its name, text or skills change."""
+        if self._keys is None:
+            skills = self.vocabulary.skills
+            skill_indptr, skill_ids = self.skill_indptr.tolist(), self.skill_ids.tolist()
+            domain_indptr, domain_ids = self.domain_indptr.tolist(), self.domain_ids.tolist()
+
+            def joined(indptr: List[int], ids: List[int], i: int) -> str:
+                return '\x1e'.join(sorted(skills[s] for s in ids[indptr[i]:indptr[i + 1]]))
+
+            self._keys = [
+                hashlib.blake2b('\x1f'.join([
+                    name, text, joined(skill_indptr, skill_ids, i),
+                    joined(domain_indptr, domain_ids, i)
+                ]).encode('utf-8'), digest_size=16).hexdigest()
+                for i, (name, text) in enumerate(zip(self.names, self.texts))]
+        return self._keys
+
+    def take(self, rows) -> 'ProfileStore':
+        """Subset of the store, in the order given by rows; the vocabulary is shared."""
+        if isinstance(rows, slice):
+            rows = np.arange(len(self))[rows]
+        rows = np.asarray(rows, dtype=np.int64)
+        skill_indptr, skill_ids = _take_rows(self.skill_indptr, self.skill_ids, rows)
+        domain_indptr, domain_ids = _take_rows(self.domain_indptr, self.domain_ids, rows)
+        store = ProfileStore(self.kind, [self.names[i] for i in rows.tolist()],
+                             [self.texts[i] for i in rows.tolist()], self.vocabulary,
+                             skill_indptr, skill_ids, domain_indptr, domain_ids)
+        if self._keys is not None:
+            store._keys = [self._keys[i] for i in rows.tolist()]
+        return store
+
+    def used_skills(self) -> Tuple[sparse.csr_matrix, List[str]]:
+        """Binary profile x skill matrix over only the skills the store uses, and those skills."""
+        if self._used_skills is None:
+            used, inverse = np.unique(self.skill_ids, return_inverse=True)
+            matrix = sparse.csr_matrix(
+                (np.ones(len(inverse), dtype=np.float64), inverse.astype(np.int32),
+                 self.skill_indptr),
+                shape=(len(self), len(used)))
+            self._used_skills = matrix, [self.vocabulary.skills[skill_id]
+                                         for skill_id in used.tolist()]
+        return self._used_skills
+
+    def incidence(self, vocabulary: SkillVocabulary, domains: bool = False,
+                  grow: bool = True) -> sparse.csr_matrix:
+        """
+        Binary profile x skill CSR matrix over another vocabulary.
+
+        Only the skills the store actually uses are translated; with
+        grow=False skills unknown to vocabulary get columns past its end, as
+        in SkillVocabulary.incidence_matrix.
+        """
+        indptr, ids = (self.domain_indptr, self.domain_ids) if domains else \
+            (self.skill_indptr, self.skill_ids)
+        used, inverse = np.unique(ids, return_inverse=True)
+        columns = vocabulary.translate(
+            [self.vocabulary.skills[skill_id] for skill_id in used.tolist()], grow)[inverse]
+        n_cols = max(len(vocabulary), int(columns.max()) + 1 if len(columns) else 0)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.float64), columns.astype(np.int32), indptr),
+            shape=(len(self), n_cols))
+        matrix.sort_indices()
+        return matrix
+
+
+def _take_rows(indptr: np.ndarray, ids: np.ndarray, rows: np.ndarray):
+    """Gather the CSR rows of (indptr, ids) in the given order."""
+    lengths = np.diff(indptr)[rows]
+    new_indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_indptr[1:])
+    # Position of every gathered entry in the source ids
+    offsets = np.repeat(indptr[rows] - new_indptr[:-1], lengths)
+    return new_indptr, ids[np.arange(new_indptr[-1]) + offsets]
@@ -0,0 +1,136 @@
+import tempfile
+from typing import Dict, Union
+
+import numpy as np
+
+PRECISIONS = ('float32', 'float16', 'int8')
+
+
+class QuantizedMatrix:
+    """
+    Row-normalised embeddings stored at reduced precision.
+
+    float16 halves the memory of float32 vectors. int8 quarters it by storing
+    each row as round(x / scale) with one float32 scale per row, where scale
+    is the row's largest absolute value / 127. Scoring dequantizes one block
+    of rows at a time, so the full float32 matrix is never materialised.
+    """
+
+    def __init__(self, values: np.ndarray, scales: np.ndarray = None):
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, precision: str) -> 'QuantizedMatrix':
+        if precision == 'float16':
+            return cls(matrix.astype(np.float16))
+        if precision == 'int8':
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            values = np.rint(matrix / scales[:, np.newaxis]).astype(np.int8)
+            return cls(values, scales.astype(np.float32))
+        raise ValueError(f"Unknown quantized precision: {precision}")
+
+    @property
+    def precision(self) -> str:
+        return 'int8' if self.values.dtype == np.int8 else 'float16'
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, rows) -> 'QuantizedMatrix':
+        return QuantizedMatrix(
+            self.values[rows], self.scales[rows] if self.scales is not None else None)
+
+    def dequantize(self) -> np.ndarray:
+        values = self.values.astype(np.float32)
+        if self.scales is not None:
+            values *= self.scales[:, np.newaxis]
+        return values
+
+    def dot(self, queries: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+        """queries @ self.T in float32, dequantizing block_rows stored rows at a time."""
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), block_rows):
+            block = self.values[start:start + block_rows].astype(np.float32)
+            block_scores = queries @ block.T
+            if self.scales is not None:
+                # The scale is per stored row, so apply it to the scores, not the block
+                block_scores *= self.scales[start:start + block_rows]
+            scores[:, start:start + block_rows] = block_scores
+        return scores
+
+
+Embeddings = Union[np.ndarray, QuantizedMatrix]
+
+
+def similarity(queries: np.ndarray, embeddings: Embeddings) -> np.ndarray:
+    """Inner products of every query with every row of a float or quantized matrix."""
+    if isinstance(embeddings, QuantizedMatrix):
+        return embeddings.dot(queries)
+    return queries @ embeddings.T
+
+
+def quantize(matrix: np.ndarray, precision: str = 'float32') -> Embeddings:
+    """Quantize a float32 matrix, or return it unchanged for precision 'float32'."""
+    if precision == 'float32':
+        return matrix
+    return QuantizedMatrix.quantize(matrix, precision)
+
+
+def disk_backed(matrix: np.ndarray) -> np.ndarray:
+    """
+    Copy a float32 matrix to an anonymous temporary file and memory-map it.
+
+    Keeps exact rows for rescoring a quantized catalog without holding them
+    in memory; the file is deleted as soon as the mapping is dropped.
+    """
+    if matrix.size == 0:
+        return np.asarray(matrix, dtype=np.float32)  # Empty files cannot be mapped
+    with tempfile.TemporaryFile() as f:
+        mapped = np.memmap(f, dtype=np.float32, mode='w+', shape=matrix.shape)
+    mapped[:] = matrix
+    return mapped
+
+
+def accuracy_report(embeddings: np.ndarray, queries: np.ndarray, precision: str,
+                    k: int = 10) -> Dict[str, float]:
+    """
+    Compare quantized inner-product scores with exact float32 ones.
+
+    Args:
+        embeddings: Row-normalised float32 matrix to quantize (e.g. the AI catalog)
+        queries: Row-normalised float32 queries (e.g. human embeddings)
+        precision: 'float16' or 'int8'
+        k: Cut-off for the top-k recall
+
+    Returns:
+        Memory of both representations, the maximum and mean absolute score
+        error, and the share of exact top-k rows also in the quantized top-k
+    """
+    quantized = QuantizedMatrix.quantize(embeddings, precision)
+    exact = queries @ embeddings.T
+    approximate = quantized.dot(queries)
+    error = np.abs(exact - approximate)
+    k = min(k, exact.shape[1])
+    exact_top = np.argsort(-exact, axis=1, kind='stable')[:, :k]
+    approximate_top = np.argsort(-approximate, axis=1, kind='stable')[:, :k]
+    hits = sum(len(set(a) & set(b)) for a, b in zip(exact_top.tolist(), approximate_top.tolist()))
+    return {
+        'precision': precision,
+        'float32_bytes': int(embeddings.nbytes),
+        'quantized_bytes': int(quantized.nbytes),
+        'compression': embeddings.nbytes / quantized.nbytes if quantized.nbytes else 1.0,
+        'max_abs_error': float(error.max()) if error.size else 0.0,
+        'mean_abs_error': float(error.mean()) if error.size else 0.0,
+        'recall_at_k': hits / exact_top.size if exact_top.size else 1.0
+    }
@@ -0,0 +1,359 @@
+"""
+Local HTTP/JSON matching service with dynamic batching of embeddings.
+
+Texts from concurrent requests are collected for a short window and
+embedded together in one model.encode call, so one loaded model serves many
+clients. A bounded queue applies backpressure: when it is full, requests are
+rejected with 503 instead of piling up. Matcher work runs on a small pool of
+worker threads that share the thread-safe matcher core; every request gets
+its own MatchSession.
+
+    python service.py --port 8765 --ais agents.jsonl
+
+Endpoints:
+    POST /match        {"humans": [...], "ais": [...], "weights": {...}, "top_k": 5}
+    POST /match_top_k  {"humans": [...], "k": 5, "weights": {...}}  (needs --ais or --snapshot)
+    GET  /metrics      latency percentiles, batch sizes, queue depth and counters
+    GET  /health
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from batch_match import iter_profiles
+from encoders import create_encoder
+from feedback_store import feedback_store_from_env
+from matcher import ExpertMatcher
+from snapshot import load_index
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class Overloaded(Exception):
+    """Raised when the embedding queue is full."""
+
+
+class RequestError(Exception):
+    """A client error, reported with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    """Rolling latency and batch-size samples plus request counters."""
+
+    def __init__(self, window: int = 10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.counters = {'requests': 0, 'rejected': 0, 'errors': 0, 'batches': 0, 'texts': 0}
+
+    def snapshot(self, queue_depth: int) -> Dict:
+        latencies = np.array(self.latencies) * 1000
+        batch_sizes = np.array(self.batch_sizes)
+        return {
+            **self.counters,
+            'queue_depth': queue_depth,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if latencies.size else None,
+                'p99': float(np.percentile(latencies, 99)) if latencies.size else None,
+                'max': float(latencies.max()) if latencies.size else None
+            },
+            'batch_size': {
+                'mean': float(batch_sizes.mean()) if batch_sizes.size else None,
+                'p50': float(np.percentile(batch_sizes, 50)) if batch_sizes.size else None,
+                'max': int(batch_sizes.max()) if batch_sizes.size else None
+            }
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce embedding requests into shared encode batches.
+
+    The first queued request opens a batch; requests arriving within
+    window_seconds (up to max_batch texts) join it. The whole batch goes
+    through matcher._get_embeddings once, which also stores the vectors in
+    the embedding cache, so the matching that follows only reads the cache.
+    """
+
+    def __init__(self, matcher: ExpertMatcher, executor: ThreadPoolExecutor, metrics: Metrics,
+                 window_seconds: float = 0.005, max_batch: int = 256, max_queue: int = 1024):
+        self.matcher = matcher
+        self.executor = executor
+        self.metrics = metrics
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def embed(self, texts: List[str]):
+        """Wait until texts are embedded (and cached) as part of a shared batch."""
+        if not texts:
+            return
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((texts, future))
+        except asyncio.QueueFull:
+            raise Overloaded(f"Embedding queue is full ({self.queue.maxsize} requests)")
+        await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.window_seconds
+        while size < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = list(dict.fromkeys(text for item_texts, _ in batch for text in item_texts))
+            self.metrics.counters['batches'] += 1
+            self.metrics.counters['texts'] += len(texts)
+            self.metrics.batch_sizes.append(len(texts))
+            try:
+                await loop.run_in_executor(self.executor, self.matcher._get_embeddings, texts)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+class MatchingService:
+    """Request handlers and the HTTP/1.1 connection loop."""
+
+    MAX_BODY = 16 * 1024 * 1024
+
+    def __init__(self, matcher: ExpertMatcher, window_seconds: float = 0.005,
+                 max_batch: int = 256, max_queue: int = 1024, workers: int = 4):
+        self.matcher = matcher
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='matcher')
+        self.batcher_options = dict(window_seconds=window_seconds, max_batch=max_batch,
+                                    max_queue=max_queue)
+        self.batcher = None
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self.batcher = MicroBatcher(self.matcher, self.executor, self.metrics,
+                                    **self.batcher_options)
+        self.batcher.start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def close(self):
+        if self.batcher is not None:
+            await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    async def _run_matcher(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    @staticmethod
+    def _profiles(body: Dict, key: str) -> List[Dict]:
+        profiles = body.get(key)
+        if not isinstance(profiles, list):
+            raise RequestError(400, f"'{key}' must be a list of profiles")
+        return profiles
+
+    @staticmethod
+    def _weights(body: Dict) -> Dict[str, float]:
+        """Request weights over ExpertMatcher.DEFAULT_WEIGHTS, so partial weights are valid."""
+        weights = body.get('weights') or {}
+        if not isinstance(weights, dict) or not all(
+                name in ExpertMatcher.DEFAULT_WEIGHTS and isinstance(value, (int, float))
+                for name, value in weights.items()):
+            raise RequestError(400, "'weights' must map any of "
+                                    f"{', '.join(ExpertMatcher.DEFAULT_WEIGHTS)} to numbers")
+        return {**ExpertMatcher.DEFAULT_WEIGHTS, **weights}
+
+    async def match(self, body: Dict) -> Dict:
+        humans = self._profiles(body, 'humans')
+        ais = self._profiles(body, 'ais')
+        weights = self._weights(body)
+        top_k = body.get('top_k')
+        if top_k is not None and (not isinstance(top_k, int) or top_k < 0):
+            raise RequestError(400, "'top_k' must be a non-negative integer")
+        await self.batcher.embed([ExpertMatcher._human_text(h) for h in humans] +
+                                 [ExpertMatcher._ai_text(a) for a in ais])
+        matches = await self._run_matcher(
+            self.matcher.session().match_experts, humans, ais, weights)
+        if top_k is not None:
+            # Each human's matches come best first
+            matches = matches.take(np.flatnonzero(matches.ranks() < top_k))
+        return {'matches': matches.to_dicts()}
+
+    async def match_top_k(self, body: Dict) -> Dict:
+        if self.matcher.catalog_index is None:
+            raise RequestError(
+                400, "No AI catalog indexed; start the service with --ais or --snapshot")
+        humans = self._profiles(body, 'humans')
+        await self.batcher.embed([ExpertMatcher._human_text(h) for h in humans])
+        matches = await self._run_matcher(
+            self.matcher.session().match_top_k, humans, body.get('k', 5), self._weights(body))
+        return {'matches': matches.to_dicts()}
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        routes = {('POST', '/match'): self.match, ('POST', '/match_top_k'): self.match_top_k}
+        if (method, path) == ('GET', '/health'):
+            return 200, {'status': 'ok', 'model_loaded': self.matcher.model_loaded}
+        if (method, path) == ('GET', '/metrics'):
+            return 200, self.metrics.snapshot(self.batcher.queue.qsize())
+        handler = routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in routes):
+                return 405, {'error': f"{method} not allowed on {path}"}
+            return 404, {'error': f"Unknown path {path}"}
+
+        start = time.perf_counter()
+        self.metrics.counters['requests'] += 1
+        try:
+            try:
+                payload = json.loads(body or b'{}')
+            except json.JSONDecodeError as error:
+                raise RequestError(400, f"Invalid JSON: {error}")
+            if not isinstance(payload, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+            result = await handler(payload)
+        except Overloaded as error:
+            self.metrics.counters['rejected'] += 1
+            return 503, {'error': str(error)}
+        except RequestError as error:
+            self.metrics.counters['errors'] += 1
+            return error.status, {'error': str(error)}
+        except (KeyError, TypeError, ValueError) as error:
+            self.metrics.counters['errors'] += 1
+            return 400, {'error': f"Invalid request: {error!r}"}
+        except Exception as error:
+            self.metrics.counters['errors'] += 1
+            return 500, {'error': f"{type(error).__name__}: {error}"}
+        self.metrics.latencies.append(time.perf_counter() - start)
+        return 200, result
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if length > self.MAX_BODY:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                status, payload = await self.dispatch(method, path.split('?', 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict,
+                       keep_alive: bool):
+        body = json.dumps(payload).encode('utf-8')
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            'Content-Type: application/json',
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        if status == 503:
+            headers.append('Retry-After: 1')
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve expert matching over HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ais', help='AI catalog to index for /match_top_k (.jsonl or .json)')
+    parser.add_argument('--snapshot', help='Load the /match_top_k catalog from a snapshot instead')
+    parser.add_argument('--batch-window-ms', type=float, default=5.0,
+                        help='How long a batch waits for more requests')
+    parser.add_argument('--max-batch', type=int, default=256, help='Texts per encode batch')
+    parser.add_argument('--max-queue', type=int, default=1024,
+                        help='Queued requests before new ones are rejected with 503')
+    parser.add_argument('--workers', type=int, default=4, help='Matcher worker threads')
+    return parser.parse_args(argv)
+
+
+async def serve(args: argparse.Namespace):
+    matcher = ExpertMatcher(
+        feedback_store=feedback_store_from_env(),
+        encoder=create_encoder(os.environ.get('INTELLIBRIDGE_ENCODER', 'sentence-transformers')))
+    if args.snapshot:
+        load_index(matcher, args.snapshot)
+    elif args.ais:
+        matcher.build_index(list(iter_profiles(args.ais, 'ai_profiles')))
+    service = MatchingService(matcher, args.batch_window_ms / 1000, args.max_batch,
+                              args.max_queue, args.workers)
+    server = await service.start(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv: List[str] = None):
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+def flatten_skills(skills) -> set:
+    """Flatten a list or a dict of lists of skills into a set."""
+    if isinstance(skills, dict):
+        result = set()
+        for v in skills.values():
+            result.update(v)
+        return result
+    elif isinstance(skills, list):
+        return set(skills)
+    else:
+        return set()
+
+
+def domain_skills(skills) -> set:
+    """Skills used for domain alignment: the whole list, or the 'domains' entry of a dict."""
+    return set(skills) if isinstance(skills, list) else set(skills.get('domains', []))
+
+
+class SkillVocabulary:
+    """Interns skill strings to consecutive integer ids."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.skills: List[str] = []
+
+    def intern(self, skill: str) -> int:
+        """Return the id of a skill, assigning the next free id if it is new."""
+        skill_id = self.ids.get(skill)
+        if skill_id is None:
+            skill_id = len(self.skills)
+            self.ids[skill] = skill_id
+            self.skills.append(skill)
+        return skill_id
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def translate(self, skills: List[str], grow: bool = True) -> np.ndarray:
+        """
+        Ids of skills in this vocabulary.
+
+        With grow=False the vocabulary is left untouched and unseen skills get
+        distinct ids past its end, as in incidence_matrix.
+        """
+        if grow:
+            return np.array([self.intern(skill) for skill in skills], dtype=np.int64)
+        unseen = {}
+        return np.array([
+            self.ids[skill] if skill in self.ids
+            else len(self.skills) + unseen.setdefault(skill, len(unseen))
+            for skill in skills], dtype=np.int64)
+
+    def incidence_matrix(self, skill_sets: Iterable[set], grow: bool = True) -> sparse.csr_matrix:
+        """
+        Build a binary profile x skill CSR matrix.
+
+        With grow=False the vocabulary is left untouched: unseen skills get
+        columns past the end of the vocabulary, so they still count towards set
+        sizes but never overlap a matrix built from the vocabulary itself.
+        """
+        unseen = {}
+        indptr = [0]
+        indices = []
+        for skill_set in skill_sets:
+            row = []
+            for skill in skill_set:
+                if grow:
+                    row.append(self.intern(skill))
+                else:
+                    skill_id = self.ids.get(skill)
+                    if skill_id is None:
+                        skill_id = len(self.skills) + unseen.setdefault(skill, len(unseen))
+                    row.append(skill_id)
+            indices.extend(sorted(row))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self) + len(unseen)))
+
+
+class SkillEmbeddings:
+    """
+    Unit-length embedding of every skill string seen so far, as one growing matrix.
+
+    Each distinct skill is encoded exactly once: lookups gather rows of the
+    matrix, and skills not seen before are encoded together in a single call.
+    Lookups hold a lock, so threads can share one instance.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray]):
+        self.encode = encode
+        self.ids: Dict[str, int] = {}
+        self.matrix = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vectors(self, skills: List[str]) -> np.ndarray:
+        """Normalised embeddings of skills, one row per skill."""
+        with self._lock:
+            missing = [skill for skill in dict.fromkeys(skills) if skill not in self.ids]
+            if missing:
+                encoded = np.asarray(self.encode(missing), dtype=np.float32)
+                norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                encoded /= norms
+                self.matrix = encoded if self.matrix is None else \
+                    np.vstack([self.matrix, encoded])
+                for skill in missing:
+                    self.ids[skill] = len(self.ids)
+            if not skills:
+                return np.zeros((0, 0 if self.matrix is None else self.matrix.shape[1]),
+                                dtype=np.float32)
+            return self.matrix[[self.ids[skill] for skill in skills]]
+
+    def similarity(self, left: List[str], right: List[str], threshold: float) -> np.ndarray:
+        """
+        Cosine similarity of every left/right skill pair, set to 0 below threshold.
+
+        Identical strings always score 1.0.
+        """
+        similarity = self.vectors(left) @ self.vectors(right).T
+        np.clip(similarity, 0.0, 1.0, out=similarity)
+        similarity[similarity < threshold] = 0.0
+        right_columns = {skill: j for j, skill in enumerate(right)}
+        for i, skill in enumerate(left):
+            j = right_columns.get(skill)
+            if j is not None:
+                similarity[i, j] = 1.0
+        return similarity
+
+
+def _pad_columns(matrix: sparse.csr_matrix, n_cols: int) -> sparse.csr_matrix:
+    """Widen an incidence matrix built before later skills were interned."""
+    return sparse.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], n_cols))
+
+
+def intersection_union(left: sparse.csr_matrix,
+                       right: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    """Intersection and union sizes of every left/right row pair of two incidence matrices."""
+    n_cols = max(left.shape[1], right.shape[1])
+    left, right = _pad_columns(left, n_cols), _pad_columns(right, n_cols)
+    intersection = (left @ right.T).toarray()
+    left_sizes = np.asarray(left.sum(axis=1)).reshape(-1, 1)
+    right_sizes = np.asarray(right.sum(axis=1)).reshape(1, -1)
+    union = left_sizes + right_sizes - intersection
+    return intersection, union
+
+
+def complementarity_matrix(human_incidence: sparse.csr_matrix,
+                           ai_incidence: sparse.csr_matrix) -> np.ndarray:
+    """1 - Jaccard similarity for every human/AI pair; 0.0 when both skill sets are empty."""
+    intersection, union = intersection_union(human_incidence, ai_incidence)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        complementarity = 1 - intersection / union
+    complementarity[union == 0] = 0.0
+    return complementarity
+
+
+def domain_alignment_matrix(human_incidence: sparse.csr_matrix,
+                            ai_incidence: sparse.csr_matrix) -> np.ndarray:
+    """Jaccard similarity of the domain sets of every human/AI pair."""
+    intersection, union = intersection_union(human_incidence, ai_incidence)
+    return intersection / np.maximum(union, 1)
+
+
+def _best_matches(similarity: np.ndarray, rows: sparse.csr_matrix,
+                  block_entries: int = 1 << 22) -> np.ndarray:
+    """
+    Best similarity of every skill (row of similarity) to any skill of each row of rows.
+
+    Returns an L x n matrix for an L x R similarity matrix and an n x R
+    incidence matrix; profiles without skills get 0. Rows are processed in
+    blocks so the gathered L x nnz matrix stays below block_entries values.
+    """
+    best = np.zeros((similarity.shape[0], rows.shape[0]), dtype=similarity.dtype)
+    sizes = np.diff(rows.indptr)
+    step = max(1, block_entries // max(similarity.shape[0], 1))
+    start = 0
+    while start < rows.shape[0]:
+        # Grow the block until it holds about step entries
+        stop = max(int(np.searchsorted(rows.indptr, rows.indptr[start] + step, side='right')) - 1,
+                   start + 1)
+        stop = min(stop, rows.shape[0])
+        nonempty = start + np.flatnonzero(sizes[start:stop])
+        if len(nonempty):
+            offset = rows.indptr[start]
+            gathered = similarity[:, rows.indices[offset:rows.indptr[stop]]]
+            # Skipping empty rows makes every segment exactly one row's skills
+            best[:, nonempty] = np.maximum.reduceat(
+                gathered, rows.indptr[nonempty] - offset, axis=1)
+        start = stop
+    return best
+
+
+def soft_jaccard_matrix(left_incidence: sparse.csr_matrix, right_incidence: sparse.csr_matrix,
+                        similarity: np.ndarray) -> np.ndarray:
+    """
+    Soft Jaccard similarity of the skill sets of every left/right row pair.
+
+    similarity holds the (thresholded) similarity of every left skill to
+    every right skill, over the columns of the two incidence matrices. Each
+    skill is matched to its most similar skill in the other set; the soft
+    intersection is the mean of the two directions' summed best matches and
+    the soft union is |A| + |B| minus it. With exact-match similarity this is
+    the ordinary Jaccard similarity. Both directions cost one sparse-dense
+    product per batch.
+    """
+    left_best = _best_matches(similarity, right_incidence)
+    right_best = _best_matches(np.ascontiguousarray(similarity.T), left_incidence)
+    intersection = (np.asarray(left_incidence @ left_best, dtype=np.float64) +
+                    np.asarray(right_incidence @ right_best, dtype=np.float64).T) / 2
+    left_sizes = np.diff(left_incidence.indptr).reshape(-1, 1)
+    right_sizes = np.diff(right_incidence.indptr).reshape(1, -1)
+    union = left_sizes + right_sizes - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
@@ -0,0 +1,422 @@
+"""
+Versioned, memory-mapped snapshots of an indexed AI catalog.
+
+build_index embeds every AI profile, parses its skills and trains the
+vector index on every start. A snapshot keeps that work on disk: the
+normalised float32 embeddings, the skill and domain ids of every profile
+with their row offsets, and the IVF centroids and list assignment are .npy
+files, and names, texts and the skill vocabulary are JSON. Loading
+memory-maps the arrays, so a restart takes milliseconds instead of a full
+re-embedding, and pages are only read when they are used.
+
+Every change writes a new version directory and then points CURRENT at it,
+so readers never see a half-written snapshot; files a change leaves alone
+are hard-linked from the previous version. Added profiles are appended
+(only they are embedded), removed ones are tombstoned, and compaction
+rewrites the arrays without the tombstoned rows. The encoder name, class
+and settings and the embedding dimension are stored as a fingerprint, so a
+snapshot is never used by a matcher that would embed queries differently. Only one process
+should write to a snapshot at a time.
+
+    python snapshot.py build --ais agents.jsonl --snapshot catalog.snapshot --index ivf
+    python snapshot.py add --ais new_agents.jsonl --snapshot catalog.snapshot
+    python snapshot.py remove --names "Agent A" "Agent B" --snapshot catalog.snapshot
+    python batch_match.py --humans experts.jsonl --snapshot catalog.snapshot
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from batch_match import iter_profiles
+from encoders import Encoder, create_encoder
+from feedback_store import feedback_store_from_env
+from matcher import CompiledProfiles, ExpertMatcher, Profiles
+from profile_store import ProfileStore
+from skill_matrix import SkillVocabulary
+from vector_index import VectorIndex
+
+FORMAT_VERSION = 1
+ARRAYS = ('embeddings', 'skill_indptr', 'skill_ids', 'domain_indptr', 'domain_ids',
+          'deleted', 'centroids', 'assignment')
+# Previous versions kept next to the current one, for readers that opened them
+KEEP_VERSIONS = 1
+# Removing profiles compacts the snapshot once this share of its rows is tombstoned
+COMPACT_DELETED = 0.25
+
+_VERSION_DIR = re.compile(r'^v(\d{6})$')
+
+
+def _current_version(path: str) -> int:
+    """Version CURRENT points at, or 0 if the snapshot does not exist yet."""
+    try:
+        with open(os.path.join(path, 'CURRENT'), 'r') as f:
+            return int(f.read().strip())
+    except FileNotFoundError:
+        return 0
+
+
+def _link(source: str, target: str):
+    """Hard-link an unchanged file into a new version, copying where links are unsupported."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _incidence(indptr: np.ndarray, ids: np.ndarray, n_skills: int) -> sparse.csr_matrix:
+    """Binary profile x skill matrix straight from a store's (already sorted) skill ids."""
+    return sparse.csr_matrix((np.ones(len(ids), dtype=np.float64), ids, indptr),
+                             shape=(len(indptr) - 1, n_skills))
+
+
+def _embed(matcher: ExpertMatcher, texts: List[str]) -> np.ndarray:
+    return matcher._normalize_rows(matcher._get_embeddings(texts)).astype(np.float32, copy=False)
+
+
+def _fingerprint(matcher: ExpertMatcher) -> Dict:
+    """Name, class and settings of the encoder matcher embeds texts with, as stored in JSON."""
+    encoder = matcher._model
+    config = encoder.config if isinstance(encoder, Encoder) else {}
+    return {'model_name': matcher.model_name, 'encoder': type(encoder).__name__,
+            'encoder_config': json.loads(json.dumps(config))}
+
+
+class CatalogSnapshot:
+    """
+    One version of a catalog snapshot, with its arrays memory-mapped.
+
+    Snapshots are immutable: add, remove and compact write a new version and
+    return it, while this object keeps reading the version it was opened at.
+    """
+
+    def __init__(self, path: str, version: int, manifest: Dict, profiles: Dict,
+                 arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.version = version
+        self.manifest = manifest
+        self.names: List[str] = profiles['names']
+        self.texts: List[str] = profiles['texts']
+        self.skills: List[str] = profiles['skills']
+        self.arrays = arrays
+
+    @classmethod
+    def open(cls, path: str, version: int = None) -> 'CatalogSnapshot':
+        """Memory-map a version of the snapshot at path (default the current one)."""
+        version = version or _current_version(path)
+        if not version:
+            raise FileNotFoundError(f"No catalog snapshot at {path}")
+        directory = os.path.join(path, f'v{version:06d}')
+        with open(os.path.join(directory, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog snapshot format {manifest.get('format')} "
+                             f"in {directory}; rebuild it")
+        with open(os.path.join(directory, 'profiles.json'), 'r') as f:
+            profiles = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                  for name in ARRAYS}
+        return cls(path, version, manifest, profiles, arrays)
+
+    @classmethod
+    def build(cls, path: str, matcher: ExpertMatcher, ai_profiles: Profiles,
+              mode: str = 'exact', n_lists: int = None, n_probe: int = 8) -> 'CatalogSnapshot':
+        """
+        Embed and index an AI catalog and write it as a new version at path.
+
+        Args:
+            path: Snapshot directory; an existing snapshot gets a new version
+            matcher: Matcher whose encoder embeds the profiles
+            ai_profiles: AI agent profiles, as a ProfileStore or a list of dicts
+            mode, n_lists, n_probe: Index options, as in ExpertMatcher.build_index
+        """
+        store = ProfileStore.coerce(ai_profiles, 'ai')
+        if not len(store):
+            raise ValueError("Cannot snapshot an empty AI catalog")
+        embeddings = _embed(matcher, store.texts)
+        index = VectorIndex(embeddings, mode=mode, n_lists=n_lists, n_probe=n_probe)
+        manifest = {'format': FORMAT_VERSION, **_fingerprint(matcher),
+                    'dim': int(embeddings.shape[1]), 'mode': mode, 'n_probe': n_probe}
+        centroids = index.centroids if index.centroids is not None else \
+            np.zeros((0, embeddings.shape[1]), dtype=np.float32)
+        arrays = {
+            'embeddings': embeddings,
+            'skill_indptr': store.skill_indptr, 'skill_ids': store.skill_ids,
+            'domain_indptr': store.domain_indptr, 'domain_ids': store.domain_ids,
+            'deleted': np.zeros(len(store), dtype=bool),
+            'centroids': centroids.astype(np.float32), 'assignment': index.assignment
+        }
+        profiles = {'names': list(store.names), 'texts': list(store.texts),
+                    'skills': list(store.vocabulary.skills)}
+        return cls._write(path, _current_version(path) + 1, manifest, profiles, arrays)
+
+    @classmethod
+    def _write(cls, path: str, version: int, manifest: Dict, profiles: Dict,
+               arrays: Dict[str, np.ndarray], previous: str = None) -> 'CatalogSnapshot':
+        """
+        Write a version and make it current.
+
+        Arrays missing from arrays, and the profiles when profiles is None,
+        are hard-linked from the previous version directory.
+        """
+        directory = os.path.join(path, f'v{version:06d}')
+        tmp_directory = f"{directory}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        for name in ARRAYS:
+            target = os.path.join(tmp_directory, f'{name}.npy')
+            if name in arrays:
+                np.save(target, np.ascontiguousarray(arrays[name]))
+            else:
+                _link(os.path.join(previous, f'{name}.npy'), target)
+        profiles_file = os.path.join(tmp_directory, 'profiles.json')
+        if profiles is None:
+            _link(os.path.join(previous, 'profiles.json'), profiles_file)
+        else:
+            with open(profiles_file, 'w') as f:
+                json.dump(profiles, f)
+        deleted = arrays['deleted'] if 'deleted' in arrays else \
+            np.load(os.path.join(previous, 'deleted.npy'), mmap_mode='r')
+        with open(os.path.join(tmp_directory, 'manifest.json'), 'w') as f:
+            json.dump({**manifest, 'version': version, 'created': datetime.now().isoformat(),
+                       'rows': len(deleted), 'deleted': int(np.count_nonzero(deleted))}, f)
+        os.replace(tmp_directory, directory)
+
+        tmp_file = os.path.join(path, 'CURRENT.tmp')
+        with open(tmp_file, 'w') as f:
+            f.write(str(version))
+        os.replace(tmp_file, os.path.join(path, 'CURRENT'))
+        for entry in os.listdir(path):
+            match = _VERSION_DIR.match(entry)
+            if match and int(match.group(1)) < version - KEEP_VERSIONS:
+                shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+        return cls.open(path, version)
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(self.path, f'v{self.version:06d}')
+
+    @property
+    def deleted(self) -> np.ndarray:
+        """Tombstone of every stored row."""
+        return self.arrays['deleted']
+
+    def __len__(self) -> int:
+        """Number of live (not removed) profiles."""
+        return len(self.names) - int(np.count_nonzero(self.deleted))
+
+    def check(self, matcher: ExpertMatcher):
+        """
+        Raise ValueError unless matcher embeds queries the way this snapshot was built.
+
+        The encoder's name, class and settings must match the manifest, and
+        so must the dimension of its vectors. Encoders whose settings do not
+        include dim embed the first stored text to find it, which the
+        embedding cache usually already holds from the build.
+        """
+        current = _fingerprint(matcher)
+        if all(current[key] == self.manifest.get(key) for key in current):
+            current['dim'] = current['encoder_config'].get('dim') or \
+                int(_embed(matcher, self.texts[:1]).shape[1])
+        else:
+            current['dim'] = self.manifest.get('dim')
+        differing = [key for key in current if current[key] != self.manifest.get(key)]
+        if differing:
+            built = ', '.join(f"{key}={self.manifest.get(key)}" for key in differing)
+            wanted = ', '.join(f"{key}={current[key]}" for key in differing)
+            raise ValueError(f"Catalog snapshot {self.path} was built with {built}, "
+                             f"not {wanted}; rebuild it with snapshot.py build")
+
+    def vocabulary(self) -> SkillVocabulary:
+        """A new vocabulary holding the snapshot's skills at their stored ids."""
+        vocabulary = SkillVocabulary()
+        vocabulary.skills = list(self.skills)
+        vocabulary.ids = {skill: i for i, skill in enumerate(vocabulary.skills)}
+        return vocabulary
+
+    def _store(self, vocabulary: SkillVocabulary) -> ProfileStore:
+        """Every stored row, tombstoned ones included, as a ProfileStore."""
+        arrays = self.arrays
+        return ProfileStore('ai', self.names, self.texts, vocabulary,
+                            arrays['skill_indptr'], arrays['skill_ids'],
+                            arrays['domain_indptr'], arrays['domain_ids'])
+
+    def catalog(self, n_probe: int = None) -> Tuple[CompiledProfiles, VectorIndex,
+                                                    SkillVocabulary]:
+        """
+        The live profiles as a compiled catalog and index for ExpertMatcher.set_catalog.
+
+        Without tombstones nothing is copied: the embeddings and skill ids
+        stay memory-mapped.
+        """
+        vocabulary = self.vocabulary()
+        store = self._store(vocabulary)
+        embeddings, assignment = self.arrays['embeddings'], self.arrays['assignment']
+        exact_embeddings, exact_rows = embeddings, None
+        if np.any(self.deleted):
+            alive = np.flatnonzero(~self.deleted)
+            store, embeddings, assignment = store.take(alive), embeddings[alive], assignment[alive]
+            exact_rows = alive
+        catalog = CompiledProfiles(
+            store, embeddings,
+            _incidence(store.skill_indptr, store.skill_ids, len(vocabulary)),
+            _incidence(store.domain_indptr, store.domain_ids, len(vocabulary)),
+            # Quantized catalogs rescore from the mapped float32 rows
+            exact_embeddings, exact_rows)
+        n_probe = n_probe or self.manifest['n_probe']
+        if self.manifest['mode'] == 'ivf':
+            index = VectorIndex.from_assignment(
+                embeddings, np.asarray(self.arrays['centroids']), np.asarray(assignment), n_probe)
+        else:
+            index = VectorIndex(embeddings, n_probe=n_probe)
+        return catalog, index, vocabulary
+
+    def add(self, matcher: ExpertMatcher, ai_profiles: Profiles) -> 'CatalogSnapshot':
+        """
+        Append AI profiles, embedding only them, and return the new version.
+
+        A profile whose name is already in the snapshot replaces it. In 'ivf'
+        mode new rows join the list of their closest centroid; the centroids
+        are only retrained by a full build.
+        """
+        self.check(matcher)
+        vocabulary = self.vocabulary()
+        if isinstance(ai_profiles, ProfileStore):
+            # Re-key the store's skills to the snapshot's ids
+            skills = ai_profiles.incidence(vocabulary)
+            domains = ai_profiles.incidence(vocabulary, domains=True)
+            new = ProfileStore('ai', ai_profiles.names, ai_profiles.texts, vocabulary,
+                               skills.indptr.astype(np.int64), skills.indices.astype(np.int32),
+                               domains.indptr.astype(np.int64), domains.indices.astype(np.int32))
+        else:
+            new = ProfileStore.from_profiles(ai_profiles, 'ai', vocabulary)
+        if not len(new):
+            return self
+        embeddings = _embed(matcher, new.texts)
+        centroids = np.asarray(self.arrays['centroids'])
+        assignment = np.argmax(embeddings @ centroids.T, axis=1).astype(np.int32) \
+            if len(centroids) else np.zeros(len(new), dtype=np.int32)
+        replaced = set(new.names)
+        deleted = np.array(self.deleted)
+        deleted[[i for i, name in enumerate(self.names) if name in replaced]] = True
+
+        def appended(name: str, values: np.ndarray) -> np.ndarray:
+            return np.concatenate([self.arrays[name], values])
+
+        arrays = {
+            'embeddings': appended('embeddings', embeddings),
+            'skill_indptr': appended(
+                'skill_indptr', new.skill_indptr[1:] + self.arrays['skill_indptr'][-1]),
+            'skill_ids': appended('skill_ids', new.skill_ids),
+            'domain_indptr': appended(
+                'domain_indptr', new.domain_indptr[1:] + self.arrays['domain_indptr'][-1]),
+            'domain_ids': appended('domain_ids', new.domain_ids),
+            'deleted': np.concatenate([deleted, np.zeros(len(new), dtype=bool)]),
+            'assignment': appended('assignment', assignment)
+        }
+        profiles = {'names': self.names + list(new.names), 'texts': self.texts + list(new.texts),
+                    'skills': list(vocabulary.skills)}
+        return self._write(self.path, _current_version(self.path) + 1, self.manifest,
+                           profiles, arrays, previous=self.directory)
+
+    def remove(self, names: Iterable[str]) -> 'CatalogSnapshot':
+        """
+        Tombstone the profiles with these names and return the new version.
+
+        Only the tombstone array is rewritten; once COMPACT_DELETED of the
+        rows are tombstoned the snapshot is compacted instead.
+        """
+        names = set(names)
+        rows = [i for i, name in enumerate(self.names) if name in names]
+        deleted = np.array(self.deleted)
+        if not rows or deleted[rows].all():
+            return self
+        deleted[rows] = True
+        if np.count_nonzero(deleted) > COMPACT_DELETED * len(deleted):
+            return self.compact(deleted)
+        return self._write(self.path, _current_version(self.path) + 1, self.manifest,
+                           None, {'deleted': deleted}, previous=self.directory)
+
+    def compact(self, deleted: np.ndarray = None) -> 'CatalogSnapshot':
+        """Rewrite the snapshot without its tombstoned rows and return the new version."""
+        deleted = self.deleted if deleted is None else deleted
+        alive = np.flatnonzero(~np.asarray(deleted))
+        store = self._store(self.vocabulary()).take(alive)
+        arrays = {
+            'embeddings': self.arrays['embeddings'][alive],
+            'skill_indptr': store.skill_indptr, 'skill_ids': store.skill_ids,
+            'domain_indptr': store.domain_indptr, 'domain_ids': store.domain_ids,
+            'deleted': np.zeros(len(alive), dtype=bool),
+            'assignment': self.arrays['assignment'][alive]
+        }
+        profiles = {'names': list(store.names), 'texts': list(store.texts),
+                    'skills': self.skills}
+        return self._write(self.path, _current_version(self.path) + 1, self.manifest,
+                           profiles, arrays, previous=self.directory)
+
+
+def load_index(matcher: ExpertMatcher, path: str, precision: str = 'float32',
+               rescore: int = 4, n_probe: int = None) -> CatalogSnapshot:
+    """
+    Make the current version of a snapshot matcher's catalog for match_top_k.
+
+    precision and rescore are as in ExpertMatcher.build_index; n_probe
+    defaults to the value the snapshot was built with.
+    """
+    with matcher.instrumentation.stage('snapshot_load'):
+        snapshot = CatalogSnapshot.open(path)
+        snapshot.check(matcher)
+        catalog, index, vocabulary = snapshot.catalog(n_probe)
+    matcher.set_catalog(catalog, index, vocabulary, precision, rescore)
+    return snapshot
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Build and update AI catalog snapshots.')
+    parser.add_argument('command', choices=['build', 'add', 'remove', 'compact', 'info'])
+    parser.add_argument('--snapshot', required=True, help='Snapshot directory')
+    parser.add_argument('--ais', help='AI profiles to build from or add (.jsonl or .json)')
+    parser.add_argument('--names', nargs='+', default=[], help='Names of AI profiles to remove')
+    parser.add_argument('--index', choices=['exact', 'ivf'], default='exact',
+                        help='Index built by the build command')
+    parser.add_argument('--n-lists', type=int, help='Inverted lists in ivf mode')
+    parser.add_argument('--n-probe', type=int, default=8, help='Default lists visited in ivf mode')
+    args = parser.parse_args(argv)
+    if args.command in ('build', 'add') and not args.ais:
+        parser.error(f"{args.command} needs --ais")
+    if args.command == 'remove' and not args.names:
+        parser.error("remove needs --names")
+    return args
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+    if args.command in ('build', 'add'):
+        matcher = ExpertMatcher(
+            feedback_store=feedback_store_from_env(),
+            encoder=create_encoder(os.environ.get('INTELLIBRIDGE_ENCODER',
+                                                  'sentence-transformers')))
+        ai_profiles = list(iter_profiles(args.ais, 'ai_profiles'))
+        if args.command == 'build':
+            snapshot = CatalogSnapshot.build(args.snapshot, matcher, ai_profiles,
+                                             args.index, args.n_lists, args.n_probe)
+        else:
+            snapshot = CatalogSnapshot.open(args.snapshot).add(matcher, ai_profiles)
+    elif args.command == 'remove':
+        snapshot = CatalogSnapshot.open(args.snapshot).remove(args.names)
+    elif args.command == 'compact':
+        snapshot = CatalogSnapshot.open(args.snapshot).compact()
+    else:
+        snapshot = CatalogSnapshot.open(args.snapshot)
+    print(json.dumps(snapshot.manifest, indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _run_in_tmp_path(tmp_path, monkeypatch):
+    """Keep files the matcher creates relative to the working directory out of the repository."""
+    monkeypatch.chdir(tmp_path)
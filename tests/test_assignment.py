@@ -0,0 +1,52 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from assignment import assign
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+
+
+def best_total(scores: np.ndarray, capacity: int) -> float:
+    """Exhaustive optimum: every human gets an agent or none (-1), within capacity."""
+    n_humans, n_ais = scores.shape
+    best = 0.0
+    for choice in itertools.product(range(-1, n_ais), repeat=n_humans):
+        load = Counter(ai for ai in choice if ai >= 0)
+        if all(count <= capacity for count in load.values()):
+            best = max(best, sum(scores[i, ai] for i, ai in enumerate(choice) if ai >= 0))
+    return best
+
+
+@pytest.mark.parametrize('shape,capacity', [((4, 4), 1), ((5, 3), 2), ((6, 2), 2), ((3, 4), 3)])
+def test_assign_is_optimal_within_capacity(shape, capacity):
+    scores = np.random.default_rng(sum(shape) + capacity).random(shape)
+    human_rows, ai_columns = assign(scores, capacity)
+    assert len(set(human_rows.tolist())) == len(human_rows) == min(shape[0], shape[1] * capacity)
+    assert max(Counter(ai_columns.tolist()).values()) <= capacity
+    assert scores[human_rows, ai_columns].sum() == pytest.approx(best_total(scores, capacity))
+
+
+def test_assign_experts_leaves_humans_beyond_the_agent_slots_unassigned(tmp_path):
+    matcher = ExpertMatcher(feedback_store=JsonlFeedbackStore(str(tmp_path / 'fb.jsonl')),
+                            encoder=HashingEncoder())
+    skills = ['python', 'sql', 'law', 'python', 'finance', 'nlp', 'sql']
+    humans = [{'name': f'expert-{i}', 'bio': f'works on {skill}', 'skills': [skill]}
+              for i, skill in enumerate(skills)]
+    ais = [{'name': f'agent-{j}', 'description': f'agent for {skill}', 'capabilities': [skill]}
+           for j, skill in enumerate(['python', 'sql', 'law'])]
+
+    assignment = matcher.assign_experts(humans, ais, capacity=2)
+    matches = assignment['matches'].to_dataframe()
+    assert len(matches) == 6
+    assert len(assignment['unassigned_humans']) == 1
+    assert set(matches.human) | set(assignment['unassigned_humans']) == \
+        {human['name'] for human in humans}
+    assert matches.ai.value_counts().max() == 2
+    assert assignment['total_score'] == pytest.approx(matches.total_score.sum())
+
+    # One slot per agent: only three humans can be staffed
+    assert len(matcher.assign_experts(humans, ais, capacity=1)['unassigned_humans']) == 4
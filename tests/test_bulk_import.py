@@ -0,0 +1,39 @@
+import csv
+import json
+
+from bulk_import import ImportStats, import_profiles, iter_records
+
+BIOS = ['Data scientist using Python and SQL for finance analytics',
+        'Lawyer who reviews contracts and leads client communication',
+        'Backend engineer building Go services on AWS with Docker',
+        'Researcher in natural language processing and machine learning']
+
+
+def test_csv_and_jsonl_import_through_a_spawn_pool_like_in_process(tmp_path):
+    rows = [{'name': f'expert-{i}', 'bio': BIOS[i % 4], 'skills': 'Leadership, python'}
+            for i in range(20)]
+    rows[7]['bio'] = ''  # Skipped: no text
+    csv_path = tmp_path / 'experts.csv'
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['name', 'bio', 'skills'])
+        writer.writeheader()
+        writer.writerows(rows)
+    jsonl_path = tmp_path / 'experts.jsonl'
+    with open(jsonl_path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(dict(row, skills=row['skills'].split(','))) + '\n')
+
+    expected = list(import_profiles(iter_records(str(csv_path)), 'human', workers=1))
+    assert len(expected) == 19
+    assert [profile['name'] for profile in expected] == \
+        [row['name'] for row in rows if row['bio']]
+    assert expected[0]['skills'][:2] == ['Leadership', 'python']
+    assert {'sql', 'finance'} <= {skill.lower() for skill in expected[0]['skills']}
+
+    for path in (csv_path, jsonl_path):
+        stats = ImportStats()
+        # Enough chunks for the pool to start
+        imported = list(import_profiles(iter_records(str(path)), 'human', workers=2,
+                                        chunk_size=2, stats=stats))
+        assert imported == expected
+        assert (stats.imported, stats.skipped) == (19, 1)
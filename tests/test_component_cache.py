@@ -0,0 +1,27 @@
+import numpy as np
+
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+
+HUMANS = [{'name': 'Ada', 'bio': 'nlp researcher', 'skills': ['nlp', 'python']},
+          {'name': 'Lin', 'bio': 'cloud engineer', 'skills': ['aws', 'docker']}]
+AIS = [{'name': 'TextBot', 'description': 'natural language processing',
+        'capabilities': ['natural language processing', 'python']},
+       {'name': 'OpsBot', 'description': 'deployment automation', 'capabilities': ['docker']}]
+
+
+def test_skill_overlap_is_skipped_at_weight_zero_and_filled_in_when_weighted(tmp_path):
+    matcher = ExpertMatcher(feedback_store=JsonlFeedbackStore(str(tmp_path / 'fb.jsonl')),
+                            encoder=HashingEncoder())
+    unweighted = matcher.match_experts(HUMANS, AIS)
+    assert not np.any(unweighted.scores['skill_overlap'])
+    assert 'skill_overlap' not in matcher.instrumentation.recent_runs()[-1]['stages']
+
+    weights = dict(ExpertMatcher.DEFAULT_WEIGHTS, skill_overlap=0.5)
+    cached = matcher.match_experts(HUMANS, AIS, weights)
+    matcher.default_session.component_cache.clear()
+    fresh = matcher.match_experts(HUMANS, AIS, weights)
+    assert np.any(cached.scores['skill_overlap'])
+    for name in ('skill_overlap', 'total_score'):
+        assert np.array_equal(cached.scores[name], fresh.scores[name])
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+
+
+def test_matcher_uses_an_empty_cache_it_is_given(tmp_path):
+    encoder = HashingEncoder()
+    cache = EmbeddingCache(encoder.name, cache_dir=str(tmp_path / 'cache'), max_entries=100)
+    matcher = ExpertMatcher(embedding_cache=cache,
+                            feedback_store=JsonlFeedbackStore(str(tmp_path / 'feedback.jsonl')),
+                            encoder=encoder)
+
+    assert matcher.embedding_cache is cache
+    matcher._get_embeddings(['python developer', 'data engineer'])
+    assert len(cache) == 2
+    assert matcher.embedding_cache.directory.startswith(str(tmp_path))
+
+
+def test_caches_sharing_a_directory_do_not_reuse_each_others_slots(tmp_path):
+    first = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=10)
+    second = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=10)
+    first.put_many(['alpha'], np.full((1, 4), 1.0))
+    second.put_many(['beta'], np.full((1, 4), 2.0))
+    first.put_many(['gamma'], np.full((1, 4), 3.0))
+    for cache in (first, second):
+        assert [vector[0] for vector in cache.get_many(['alpha', 'beta', 'gamma'])] == [1, 2, 3]
+    first.close()
+    second.close()
+
+    reopened = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=10)
+    assert len(reopened) == 3
+    assert [vector[0] for vector in reopened.get_many(['alpha', 'beta', 'gamma'])] == [1, 2, 3]
+
+
+def test_vector_file_grows_on_demand_and_keeps_every_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(EmbeddingCache, 'INITIAL_SLOTS', 4)
+    writer = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=100)
+    reader = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=100)
+    writer.put_many(['t0'], np.zeros((1, 3)))
+    assert len(writer._vectors) == 4
+    assert reader.get_many(['t0'])[0] is not None and len(reader._vectors) == 4
+    texts = [f't{i}' for i in range(10)]
+    writer.put_many(texts, np.arange(30, dtype=np.float32).reshape(10, 3))
+    assert len(writer._vectors) == 16
+    # The reader remaps the grown file when it next looks
+    assert [vector[0] for vector in reader.get_many(texts)] == [0] + list(range(3, 30, 3))
+    reader.put_many(['extra'], np.full((1, 3), -1.0))
+    assert writer.get_many(['extra'])[0][0] == -1
+    assert len(writer) == len(reader) == 11
+
+
+def test_a_cache_of_another_dimension_is_never_overwritten(tmp_path):
+    cache = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=10)
+    cache.put_many(['alpha'], np.ones((1, 4)))
+    other = EmbeddingCache('model', cache_dir=str(tmp_path), max_entries=20)
+    with pytest.raises(ValueError):
+        other.put_many(['beta'], np.ones((1, 8)))
+    assert len(other) == 1
+    assert cache.get_many(['alpha'])[0][0] == 1
@@ -0,0 +1,23 @@
+from extractor import SkillExtractor
+
+
+def test_short_keywords_do_not_match_inside_other_words():
+    skills = SkillExtractor().extract_skills('A good mentor who likes email and html mail')
+    assert 'go' not in skills['technical']
+    assert 'ai' not in skills['domains']
+    assert 'ml' not in skills['domains']
+
+
+def test_plural_and_versioned_keywords_still_match():
+    skills = SkillExtractor().extract_skills(
+        'Strong communications, Python3 and TensorFlow2 on AWS clouds, C++17 and Go1.21')
+    assert skills['soft_skills'] == ['communication']
+    assert skills['technical'] == ['python', 'c++', 'go', 'aws']
+    assert skills['tools'] == ['tensorflow']
+    assert 'cloud' in skills['domains']
+
+
+def test_longer_keyword_also_reports_the_keywords_it_starts_with():
+    skills = SkillExtractor().extract_skills('Cloud computing and machine learning in healthcare')
+    assert skills['technical'] == ['machine learning', 'cloud computing']
+    assert skills['domains'] == ['healthcare', 'cloud']
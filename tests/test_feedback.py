@@ -0,0 +1,66 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+
+
+def test_add_feedback_prunes_in_memory_aggregates_when_the_store_compacts(tmp_path):
+    store = JsonlFeedbackStore(str(tmp_path / 'feedback.jsonl'), compact_every=10,
+                               half_life_days=1.0)
+    matcher = ExpertMatcher(feedback_store=store, encoder=HashingEncoder())
+    old = datetime.fromtimestamp(time.time() - 30 * 86400).isoformat()
+    for i in range(5):
+        # Thirty half-lives old: below PRUNE_BELOW as soon as it is rebased
+        store.append({'human': f'old-{i}', 'ai': 'agent', 'positive': False, 'timestamp': old})
+    matcher.load_feedback()
+    assert len(matcher.feedback.pair_counts) == 5
+    for i in range(5):
+        matcher.add_feedback('expert', f'agent-{i}', True)
+    assert set(matcher.feedback.pair_counts) == {'expert'}
+
+
+def test_jsonl_store_compacts_once_the_log_reaches_retention(tmp_path):
+    path = str(tmp_path / 'feedback.jsonl')
+    for _ in range(3):
+        # A fresh store per batch, like short-lived processes that never reach compact_every
+        store = JsonlFeedbackStore(path, compact_every=1000, retention=8)
+        for i in range(5):
+            store.append({'human': 'expert', 'ai': f'agent-{i}', 'positive': True, 'skills': []})
+    with open(path) as f:
+        assert len(f.readlines()) < 8
+    assert store.load().positive_count == 15
+
+
+def test_feedback_adjustment_scales_scores_like_the_dense_matrix(tmp_path):
+    matcher = ExpertMatcher(feedback_store=JsonlFeedbackStore(str(tmp_path / 'fb.jsonl')),
+                            encoder=HashingEncoder())
+    humans = [{'name': f'h{i}', 'bio': 'data scientist', 'skills': ['python', 'sql'][:i % 3]}
+              for i in range(4)]
+    ais = [{'name': f'a{j}', 'description': 'analytics agent', 'capabilities': ['python']}
+           for j in range(5)]
+    matcher.match_experts(humans, ais)  # Feedback looks skills up among the last matched humans
+    matcher.add_feedback('h1', 'a2', True)
+    matcher.add_feedback('h3', 'a0', False)
+    matcher.add_feedback('h2', 'a4', True)
+    adjustment = matcher.feedback.adjustment_matrix(humans, ais)
+    dense = adjustment.toarray()
+    assert np.count_nonzero(dense) > adjustment.pairs.nnz > 0
+    scores = np.random.default_rng(0).random((4, 5))
+    np.testing.assert_allclose(adjustment.apply(scores.copy()), scores * (1 + dense))
+    rows, cols = np.array([1, 3, 2, 0]), np.array([2, 0, 4, 1])
+    np.testing.assert_allclose(adjustment.values(rows, cols), dense[rows, cols])
+
+
+def test_update_skill_weights_is_a_deprecated_view_of_the_feedback(tmp_path):
+    matcher = ExpertMatcher(feedback_store=JsonlFeedbackStore(str(tmp_path / 'fb.jsonl')),
+                            encoder=HashingEncoder())
+    matcher.add_feedback('h0', 'a0', True)  # Skills unknown until h0 is matched
+    matcher.default_session.remember_humans(
+        [{'name': 'h0', 'bio': 'data scientist', 'skills': ['python', 'sql']}])
+    with pytest.deprecated_call():
+        assert matcher.update_skill_weights() == pytest.approx({'python': 0.5, 'sql': 0.5})
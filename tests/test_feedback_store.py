@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from feedback import FeedbackIndex, legacy_records
+from feedback_store import create_feedback_store, migrate_json_feedback
+
+LEGACY = {
+    'positive_matches': [
+        {'human': 'ada', 'ai': 'coder', 'timestamp': '2024-01-01T09:00:00', 'reason': None},
+        {'human': 'ada', 'ai': 'writer', 'timestamp': '2024-01-03T09:00:00', 'reason': 'good'},
+        {'human': 'bob', 'ai': 'coder', 'timestamp': '2024-01-04T09:00:00', 'reason': None,
+         'skills': ['Python', 'SQL']}
+    ],
+    'negative_matches': [
+        {'human': 'bob', 'ai': 'writer', 'timestamp': '2024-01-02T09:00:00', 'reason': 'off'}
+    ],
+    'skill_weights': {}
+}
+
+
+@pytest.mark.parametrize('backend', ['jsonl', 'sqlite'])
+def test_legacy_json_round_trips_through_the_store(tmp_path, backend):
+    json_path = str(tmp_path / 'match_feedback.json')
+    with open(json_path, 'w') as f:
+        json.dump(LEGACY, f)
+    path = str(tmp_path / f'feedback.{backend}')
+    options = {'half_life_days': 30.0}
+
+    assert migrate_json_feedback(json_path, create_feedback_store(backend, path, **options)) == 4
+    assert not os.path.exists(json_path) and os.path.exists(f"{json_path}.migrated")
+
+    expected = FeedbackIndex(30.0)
+    for record in legacy_records(LEGACY):
+        expected.add(record)
+    # A fresh store reads back what the first one wrote
+    store = create_feedback_store(backend, path, **options)
+    assert not store.is_empty()
+    loaded = store.load()
+    assert (loaded.positive_count, loaded.negative_count) == (3, 1)
+    assert [(r['human'], r['ai'], r['positive']) for r in loaded.recent] == \
+        [(r['human'], r['ai'], r['positive']) for r in expected.recent]
+    for human in ('ada', 'bob'):
+        for ai in ('coder', 'writer'):
+            assert loaded.pair_adjustment(human, ai) == pytest.approx(
+                expected.pair_adjustment(human, ai))
+    assert loaded.skill_weights == pytest.approx(expected.skill_weights)
+    assert loaded.skill_weights == pytest.approx({'python': 0.5, 'sql': 0.5})
+    assert dict(loaded.pending_positive) == pytest.approx(dict(expected.pending_positive))
+
+    # A store that already holds feedback is never migrated into again
+    with open(json_path, 'w') as f:
+        json.dump(LEGACY, f)
+    assert migrate_json_feedback(json_path, store) == 0
+    assert store.load().total_count == 4
+
+
+def test_jsonl_store_counts_records_appended_by_other_processes(tmp_path):
+    path = str(tmp_path / 'feedback.jsonl')
+    # Two stores on one log, like two processes appending in turn
+    stores = [create_feedback_store('jsonl', path, compact_every=1000, retention=8)
+              for _ in range(2)]
+    for i in range(20):
+        stores[i % 2].append({'human': 'expert', 'ai': f'agent-{i}', 'positive': True})
+        with open(path) as f:
+            assert len(f.readlines()) < 8
+    assert stores[0].load().positive_count == 20
+
+
+def test_sqlite_store_compacts_every_compact_every_appends_across_processes(tmp_path):
+    path = str(tmp_path / 'feedback.db')
+    stores = [create_feedback_store('sqlite', path, compact_every=4) for _ in range(2)]
+    compacted = [stores[i % 2].append({'human': 'expert', 'ai': f'agent-{i}', 'positive': True})
+                 for i in range(8)]
+    assert compacted == [False, False, False, True] * 2
+    stores[0].clear()
+    assert stores[1].is_empty()
+    assert not any(stores[1].append({'human': 'expert', 'ai': 'agent', 'positive': True})
+                   for _ in range(3))
@@ -0,0 +1,35 @@
+from embedding_cache import EmbeddingCache
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return super().encode(texts, **kwargs)
+
+
+def test_rescoring_reads_stored_rows_instead_of_encoding(tmp_path):
+    encoder = CountingEncoder()
+    matcher = ExpertMatcher(
+        embedding_cache=EmbeddingCache(encoder.name, cache_dir=str(tmp_path / 'cache')),
+        feedback_store=JsonlFeedbackStore(str(tmp_path / 'feedback.jsonl')),
+        encoder=encoder)
+    skills = ['python', 'sql', 'nlp', 'finance', 'law', 'design']
+    ais = [{'name': f'agent-{i}', 'description': f'agent for {skills[i % 6]} and {skills[i % 5]}',
+            'capabilities': [skills[i % 6], skills[(i * 7) % 6]]} for i in range(60)]
+    humans = [{'name': f'expert-{i}', 'bio': f'works on {skills[i % 6]}',
+               'skills': [skills[i % 6], skills[(i + 1) % 6]]} for i in range(5)]
+    matcher.build_index(ais)
+    exact = matcher.match_top_k(humans, k=3).to_dataframe()
+
+    matcher.build_index(ais, precision='int8', rescore=4)
+    encoded = encoder.encoded
+    rescored = matcher.match_top_k(humans, k=3).to_dataframe()
+    assert encoder.encoded == encoded  # Humans come from the cache, agents from stored rows
+    assert list(rescored.ai) == list(exact.ai)
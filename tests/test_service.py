@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import numpy as np
+
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+from service import MatchingService
+
+SKILLS = ['python', 'sql', 'nlp', 'finance', 'law', 'design']
+HUMANS = [{'name': f'expert-{i}', 'bio': f'works on {SKILLS[i % 6]}',
+           'skills': [SKILLS[i % 6], SKILLS[(i + 2) % 6]]} for i in range(6)]
+AIS = [{'name': f'agent-{j}', 'description': f'agent for {SKILLS[j % 6]}',
+        'capabilities': [SKILLS[j % 6], SKILLS[(j * 5) % 6]]} for j in range(9)]
+
+
+def make_matcher(tmp_path) -> ExpertMatcher:
+    return ExpertMatcher(feedback_store=JsonlFeedbackStore(str(tmp_path / 'fb.jsonl')),
+                         encoder=HashingEncoder())
+
+
+def serve(matcher: ExpertMatcher, requests, **options):
+    """Dispatch (path, body) requests concurrently; returns the (status, payload) pairs."""
+    async def run():
+        service = MatchingService(matcher, **options)
+        server = await service.start('127.0.0.1', 0)
+        try:
+            responses = await asyncio.gather(*(
+                service.dispatch('POST', path, body if isinstance(body, bytes) else
+                                 json.dumps(body).encode('utf-8'))
+                for path, body in requests))
+            return responses, service.metrics.counters
+        finally:
+            server.close()
+            await service.close()
+    return asyncio.run(run())
+
+
+def pairs(matches):
+    return [(match['human'], match['ai'], round(match['total_score'], 9)) for match in matches]
+
+
+def test_concurrent_requests_share_encode_batches(tmp_path):
+    matcher = make_matcher(tmp_path)
+    matcher.build_index(AIS)
+    requests = [('/match_top_k', {'humans': [human], 'k': 3}) for human in HUMANS]
+    responses, counters = serve(matcher, requests, window_seconds=0.05)
+
+    assert [status for status, _ in responses] == [200] * len(HUMANS)
+    assert counters['batches'] < len(HUMANS)
+    for human, (_, payload) in zip(HUMANS, responses):
+        assert pairs(payload['matches']) == pairs(matcher.match_top_k([human], 3))
+
+
+def test_match_trims_to_top_k_per_human_and_accepts_partial_weights(tmp_path):
+    matcher = make_matcher(tmp_path)
+    humans = HUMANS[:4]
+    weights = {'skill_overlap': 0.5}
+    (status, payload), = serve(matcher, [('/match', {'humans': humans, 'ais': AIS[:4],
+                                                     'weights': weights, 'top_k': 2})])[0]
+
+    assert status == 200
+    expected = matcher.match_experts(humans, AIS[:4], {**ExpertMatcher.DEFAULT_WEIGHTS,
+                                                       **weights})
+    keep = np.flatnonzero(np.arange(len(expected)) % 4 < 2)
+    assert pairs(payload['matches']) == pairs(expected.to_dicts(keep))
+
+
+def test_invalid_requests_get_400(tmp_path):
+    matcher = make_matcher(tmp_path)
+    requests = [
+        ('/match', b'{not json'),
+        ('/match', {'humans': 'expert', 'ais': AIS}),
+        ('/match', {'humans': HUMANS, 'ais': AIS, 'weights': {'charisma': 1.0}}),
+        ('/match', {'humans': HUMANS, 'ais': AIS, 'top_k': -1}),
+        ('/match_top_k', {'humans': HUMANS})  # No catalog indexed
+    ]
+    responses, counters = serve(matcher, requests)
+    assert [status for status, _ in responses] == [400] * len(requests)
+    assert all('error' in payload for _, payload in responses)
+    assert counters['errors'] == len(requests)
+
+
+def test_a_full_queue_rejects_requests_with_503(tmp_path):
+    matcher = make_matcher(tmp_path)
+
+    async def run():
+        service = MatchingService(matcher, max_queue=1)
+        server = await service.start('127.0.0.1', 0)
+        # Stop draining the queue and fill its only slot
+        await service.batcher.stop()
+        service.batcher.queue.put_nowait((['queued'], asyncio.get_running_loop().create_future()))
+        try:
+            status, payload = await service.dispatch('POST', '/match', json.dumps(
+                {'humans': HUMANS, 'ais': AIS}).encode('utf-8'))
+            return status, payload, service.metrics.counters
+        finally:
+            server.close()
+            await service.close()
+
+    status, payload, counters = asyncio.run(run())
+    assert status == 503
+    assert 'queue is full' in payload['error']
+    assert counters['rejected'] == 1
@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+
+from profile_store import ProfileStore, normalize_skill
+from skill_matrix import (SkillVocabulary, complementarity_matrix, domain_alignment_matrix,
+                          domain_skills, flatten_skills)
+
+SKILLS = ['Python', 'python ', 'SQL', 'nlp', 'Machine  Learning', 'rust', 'finance', 'law']
+
+
+def jaccard(left: set, right: set) -> float:
+    union = len(left | right)
+    return len(left & right) / union if union else 0.0
+
+
+def normalized(skills: set) -> set:
+    return {normalize_skill(skill) for skill in skills}
+
+
+def test_sparse_components_match_the_per_pair_set_computation():
+    rng = random.Random(0)
+    humans = [{'name': f'expert-{i}', 'bio': 'bio',
+               'skills': rng.sample(SKILLS, rng.randint(0, 4))} for i in range(12)]
+    ais = []
+    for j in range(15):
+        if j % 2:
+            capabilities = {'tasks': rng.sample(SKILLS, rng.randint(0, 3)),
+                            'domains': rng.sample(SKILLS, rng.randint(0, 2))}
+        else:
+            capabilities = rng.sample(SKILLS, rng.randint(0, 4))
+        ais.append({'name': f'agent-{j}', 'description': 'agent', 'capabilities': capabilities})
+    # Humans may use skills the AI side never interned, as in match_top_k
+    ais_store = ProfileStore.from_profiles(ais, 'ai')
+    humans_store = ProfileStore.from_profiles(humans, 'human')
+    vocabulary = SkillVocabulary()
+    ai_skills, ai_domains = (ais_store.incidence(vocabulary, domains=domains)
+                             for domains in (False, True))
+    human_skills, human_domains = (humans_store.incidence(vocabulary, domains=domains,
+                                                          grow=False)
+                                   for domains in (False, True))
+
+    complementarity = complementarity_matrix(human_skills, ai_skills)
+    domain_alignment = domain_alignment_matrix(human_domains, ai_domains)
+    for i, human in enumerate(humans):
+        for j, ai in enumerate(ais):
+            left, right = normalized(set(human['skills'])), \
+                normalized(flatten_skills(ai['capabilities']))
+            expected = 1 - jaccard(left, right) if left | right else 0.0
+            assert np.isclose(complementarity[i, j], expected)
+            assert np.isclose(domain_alignment[i, j], jaccard(
+                normalized(domain_skills(human['skills'])),
+                normalized(domain_skills(ai['capabilities']))))
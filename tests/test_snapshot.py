@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+from encoders import HashingEncoder
+from feedback_store import JsonlFeedbackStore
+from matcher import ExpertMatcher
+from snapshot import CatalogSnapshot, load_index
+
+SKILLS = ['python', 'sql', 'nlp', 'machine learning', 'rust', 'design', 'finance', 'law']
+
+
+def make_matcher(tmp_path, encoder=None) -> ExpertMatcher:
+    encoder = encoder or HashingEncoder()
+    return ExpertMatcher(
+        embedding_cache=EmbeddingCache(encoder.name, cache_dir=str(tmp_path / 'cache')),
+        feedback_store=JsonlFeedbackStore(str(tmp_path / 'feedback.jsonl')),
+        encoder=encoder)
+
+
+def agent(i: int) -> dict:
+    return {'name': f'agent-{i}',
+            'description': f'agent for {SKILLS[i % 8]} and {SKILLS[(i * 3) % 8]} work',
+            'capabilities': [SKILLS[i % 8], SKILLS[(i * 5) % 8]]}
+
+
+def ranked(results):
+    matches = results.to_dataframe()
+    return list(matches.human), list(matches.ai), matches.total_score.to_numpy()
+
+
+@pytest.mark.parametrize('precision', ['float32', 'int8'])
+def test_snapshot_matches_like_build_index_after_every_change(tmp_path, precision):
+    matcher = make_matcher(tmp_path)
+    loader = make_matcher(tmp_path)
+    humans = [{'name': f'expert-{i}', 'bio': f'works on {SKILLS[i % 8]}',
+               'skills': [SKILLS[i % 8], SKILLS[(i + 3) % 8]]} for i in range(8)]
+    path = str(tmp_path / 'catalog.snapshot')
+    ais = [agent(i) for i in range(120)]
+
+    def assert_same(snapshot, catalog):
+        assert len(snapshot) == len(catalog)
+        matcher.build_index(catalog, precision=precision)
+        load_index(loader, path, precision=precision)
+        expected, actual = ranked(matcher.match_top_k(humans, 5)), \
+            ranked(loader.match_top_k(humans, 5))
+        assert actual[:2] == expected[:2]
+        np.testing.assert_allclose(actual[2], expected[2], atol=1e-6)
+
+    snapshot = CatalogSnapshot.build(path, matcher, ais[:100])
+    assert_same(snapshot, ais[:100])
+    snapshot = snapshot.add(matcher, ais[100:])
+    assert_same(snapshot, ais)
+    removed = {f'agent-{i}' for i in range(0, 120, 10)}
+    snapshot = snapshot.remove(removed)
+    assert snapshot.manifest['deleted'] == len(removed)
+    ais = [profile for profile in ais if profile['name'] not in removed]
+    assert_same(snapshot, ais)
+    snapshot = snapshot.compact()
+    assert snapshot.manifest['deleted'] == 0
+    assert_same(CatalogSnapshot.open(path), ais)
+
+
+def test_snapshot_rejects_an_encoder_with_other_settings(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    CatalogSnapshot.build(path, make_matcher(tmp_path), [agent(i) for i in range(20)])
+    with pytest.raises(ValueError, match='rebuild it'):
+        load_index(make_matcher(tmp_path, HashingEncoder(dim=512)), path)
+    # Same name, different vectors
+    renamed = HashingEncoder(dim=512)
+    renamed.name = HashingEncoder().name
+    with pytest.raises(ValueError, match='encoder_config'):
+        load_index(make_matcher(tmp_path, renamed), path)
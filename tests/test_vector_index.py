@@ -0,0 +1,20 @@
+import numpy as np
+
+from vector_index import VectorIndex
+
+
+def test_grouped_ivf_search_only_returns_each_querys_probed_lists():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(2000, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    queries = embeddings[rng.choice(len(embeddings), 100, replace=False)] + 0.1
+    index = VectorIndex(embeddings, mode='ivf', n_lists=40, n_probe=3)
+
+    ids, scores = index.search(queries, k=5)
+
+    for query, row_ids, row_scores in zip(queries, ids, scores):
+        candidates = index.candidates(query)
+        candidate_scores = embeddings[candidates] @ query
+        expected = candidates[np.argsort(-candidate_scores, kind='stable')[:5]]
+        assert list(row_ids) == list(expected)
+        assert np.allclose(row_scores, embeddings[row_ids] @ query, atol=1e-5)
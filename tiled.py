@@ -0,0 +1,208 @@
+"""
+Multi-core tiled scoring of large human x AI grids.
+
+The grid is split into (human tile, AI tile) blocks that are scored in a
+process pool. Embedding matrices, skill/domain incidence matrices, the skill
+similarities used for skill overlap and the feedback adjustments live in
+shared memory, so tasks only carry tile bounds. Each block is reduced to its
+per-human top-k before it is returned, and the parent merges the block
+results of one human tile at a time, so memory stays bounded by the tile
+sizes rather than the grid.
+"""
+import os
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from feedback import FeedbackAdjustment
+from match_results import EXPLAINED_COLUMNS
+from matcher import COMPONENTS, ExpertMatcher
+from skill_matrix import (SkillVocabulary, complementarity_matrix, domain_alignment_matrix,
+                          soft_jaccard_matrix)
+from vector_index import top_k_indices
+
+
+class SharedArrays:
+    """A set of NumPy arrays copied into named shared-memory blocks."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._blocks = []
+        self.descriptors = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.descriptors[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _share_profiles(prefix: str, compiled) -> Dict[str, np.ndarray]:
+    """Flatten compiled profiles into plain arrays that can be placed in shared memory."""
+    arrays = {f'{prefix}_embeddings': compiled.embeddings}
+    matrices = {'skill': compiled.skill_incidence, 'domain': compiled.domain_incidence,
+                'used_skill': compiled.profiles.used_skills()[0]}
+    for kind, matrix in matrices.items():
+        arrays[f'{prefix}_{kind}_data'] = matrix.data
+        arrays[f'{prefix}_{kind}_indices'] = matrix.indices
+        arrays[f'{prefix}_{kind}_indptr'] = matrix.indptr
+        arrays[f'{prefix}_{kind}_shape'] = np.asarray(matrix.shape, dtype=np.int64)
+    return arrays
+
+
+# Worker-side state: attached shared-memory blocks and the views onto them
+_attached = {}
+
+
+def _attach(descriptors: Dict) -> Dict[str, np.ndarray]:
+    block_names = {block_name for block_name, _, _ in descriptors.values()}
+    # Release blocks from earlier human batches so their memory can be freed
+    for block_name in list(_attached):
+        if block_name not in block_names:
+            _attached.pop(block_name).close()
+    arrays = {}
+    for name, (block_name, shape, dtype) in descriptors.items():
+        if block_name not in _attached:
+            _attached[block_name] = SharedMemory(name=block_name)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=_attached[block_name].buf)
+    return arrays
+
+
+def _csr(arrays: Dict[str, np.ndarray], prefix: str) -> sparse.csr_matrix:
+    return sparse.csr_matrix(
+        (arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'], arrays[f'{prefix}_indptr']),
+        shape=tuple(arrays[f'{prefix}_shape']))
+
+
+def _score_tile(task: Tuple) -> Tuple:
+    """Score one block of the grid and reduce it to the per-human top-k."""
+    descriptors, (h0, h1), (a0, a1), weights, k = task
+    arrays = _attach(descriptors)
+    components = {
+        'skill_similarity': (arrays['human_embeddings'][h0:h1] @
+                             arrays['ai_embeddings'][a0:a1].T).astype(np.float64),
+        'complementarity': complementarity_matrix(
+            _csr(arrays, 'human_skill')[h0:h1], _csr(arrays, 'ai_skill')[a0:a1]),
+        'domain_alignment': domain_alignment_matrix(
+            _csr(arrays, 'human_domain')[h0:h1], _csr(arrays, 'ai_domain')[a0:a1]),
+        'skill_overlap': soft_jaccard_matrix(
+            _csr(arrays, 'human_used_skill')[h0:h1], _csr(arrays, 'ai_used_skill')[a0:a1],
+            arrays['skill_pair_similarity'])
+        if weights.get('skill_overlap', 0.0) else np.zeros((h1 - h0, a1 - a0)),
+        'feedback_adjustment': FeedbackAdjustment(
+            _csr(arrays, 'pair')[h0:h1, a0:a1], arrays['skill_adjustments'][h0:h1])
+    }
+    total_scores = ExpertMatcher._combine_scores(components, weights)
+    best = top_k_indices(total_scores, k)
+    rows = np.arange(h1 - h0)[:, np.newaxis]
+    return (h0, a0 + best, np.take_along_axis(total_scores, best, axis=1),
+            [components[name].values(rows, best) if name == 'feedback_adjustment'
+             else np.take_along_axis(components[name], best, axis=1) for name in COMPONENTS])
+
+
+class TiledScorer:
+    """
+    Scores blocks of humans against a fixed AI catalog in a process pool.
+
+    The AI side is placed in shared memory once; each call to match shares
+    the human block, fans its tiles out to the pool and yields the merged
+    top-k matches for one human tile at a time.
+    """
+
+    def __init__(self, matcher: ExpertMatcher, ai_profiles: List[Dict],
+                 weights: Dict[str, float] = None, k: int = 10,
+                 tile_size: Tuple[int, int] = (512, 2048), workers: int = None):
+        self.matcher = matcher
+        self.weights = weights or ExpertMatcher.DEFAULT_WEIGHTS
+        self.k = k
+        self.tile_humans, self.tile_ais = tile_size
+        self.vocabulary = SkillVocabulary()
+        self.ais = matcher._compile_profiles(ai_profiles, False, self.vocabulary)
+        self.ai_arrays = SharedArrays(_share_profiles('ai', self.ais))
+        self.pool = get_context('spawn').Pool(workers or os.cpu_count())
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.ai_arrays.close()
+
+    def __enter__(self) -> 'TiledScorer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def match(self, human_profiles: List[Dict]) -> Iterator[Dict]:
+        """Yield the top-k matches of every human, best first, in input order."""
+        if not human_profiles or not len(self.ais):
+            return
+        humans = self.matcher._compile_profiles(
+            human_profiles, True, self.vocabulary, grow=False)
+        self.matcher._remember_humans(humans.profiles)
+        pair_matrix = self.matcher.feedback.pair_matrix(humans.profiles, self.ais.profiles)
+        if self.weights.get('skill_overlap', 0.0):
+            skill_pair_similarity = self.matcher.skill_embeddings.similarity(
+                humans.profiles.used_skills()[1], self.ais.profiles.used_skills()[1],
+                self.matcher.SKILL_OVERLAP_THRESHOLD)
+        else:
+            # Unweighted, so _score_tile never reads it; skip embedding every skill
+            skill_pair_similarity = np.zeros(0, dtype=np.float32)
+        human_arrays = SharedArrays({
+            **_share_profiles('human', humans),
+            'pair_data': pair_matrix.data,
+            'pair_indices': pair_matrix.indices,
+            'pair_indptr': pair_matrix.indptr,
+            'pair_shape': np.asarray(pair_matrix.shape, dtype=np.int64),
+            'skill_adjustments': self.matcher.feedback.skill_adjustments(humans.profiles),
+            'skill_pair_similarity': skill_pair_similarity
+        })
+        try:
+            descriptors = {**self.ai_arrays.descriptors, **human_arrays.descriptors}
+            human_tiles = [(h0, min(h0 + self.tile_humans, len(humans)))
+                           for h0 in range(0, len(humans), self.tile_humans)]
+            ai_tiles = [(a0, min(a0 + self.tile_ais, len(self.ais)))
+                        for a0 in range(0, len(self.ais), self.tile_ais)]
+            tasks = ((descriptors, human_tile, ai_tile, self.weights, self.k)
+                     for human_tile in human_tiles for ai_tile in ai_tiles)
+
+            pending = []
+            for result in self.pool.imap(_score_tile, tasks):
+                pending.append(result)
+                if len(pending) == len(ai_tiles):
+                    yield from self._merge(humans, pending)
+                    pending = []
+        finally:
+            human_arrays.close()
+
+    def _merge(self, humans, tile_results: List[Tuple]) -> Iterator[Dict]:
+        """Reduce the per-AI-tile top-k lists of one human tile to its final top-k."""
+        h0 = tile_results[0][0]
+        ai_columns = np.concatenate([result[1] for result in tile_results], axis=1)
+        total_scores = np.concatenate([result[2] for result in tile_results], axis=1)
+        components = [np.concatenate([result[3][c] for result in tile_results], axis=1)
+                      for c in range(len(COMPONENTS))]
+        # Order candidates by AI index first so ties keep catalog order
+        order = np.argsort(ai_columns, axis=1, kind='stable')
+        ai_columns = np.take_along_axis(ai_columns, order, axis=1)
+        total_scores = np.take_along_axis(total_scores, order, axis=1)
+        components = [np.take_along_axis(values, order, axis=1) for values in components]
+
+        for row, best in enumerate(top_k_indices(total_scores, self.k)):
+            for col in best:
+                values = dict(zip(COMPONENTS, (float(values[row, col]) for values in components)))
+                yield {
+                    'human': humans.profiles.names[h0 + row],
+                    'ai': self.ais.profiles.names[ai_columns[row, col]],
+                    'total_score': float(total_scores[row, col]),
+                    **values,
+                    'explanation': self.matcher._generate_explanation(
+                        *(values[name] for name in EXPLAINED_COLUMNS))
+                }
@@ -0,0 +1,165 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from quantization import Embeddings, QuantizedMatrix, similarity
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k highest scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        # argpartition breaks ties at the k-th score arbitrarily; fall back to a
+        # stable full sort for those rows so results match sorting the whole row
+        kth_scores = np.take_along_axis(scores, candidates, axis=1).min(axis=1, keepdims=True)
+        for row in np.flatnonzero((scores >= kth_scores).sum(axis=1) > k):
+            candidates[row] = np.argsort(-scores[row], kind='stable')[:k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    # Stable sort keeps catalog order among ties, like sorting the full row would
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class VectorIndex:
+    """
+    Inner-product index over row-normalised embeddings.
+
+    In 'exact' mode every query is scored against the whole matrix. In 'ivf'
+    mode the rows are clustered with spherical k-means into n_lists inverted
+    lists; a query only visits the n_probe lists whose centroids are closest,
+    so n_probe trades recall for latency. The embeddings may be a
+    QuantizedMatrix, in which case queries are scored at its precision.
+    """
+
+    def __init__(self, embeddings: Embeddings, mode: str = 'exact',
+                 n_lists: int = None, n_probe: int = 8, n_iter: int = 10, seed: int = 0):
+        if mode not in ('exact', 'ivf'):
+            raise ValueError(f"Unknown index mode: {mode}")
+        self.embeddings = embeddings
+        self.mode = mode
+        self.n_probe = n_probe
+        self.centroids = None
+        self.lists = []
+        if mode == 'ivf' and len(embeddings):
+            if n_lists is None:
+                n_lists = max(1, int(np.sqrt(len(embeddings))))
+            self._train(min(n_lists, len(embeddings)), n_iter, seed)
+
+    @classmethod
+    def from_assignment(cls, embeddings: Embeddings, centroids: np.ndarray,
+                        assignment: np.ndarray, n_probe: int = 8) -> 'VectorIndex':
+        """Rebuild an 'ivf' index from saved centroids and the list of every row, without training."""
+        index = cls(embeddings, n_probe=n_probe)
+        index.mode = 'ivf'
+        index.centroids = centroids
+        order = np.argsort(assignment, kind='stable')
+        index.lists = np.split(order, np.searchsorted(
+            assignment[order], np.arange(1, len(centroids))))
+        return index
+
+    @property
+    def assignment(self) -> np.ndarray:
+        """Inverted list of every row (all 0 in exact mode)."""
+        assignment = np.zeros(len(self.embeddings), dtype=np.int32)
+        for c, rows in enumerate(self.lists):
+            assignment[rows] = c
+        return assignment
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def _train(self, n_lists: int, n_iter: int, seed: int):
+        """Cluster the embeddings into inverted lists with spherical k-means."""
+        embeddings = self.embeddings
+        if isinstance(embeddings, QuantizedMatrix):
+            embeddings = embeddings.dequantize()
+        rng = np.random.default_rng(seed)
+        centroids = embeddings[rng.choice(len(embeddings), n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = np.argmax(embeddings @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, embeddings)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Keep the previous centroid for lists that lost all their members
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+        assignment = np.argmax(embeddings @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    def probe(self, queries: np.ndarray, n_probe: int = None) -> np.ndarray:
+        """Inverted lists visited by each query, closest first, as a len(queries) x n_probe array."""
+        n_probe = min(n_probe or self.n_probe, len(self.lists))
+        return top_k_indices(np.atleast_2d(queries) @ self.centroids.T, n_probe)
+
+    def candidates(self, query: np.ndarray, n_probe: int = None) -> np.ndarray:
+        """Row ids in the inverted lists closest to a single query (all rows in exact mode)."""
+        if self.mode == 'exact' or self.centroids is None:
+            return np.arange(len(self.embeddings))
+        return np.sort(np.concatenate([self.lists[c] for c in self.probe(query, n_probe)[0]]))
+
+    def candidate_groups(self, queries: np.ndarray, n_probe: int = None,
+                         group_size: int = 64) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Split ivf queries into groups that can be scored with one matrix product each.
+
+        A group holds up to group_size queries sharing their closest list, so
+        they mostly probe the same lists and the union of their candidates
+        stays close to each query's own.
+
+        Yields:
+            (query_rows, candidate_rows, allowed) where candidate_rows is the
+            sorted union of the rows in the lists probed by the queries at
+            query_rows, and allowed[i, j] tells whether query i probes the
+            list holding candidate j
+        """
+        probed = self.probe(queries, n_probe)
+        assignment = self.assignment
+        order = np.argsort(probed[:, 0], kind='stable')
+        closest = probed[order, 0]
+        bounds = np.flatnonzero(np.diff(closest)) + 1
+        for bucket in np.split(order, bounds):
+            for start in range(0, len(bucket), group_size):
+                query_rows = bucket[start:start + group_size]
+                lists = np.unique(probed[query_rows])
+                candidate_rows = np.sort(np.concatenate([self.lists[c] for c in lists]))
+                visits = np.zeros((len(query_rows), len(self.lists)), dtype=bool)
+                visits[np.arange(len(query_rows))[:, np.newaxis], probed[query_rows]] = True
+                yield query_rows, candidate_rows, visits[:, assignment[candidate_rows]]
+
+    def search(self, queries: np.ndarray, k: int,
+               n_probe: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows with the highest inner product for each query.
+
+        Returns:
+            (ids, scores) arrays of shape (len(queries), k), best first. In ivf
+            mode rows are padded with id -1 and score -inf when the probed
+            lists hold fewer than k rows.
+        """
+        if self.mode == 'exact':
+            scores = similarity(queries, self.embeddings)
+            ids = top_k_indices(scores, k)
+            return ids, np.take_along_axis(scores, ids, axis=1)
+
+        k = min(k, len(self.embeddings))
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if self.centroids is None:
+            return ids, scores
+        for query_rows, candidate_rows, allowed in self.candidate_groups(queries, n_probe):
+            candidate_scores = similarity(queries[query_rows], self.embeddings[candidate_rows])
+            candidate_scores[~allowed] = -np.inf
+            best = top_k_indices(candidate_scores, k)
+            best_scores = np.take_along_axis(candidate_scores, best, axis=1)
+            found = np.isfinite(best_scores)
+            ids[query_rows, :best.shape[1]] = np.where(found, candidate_rows[best], -1)
+            scores[query_rows, :best.shape[1]] = best_scores
+        return ids, scores